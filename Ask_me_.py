@@ -1,349 +1,635 @@
+import os
+import threading
+import time
 import pandas as pd
-from transformers import pipeline
-import re  # Import the re module
+from snapshot_store import frame_version, load_excel_cached, loaded_table, table_changed, table_version, watch_table
+from result_cache import cached_result, result_cache_stats
+from search_index import case_rows, get_search_index, patch_search_index, search_rows
+from pembangkit_rollup import coerce_pembangkit_numeric, get_pembangkit_rollup, render_pembangkitan
+from response_render import render_pht_responses
+from result_pages import PAGE_SIZE, mitigasi_pages, pembangkitan_pages, pht_pages, table_pages
+from answer_store import get_answer_store, patch_answer_store
+from network_graph import get_network_graph
+from intent_router import route
+from context_retrieval import QA_TOP_K, get_row_retriever, narrow_context, patch_row_retriever, retrieve_context
+from dataset_watcher import DatasetWatcher, diff_tables
+from compact_frames import compact_frame, memory_report
+from frame_cache import FrameCache
+from qa_registry import get_qa_model, qa_model_id, qa_model_stats, record_answer_latency
+from qa_registry import is_qa_model_ready as _local_model_ready, prewarm_qa_model as _prewarm_local_model
+from answer_memo import answer_memo_stats, get_answer_memo
+from metrics import query, register_collector, stage
+from federated_search import register_source
+from inference_pool import INFERENCE_WORKERS, get_inference_pool, prewarm_inference_pool, ready_inference_pool
+from embedding_index import prewarm_embedding_index, ready_embedding_index
+from playbook_store import get_playbook_store
+from startup_bundle import load_bundle, startup_bundle_stats
 
 ################################
 ### INITIALIZATION FUNCTIONS ###
 ################################
 
-# Fungsi untuk memuat data dari file excel yang sudah tersedia
+# Lokasi workbook sumber data
+PHT_FILE = 'DataPHT.xlsx'
+MITIGASI_FILE = '500kV Transmission Line Contingencies_Updated.xlsx'
+MITIGASI_SHEET = 'Contingency'
+PEMBANGKITAN_FILE = 'Data_Pembangkit.xlsx'
+
+# DMN/TML pembangkitan dikonversi ke numerik satu kali saat load, bukan di setiap query
+def _prepare_pembangkitan(df):
+    return compact_frame(coerce_pembangkit_numeric(df))
+
+# Per dataset: (workbook, sheet, konversi saat load, kolom key untuk diff baris saat reload).
+# Semua tabel disimpan ringkas (kolom teks berulang sebagai category, lihat compact_frames.py).
+DATASET_SOURCES = {
+    'pht': (PHT_FILE, 0, compact_frame, ('Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Sirkit ke')),
+    'mitigasi': (MITIGASI_FILE, MITIGASI_SHEET, compact_frame, ('SUTET',)),
+    'pembangkitan': (PEMBANGKITAN_FILE, 0, _prepare_pembangkitan, ('Perusahaan', 'Unit ')),
+}
+
+# Interval (detik) watcher yang memeriksa perubahan workbook di background
+WATCH_INTERVAL = float(os.environ.get('CHATBOT_WATCH_INTERVAL', '5'))
+
+# Pemakaian memory per tabel, dihitung satu kali per versi tabel (lihat table_memory_report)
+_MEMORY_REPORTS = FrameCache(memory_report, name='memory_report')
+
+# Jawaban QA dari versi workbook sebelumnya dibuang dari cache jawaban di disk, satu kali per versi
+# tabel (load pertama dan saat watcher/snapshot menukar tabel), bukan di setiap load_data_pht()
+def _memo_sync(name):
+    def sync(df):
+        memo = get_answer_memo()
+        if memo is not None:
+            memo.sync_version(name, frame_version(df))
+        return True
+    return sync
+
+_MEMO_SYNCS = {name: FrameCache(_memo_sync(name)) for name in DATASET_SOURCES}
+
+# Bangun struktur turunan satu kali per tabel (di-cache per DataFrame, rerun berikutnya gratis)
+def _build_derived(name, df):
+    get_search_index(df)
+    get_row_retriever(df)
+    if name == 'pht':
+        get_answer_store(df)
+        get_network_graph(df)
+    elif name == 'mitigasi':
+        get_playbook_store(df)
+    elif name == 'pembangkitan':
+        get_pembangkit_rollup(df)
+    _MEMORY_REPORTS.get(df)
+    # Embedding untuk pencarian fuzzy dibangun di background (lama untuk tabel besar)
+    prewarm_embedding_index(df)
+    _MEMO_SYNCS[name].get(df)
+
+# Dipanggil snapshot_store saat isi workbook berubah, sebelum versi baru terlihat oleh pembaca:
+# index pencarian dan retriever di-patch hanya untuk baris yang ditambah/diubah/dihapus, answer store
+# memakai ulang bagian yang kolomnya tidak berubah, lalu struktur turunan lain disiapkan, sehingga pembaca langsung bertukar ke versi baru yang lengkap.
+def _reload_hook(name):
+    key_columns = DATASET_SOURCES[name][3]
+
+    def on_reload(old_df, new_df):
+        diff = diff_tables(old_df, new_df, key_columns)
+        if diff is not None:
+            with stage('patch_indexes') as timer:
+                patch_search_index(old_df, new_df, diff)
+                patch_row_retriever(old_df, new_df, diff)
+                timer.rows = len(diff.changed)
+            _LAST_DIFFS[name] = diff.summary()
+        if name == 'pht':
+            patch_answer_store(old_df, new_df)
+        _build_derived(name, new_df)
+    return on_reload
+
+_LAST_DIFFS = {}
+_RELOAD_HOOKS = {name: _reload_hook(name) for name in DATASET_SOURCES}
+
+def _load_table(name, refresh=False):
+    path, sheet, prepare, _ = DATASET_SOURCES[name]
+    return load_excel_cached(path, sheet_name=sheet, prepare=prepare, on_reload=_RELOAD_HOOKS[name], refresh=refresh)
+
+_BUNDLE_CHECKED = False
+_BUNDLE_LOCK = threading.Lock()
+_IMPORTED = time.perf_counter()
+_UI_READY_SECONDS = None
+
+# Sekali per proses, sebelum load pertama: pasang tabel dan index dari startup bundle
+# (lihat startup_bundle.py) untuk workbook yang belum berubah sejak bundle dibangun
+def _adopt_startup_bundle():
+    global _BUNDLE_CHECKED
+    if _BUNDLE_CHECKED:
+        return
+    with _BUNDLE_LOCK:
+        if not _BUNDLE_CHECKED:
+            load_bundle({name: (path, sheet) for name, (path, sheet, _, _) in DATASET_SOURCES.items()})
+            _BUNDLE_CHECKED = True
+
+# Fungsi untuk memuat data dari file excel yang sudah tersedia.
+# Workbook dibaca lewat snapshot biner (lihat snapshot_store.py) dan disimpan satu kali per proses,
+# sehingga rerun Streamlit hanya membayar os.stat, bukan parsing openpyxl
+# (atau tanpa os.stat sama sekali jika start_data_watcher() aktif).
+# Pada cold start, tabel dan index diambil dari startup bundle jika tersedia.
 def load_data_pht():
-    df_pht = pd.read_excel('DataPHT.xlsx')
-    df_mitigasi = pd.read_excel('500kV Transmission Line Contingencies_Updated.xlsx', sheet_name='Contingency')
-    df_pembangkitan = pd.read_excel('Data_Pembangkit.xlsx')
-    return df_pht, df_mitigasi, df_pembangkitan
-
-# Inisialisasi pipeline dari Hugging Face Transformers untuk pertanyaan-jawaban (Q&A)
-qa_model = pipeline("question-answering", model="distilbert-base-cased-distilled-squad")
+    global _UI_READY_SECONDS
+    _adopt_startup_bundle()
+    with stage('load_data'):
+        tables = [_load_table(name) for name in DATASET_SOURCES]
+
+    with stage('build_indexes'):
+        for name, df in zip(DATASET_SOURCES, tables):
+            _build_derived(name, df)
+    if _UI_READY_SECONDS is None:
+        _UI_READY_SECONDS = time.perf_counter() - _IMPORTED
+    return tuple(tables)
+
+# Status startup, dipisah antara UI (tabel + index siap, pencarian bisa dipakai) dan model QA
+# (dimuat di background, lihat prewarm_qa_model). Waktu dihitung sejak Ask_me_ diimpor.
+def readiness():
+    return {
+        'ui_ready': _UI_READY_SECONDS is not None,
+        'model_ready': is_qa_model_ready(),
+        'ui_ready_seconds': _UI_READY_SECONDS,
+        'model_load_seconds': qa_model_stats()['load_seconds'],
+        'startup_bundle': startup_bundle_stats()['status'],
+    }
+
+# Muat ulang workbook yang berubah sejak terakhir dimuat; kembalikan ringkasan diff per dataset
+def refresh_data():
+    changes = {}
+    for name, (path, sheet, _, _) in DATASET_SOURCES.items():
+        if table_changed(path, sheet):
+            previous = table_version(path, sheet_name=sheet)
+            _LAST_DIFFS.pop(name, None)
+            with stage(f'reload_{name}'):
+                _load_table(name, refresh=True)
+            # File yang hanya di-touch (isi sama) tidak dihitung sebagai perubahan
+            if table_version(path, sheet_name=sheet) != previous:
+                changes[name] = _LAST_DIFFS.get(name, 'full')
+    return changes
+
+_WATCHER = None
+_WATCHER_LOCK = threading.Lock()
+
+# Mulai watcher di background (satu per proses). Setelah ini load_data_pht tidak lagi mengecek
+# file di setiap rerun; perubahan workbook diambil watcher dan ditukar secara atomik.
+def start_data_watcher(interval=None):
+    global _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is None:
+            load_data_pht()
+            for path, sheet, _, _ in DATASET_SOURCES.values():
+                watch_table(path, sheet)
+            _WATCHER = DatasetWatcher(refresh_data, interval or WATCH_INTERVAL)
+            register_collector('data_watcher', lambda: _WATCHER.stats)
+        return _WATCHER.start()
+
+# Pemakaian memory per tabel yang sudah dimuat (lihat compact_frames.memory_report). Dihitung satu kali
+# per versi tabel di _build_derived; di sini hanya dibaca, tanpa memuat atau mengecek workbook, sehingga
+# aman dipanggil dari collector metrics dan endpoint /stats. Tabel yang belum dimuat tidak dilaporkan.
+def table_memory_report():
+    reports = {}
+    for name, (path, sheet, _, _) in DATASET_SOURCES.items():
+        df = loaded_table(path, sheet)
+        report = _MEMORY_REPORTS.peek(df) if df is not None else None
+        if report is not None:
+            reports[name] = report
+    return reports
+
+PREVIEW_ROWS = 5
+_PREVIEWS = FrameCache(lambda df: df.head(PREVIEW_ROWS), name='table_preview')
+
+# Beberapa baris pertama per tabel untuk ditampilkan di UI (ikut disimpan di startup bundle).
+# tables = hasil load_data_pht() yang sudah dipegang pemanggil, supaya tidak dimuat ulang.
+def table_previews(tables):
+    return {name: _PREVIEWS.get(df) for name, df in zip(DATASET_SOURCES, tables)}
+
+# Pipeline Q&A tidak lagi dibuat saat import: dimuat saat pertama kali dipakai (atau lewat
+# prewarm_qa_model() di background), lihat qa_registry.py.
+# Dengan CHATBOT_INFERENCE_WORKERS > 0 yang disiapkan adalah inference pool (model dimuat di
+# forkserver, lihat inference_pool.py), bukan model di proses ini.
+def prewarm_qa_model():
+    if INFERENCE_WORKERS > 0 or get_inference_pool() is not None:
+        return prewarm_inference_pool()
+    return _prewarm_local_model()
+
+def is_qa_model_ready():
+    return get_inference_pool() is not None or _local_model_ready()
+
+# Akses Ask_me_.qa_model tetap didukung untuk kode lama.
+def __getattr__(name):
+    if name == 'qa_model':
+        return get_qa_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Statistik cache hasil query dan model QA ikut diekspor di metrics.render_prometheus()
+register_collector('result_cache', result_cache_stats)
+register_collector('qa_model', qa_model_stats)
+register_collector('table_memory', lambda: {f'{name}_bytes': report['bytes']
+                                            for name, report in table_memory_report().items()})
 
 #####################
 ### PHT FUNCTIONS ###
 #####################
 
-# Fungsi untuk mencari data berdasarkan kata kunci, tidak peka terhadap huruf besar/kecil
+# Fungsi untuk mencari data berdasarkan kata kunci, tidak peka terhadap huruf besar/kecil.
+# Keyword dicari sebagai substring literal lewat index trigram (lihat search_index.py);
+# baris yang cocok dikembalikan dalam huruf kecil.
 def search_data(df, keyword):
-    # Convert semua kolom dan baris ke huruf kecil untuk pencarian case-insensitive
-    df_lower = df.applymap(lambda s: s.lower() if isinstance(s, str) else s)
-    keyword_lower = keyword.lower()  # Konversi keyword menjadi huruf kecil
-    
-    # Cari data yang mengandung kata kunci di salah satu kolom
-    result = df_lower[df_lower.apply(lambda row: row.astype(str).str.contains(keyword_lower).any(), axis=1)]
-    
-    if result.empty:
-        return None
-    else:
-        return result
+    with stage('search_pht') as timer:
+        result = search_rows(df, keyword, upper=False)
+        timer.rows = _row_count(result)
+    return result
+
+def _row_count(result):
+    return 0 if result is None else len(result)
+
+NOT_FOUND_MESSAGE = "Data tidak ditemukan untuk kata kunci yang diminta."
 
-# Fungsi untuk membangun konteks dari data dan menyusun respons deskriptif
-def build_context_and_response(df, keyword):
-    # Cari data berdasarkan kata kunci (case-insensitive)
+# Cari data PHT dan render kedua varian respons sekaligus: (context, dengan highlight, polos)
+def _render_pht(df, keyword):
     result = search_data(df, keyword)
-    
     if result is None:
-        return None, "Data tidak ditemukan untuk kata kunci yang diminta."
-    else:
-        # Convert the keyword to highlighted text using a span tag with background color
-        keyword_highlighted = f'<span style="background-color: yellow">{keyword.upper()}</span>'
-        
-        # Menyusun kalimat deskriptif untuk setiap baris yang ditemukan
-        responses = []
-        for index, row in result.iterrows():
-            dari_gitet = row['Dari Gitet/Gistet'].upper()
-            ke_gitet = row['Ke Gitet/Gistet'].upper()
-            Sirkit = row['Sirkit ke']
-            panjang = row['Panjang Penghantar'] if not pd.isnull(row['Panjang Penghantar']) else 'tidak tersedia'
-            nominal = row['Nominal Arus (A)'] if not pd.isnull(row['Nominal Arus (A)']) else 'tidak tersedia'
-            kemampuan_max = row['Kemampuan Penghantar (A)'] if not pd.isnull(row['Kemampuan Penghantar (A)']) else 'tidak tersedia'
-            wilayah = row['Wilayah'].upper() if not pd.isnull(row['Wilayah']) else 'tidak tersedia'
-            derating = row['Keterangan Penyebab Derating'] if not pd.isnull(row['Keterangan Penyebab Derating']) else 'tidak tersedia'
-            persen_derating = row['Deklarasi Kemampuan (%)']*100 if not pd.isnull(row['Deklarasi Kemampuan (%)']) else 'tidak tersedia'
-                
-            # Buat kalimat deskriptif
-            description = (f"SUTET {dari_gitet}-{ke_gitet} #{Sirkit} ada di wilayah {wilayah} "
-                           f"dengan panjang penghantar {panjang} km dan kemampuan maksimal sebesar "
-                           f"{kemampuan_max} A, {persen_derating} % dari nominal {nominal} A. Alasan Derating: {derating}.")
-            
-            # Replace the keyword in the response with the highlighted version, using re.sub for case-insensitive replacement
-            description = re.sub(keyword, keyword_highlighted, description, flags=re.IGNORECASE)
-            
-            responses.append(description)
-        
-        # Tambahkan nomor pada setiap respons
-        full_response = "\n".join(f"{i + 1}. {resp}" for i, resp in enumerate(responses))
+        return None, NOT_FOUND_MESSAGE, NOT_FOUND_MESSAGE
+    with stage('render_pht') as timer:
+        highlighted, plain = render_pht_responses(result, keyword)
         context = result.to_string(index=False)
-        return context, full_response
+        timer.rows = len(result)
+    return context, highlighted, plain
+
+# Fungsi untuk membangun konteks dari data dan menyusun respons deskriptif.
+# highlight=False mengembalikan respons tanpa tag <span> (tidak perlu strip_html_tags lagi).
+# Hasil di-cache lintas sesi per (DataFrame/versi workbook, keyword), lihat result_cache.py.
+def build_context_and_response(df, keyword, highlight=True):
+    with query('search_pht', keyword):
+        context, highlighted, plain = cached_result('pht', df, keyword,
+                                                    lambda: _render_pht(df, keyword))
+    return context, highlighted if highlight else plain
 
 ##########################
 ### MITIGASI FUNCTIONS ###
 ##########################
 
+# Cari data mitigasi lewat index yang sama; baris yang cocok dikembalikan dalam huruf besar
 def search_data_mitigasi(df_1, keyword):
-    # Convert semua kolom dan baris ke huruf kecil untuk pencarian case-insensitive
-    df_lower_ = df_1.applymap(lambda s: s.upper() if isinstance(s, str) else s)
-    keyword_lower = keyword.upper()  # Konversi keyword menjadi huruf besar
-    
-    # Cari data yang mengandung kata kunci di salah satu kolom
-    result = df_lower_[df_lower_.apply(lambda row: row.astype(str).str.contains(keyword_lower).any(), axis=1)]
-    
-    if result.empty:
-        return None
-    else:
-        return result
+    with stage('search_mitigasi') as timer:
+        result = search_rows(df_1, keyword, upper=True)
+        timer.rows = _row_count(result)
+    return result
+
+# Cari data mitigasi dan ambil kedua varian respons sekaligus: (context, dengan highlight, polos).
+# Playbook sudah di-render saat load (lihat playbook_store.py), di sini hanya diambil per posisi baris.
+def _render_mitigasi(df_1, keyword):
+    with stage('search_mitigasi') as timer:
+        positions = get_search_index(df_1).positions(keyword)
+        timer.rows = len(positions)
+    if not len(positions):
+        return None, NOT_FOUND_MESSAGE, NOT_FOUND_MESSAGE
+    with stage('render_mitigasi') as timer:
+        highlighted, plain = get_playbook_store(df_1).render(positions, keyword)
+        # Convert the context (dataframe) to a string without row indices
+        context = case_rows(df_1.iloc[positions], upper=True).to_string(index=False)
+        timer.rows = len(positions)
+    return context, highlighted, plain
 
 # MITIGASI
-def build_context_and_response_mitigasi(df_1, keyword):
-    result = search_data_mitigasi(df_1, keyword)
-    
-    if result is None:
-        return None, "Data tidak ditemukan untuk kata kunci yang diminta."
-    else:
-        # Convert the keyword to highlighted text using a span tag with background color
-        keyword_highlighted = f'<span style="background-color: yellow">{keyword.upper()}</span>'
-        
-        # Menyusun kalimat deskriptif untuk setiap baris yang ditemukan
-        responses_mitigasi = []
-        for index, row in result.iterrows():
-            SUTET = row.get('SUTET', 'SUTET tidak ditemukan')
-            N_1 = row.get('N-1', 'Data N-1 tidak ditemukan')
-            Mit_1 = row.get('Mitigasi_1', 'tidak tersedia')
-            N_1_1 = row.get('N-1-1', 'tidak tersedia')
-            Mit_2 = row.get('Mitigasi_2', 'tidak tersedia')
-            N_1_2 = row.get('N-1-2', 'tidak tersedia')
-            Mit_3 = row.get('Mitigasi_3', 'tidak tersedia')
-            Ket = row.get('Ket', 'tidak ada')
-
-            # Helper function to format mitigation steps and handle NaN values
-            def format_mitigation(mitigation):
-                if pd.isna(mitigation):
-                    return "Tidak ada mitigasi yang tersedia."
-                # Split each line, and add a "-" before each line to make it a bullet point.
-                lines = mitigation.splitlines()
-                formatted_lines = "\n".join([f"- {line.strip()}" for line in lines if line.strip()])
-                return formatted_lines
-
-            # Buat kalimat deskriptif
-            description = (f"## ***{SUTET}***\n\n"
-                        f"Jika terjadi gangguan di ruas **{SUTET}**, mitigasi yang harus dilakukan adalah sebagai berikut:\n\n"
-                        f"**MITIGASI N-1** di ruas **{N_1}**:\n{format_mitigation(Mit_1)}\n\n"
-                        f"**MITIGASI N-1-1** di ruas **{N_1_1}**:\n{format_mitigation(Mit_2)}\n\n"
-                        f"**MITIGASI N-1-2** di ruas **{N_1_2}**:\n{format_mitigation(Mit_3)}\n\n"
-                        f"**KETERANGAN** : **{Ket}**")
-
-            # Replace the keyword in the response with the highlighted version, using re.sub for case-insensitive replacement
-            description = re.sub(keyword, keyword_highlighted, description, flags=re.IGNORECASE)
-
-            # Append the description to the list
-            responses_mitigasi.append(description)
-
-        # Combine all responses into one formatted string
-        full_response = "\n\n".join(responses_mitigasi)  # Use double newline for clarity between entries
-
-        # Convert the context (dataframe) to a string without row indices
-        context = result.to_string(index=False)
+def build_context_and_response_mitigasi(df_1, keyword, highlight=True):
+    with query('search_mitigasi', keyword):
+        context, highlighted, plain = cached_result('mitigasi', df_1, keyword,
+                                                    lambda: _render_mitigasi(df_1, keyword))
+    return context, highlighted if highlight else plain
+
+# Playbook mitigasi untuk nama ruas (SUTET, N-1, N-1-1 atau N-1-2) saat gangguan: lookup persis,
+# lalu prefix jika tidak ada yang persis. Tanpa scan tabel dan tanpa render ulang (lihat
+# playbook_store.py). None jika tidak ada ruas yang cocok.
+def mitigasi_playbook(df_1, ruas, highlight=True):
+    with query('playbook', ruas):
+        store = get_playbook_store(df_1)
+        with stage('playbook_lookup') as timer:
+            positions = store.lookup(ruas)
+            if not len(positions):
+                positions = store.lookup(ruas, prefix=True)
+            timer.rows = len(positions)
+        if not len(positions):
+            return None
+        highlighted, plain = store.render(positions, ruas)
+    return highlighted if highlight else plain
 
-        return context, full_response
-    
 ##############################
 ### PEMBANGKITAN FUNCTIONS ###
 ##############################
 
+# Cari data pembangkitan lewat index yang sama; baris yang cocok dikembalikan dalam huruf besar
 def search_data_pembangkitan(df_2, keyword):
-    # Convert semua kolom dan baris ke huruf besar untuk pencarian case-insensitive
-    df_lower_ = df_2.applymap(lambda s: s.upper() if isinstance(s, str) else s)
-    keyword_upper = keyword.upper()  # Konversi keyword menjadi huruf besar
-
-    # Cari data yang mengandung kata kunci di salah satu kolom
-    result = df_lower_[df_lower_.apply(lambda row: row.astype(str).str.contains(keyword_upper).any(), axis=1)]
-    
-    if result.empty:
-        return None
-    else:
-        return result
-
-# Function to dynamically build the context and response in table format, now supporting 'Unit', 'Jenis Pembangkit', and 'Perusahaan'
-def build_context_and_response_pembangkitan(df_2, keyword):
-    # Ensure DMN and TML are numeric, replace any non-numeric values with 0
-    df_2['DMN'] = pd.to_numeric(df_2['DMN'], errors='coerce').fillna(0)
-    df_2['TML'] = pd.to_numeric(df_2['TML'], errors='coerce').fillna(0)
-
-    # Search the data based on the keyword (both 'Perusahaan', 'Wilayah', 'Jenis Pembangkit', and 'Unit')
-    result = search_data_pembangkitan(df_2, keyword)
-
-    if result is None:
-        return None, "Data tidak ditemukan untuk kata kunci yang diminta."
-    else:
-        # Check if the keyword matches 'Perusahaan', 'Wilayah', 'Jenis', or 'Unit'
-        perusahaan_matches = result['Perusahaan'].str.contains(keyword, case=False, na=False)
-        jenis_matches = result['Jenis'].str.contains(keyword, case=False, na=False)
-        unit_matches = result['Unit '].str.contains(keyword, case=False, na=False)
-
-        if perusahaan_matches.any():
-            # Extract the first matching 'Perusahaan' for the title
-            perusahaan_title = result.loc[perusahaan_matches, 'Perusahaan'].iloc[0]  # Get the first matching Perusahaan
-
-            # Group the result by 'Wilayah' and show the sum of 'DMN' and 'TML' for each 'Wilayah'
-            grouped = result.groupby('Wilayah').agg({
-                'DMN': 'sum',
-                'TML': 'sum'
-            }).reset_index()
-
-            # Create a DataFrame for display and highlight the keyword
-            def highlight_keyword(text, keyword):
-                return re.sub(f"({keyword})", r"<span style='background-color: yellow'>\1</span>", text, flags=re.IGNORECASE)
-
-            highlighted_df = result.applymap(lambda x: highlight_keyword(str(x), keyword) if isinstance(x, str) else x)
-
-            # Build tables for each Wilayah with sum of DMN and TML at the bottom
-            wilayahs = highlighted_df['Wilayah'].unique()
-            full_html = ""
-
-            # Iterate over each Wilayah, display data, and include sum at the bottom
-            for wilayah in wilayahs:
-                wilayah_data = highlighted_df[highlighted_df['Wilayah'] == wilayah]
-                wilayah_dmn_sum = wilayah_data['DMN'].sum()
-                wilayah_tml_sum = wilayah_data['TML'].sum()
-
-                # Convert wilayah data to HTML table
-                table_html = wilayah_data[['Perusahaan', 'Jenis', 'Unit ', 'DMN', 'TML']].to_html(escape=False, index=False)
-
-                # Append the sum of DMN and TML at the bottom of each Wilayah's table
-                sum_html = f"<tr><td><strong>Total for {wilayah}</strong></td><td></td><td><strong>{round(wilayah_dmn_sum, 2)}</strong></td><td><strong>{round(wilayah_tml_sum, 2)}</strong></td></tr>"
-
-                # Wrap in HTML for each Wilayah and combine
-                full_html += f"<h3>Wilayah: {wilayah}</h3>{table_html}<table>{sum_html}</table><br><br>"
-
-            # Add the global sum of DMN and TML for all Wilayah at the bottom
-            global_dmn_sum = round(result['DMN'].sum(), 2)  # Round to 2 decimal places
-            global_tml_sum = round(result['TML'].sum(), 2)  # Round to 2 decimal places
-            global_sum_html = f"<h3>Global Sum</h3><table><tr><td><strong>Total DMN (MW):</strong></td><td><strong>{global_dmn_sum}</strong></td></tr><tr><td><strong>Total TML (MW):</strong></td><td><strong>{global_tml_sum}</strong></td></tr></table>"
-
-            # Combine everything into the final HTML output
-            full_html += global_sum_html
-
-            # Include Perusahaan in the title
-            return f"Perusahaan: {perusahaan_title.upper()}", full_html
-
-        # Check if the keyword matches 'Jenis Pembangkit'
-        elif jenis_matches.any():
-            # Filter data for the specific Jenis Pembangkit (Type of Power Plant)
-            jenis_data = result[result['Jenis'].str.contains(keyword, case=False)]
-
-            # Separate data into each 'Wilayah'
-            wilayahs = jenis_data['Wilayah'].unique()
-            full_html = ""
+    with stage('search_pembangkitan') as timer:
+        result = search_rows(df_2, keyword, upper=True)
+        timer.rows = _row_count(result)
+    return result
+
+# Render tabel pembangkitan dari rollup: (judul, html dengan highlight, html polos)
+def _render_pembangkitan(df_2, keyword):
+    # DataFrame dari load_data_pht sudah numerik; DataFrame lain dikonversi pada salinan (tidak dimutasi)
+    rollup = get_pembangkit_rollup(coerce_pembangkit_numeric(df_2))
+    with stage('render_pembangkitan'):
+        rendered = render_pembangkitan(rollup, keyword)
+    if rendered is None:
+        return None, NOT_FOUND_MESSAGE, NOT_FOUND_MESSAGE
+    return rendered
+
+# Function to dynamically build the context and response in table format, supporting 'Perusahaan',
+# 'Jenis Pembangkit', 'Unit' and 'Wilayah'. Subtotal per Wilayah dan total global diambil dari
+# rollup (lihat pembangkit_rollup.py). Hasil di-cache lintas sesi per (versi workbook, keyword).
+def build_context_and_response_pembangkitan(df_2, keyword, highlight=True):
+    with query('search_pembangkitan', keyword):
+        title, highlighted, plain = cached_result('pembangkitan', df_2, keyword,
+                                                  lambda: _render_pembangkitan(df_2, keyword))
+    return title, highlighted if highlight else plain
 
-            # Iterate over each Wilayah and create separate tables
-            for wilayah in wilayahs:
-                wilayah_data = jenis_data[jenis_data['Wilayah'] == wilayah]
-                wilayah_dmn_sum = wilayah_data['DMN'].sum()
-                wilayah_tml_sum = wilayah_data['TML'].sum()
-
-                # Highlight the keyword in the table
-                def highlight_keyword(text, keyword):
-                    return re.sub(f"({keyword})", r"<span style='background-color: yellow'>\1</span>", text, flags=re.IGNORECASE)
-
-                highlighted_df = wilayah_data.applymap(lambda x: highlight_keyword(str(x), keyword) if isinstance(x, str) else x)
-
-                # Convert data to HTML table and add sum at the bottom
-                table_html = highlighted_df[['Perusahaan', 'Jenis', 'Unit ', 'DMN', 'TML']].to_html(escape=False, index=False)
-                sum_html = f"<tr><td><strong>Total for {wilayah}</strong></td><td></td><td><strong>{round(wilayah_dmn_sum, 2)}</strong></td><td><strong>{round(wilayah_tml_sum, 2)}</strong></td></tr>"
-
-                # Wrap in HTML for each Wilayah and combine
-                full_html += f"<h3>Wilayah: {wilayah}</h3>{table_html}<table>{sum_html}</table><br><br>"
-
-            # Add the global sum of DMN and TML for all Wilayah at the bottom
-            global_dmn_sum = round(jenis_data['DMN'].sum(), 2)  # Round to 2 decimal places
-            global_tml_sum = round(jenis_data['TML'].sum(), 2)  # Round to 2 decimal places
-            global_sum_html = f"<h3>Global Sum</h3><table><tr><td><strong>Total DMN (MW):</strong></td><td><strong>{global_dmn_sum}</strong></td></tr><tr><td><strong>Total TML (MW):</strong></td><td><strong>{global_tml_sum}</strong></td></tr></table>"
-
-            # Combine everything into the final HTML output
-            final_html = f"<h3>Jenis Pembangkit: {keyword.upper()}</h3>{full_html}{global_sum_html}"
-
-            return f"Jenis Pembangkit: {keyword.upper()}", final_html
-
-        # Check if the keyword matches 'Unit'
-        elif unit_matches.any():
-            # Filter data for the specific Unit
-            unit_data = result[result['Unit '].str.contains(keyword, case=False)]
-
-            # Separate data into each 'Wilayah'
-            wilayahs = unit_data['Wilayah'].unique()
-            full_html = ""
-
-            # Iterate over each Wilayah and create separate tables
-            for wilayah in wilayahs:
-                wilayah_data = unit_data[unit_data['Wilayah'] == wilayah]
-                wilayah_dmn_sum = wilayah_data['DMN'].sum()
-                wilayah_tml_sum = wilayah_data['TML'].sum()
-
-                # Highlight the keyword in the table
-                def highlight_keyword(text, keyword):
-                    return re.sub(f"({keyword})", r"<span style='background-color: yellow'>\1</span>", text, flags=re.IGNORECASE)
-
-                highlighted_df = wilayah_data.applymap(lambda x: highlight_keyword(str(x), keyword) if isinstance(x, str) else x)
-
-                # Convert data to HTML table and add sum at the bottom
-                table_html = highlighted_df[['Perusahaan', 'Jenis', 'Unit ', 'DMN', 'TML']].to_html(escape=False, index=False)
-                sum_html = f"<tr><td><strong>Total for {wilayah}</strong></td><td></td><td><strong>{round(wilayah_dmn_sum, 2)}</strong></td><td><strong>{round(wilayah_tml_sum, 2)}</strong></td></tr>"
-
-                # Wrap in HTML for each Wilayah and combine
-                full_html += f"<h3>Wilayah: {wilayah}</h3>{table_html}<table>{sum_html}</table><br><br>"
-
-            # Add the global sum of DMN and TML for all Wilayah at the bottom
-            global_dmn_sum = round(unit_data['DMN'].sum(), 2)  # Round to 2 decimal places
-            global_tml_sum = round(unit_data['TML'].sum(), 2)  # Round to 2 decimal places
-            global_sum_html = f"<h3>Global Sum</h3><table><tr><td><strong>Total DMN (MW):</strong></td><td><strong>{global_dmn_sum}</strong></td></tr><tr><td><strong>Total TML (MW):</strong></td><td><strong>{global_tml_sum}</strong></td></tr></table>"
-
-            # Combine everything into the final HTML output
-            final_html = f"<h3>Unit: {keyword.upper()}</h3>{full_html}{global_sum_html}"
-
-            return f"Unit: {keyword.upper()}", final_html
-
-        # If the keyword matches in 'Wilayah'
-        elif any(df_2['Wilayah'].str.contains(keyword, case=False, na=False)):
-            # Filter data for the specific Wilayah
-            wilayah_data = result[result['Wilayah'].str.contains(keyword, case=False)]
-
-            # Sum the DMN and TML for the selected Wilayah
-            wilayah_dmn_sum = wilayah_data['DMN'].sum()
-            wilayah_tml_sum = wilayah_data['TML'].sum()
-
-            # Highlight the keyword in the table
-            def highlight_keyword(text, keyword):
-                return re.sub(f"({keyword})", r"<span style='background-color: yellow'>\1</span>", text, flags=re.IGNORECASE)
-
-            highlighted_df = wilayah_data.applymap(lambda x: highlight_keyword(str(x), keyword) if isinstance(x, str) else x)
-
-            # Convert data to HTML table and add sum at the bottom
-            table_html = highlighted_df[['Perusahaan', 'Jenis', 'Unit ', 'DMN', 'TML']].to_html(escape=False, index=False)
-            sum_html = f"<tr><td><strong>Total for {keyword.upper()}</strong></td><td></td><td><strong>{round(wilayah_dmn_sum, 2)}</strong></td><td><strong>{round(wilayah_tml_sum, 2)}</strong></td></tr>"
-
-            # Add the global sum of DMN and TML for the entire dataset
-            global_dmn_sum = round(result['DMN'].sum(), 2)  # Round to 2 decimal places
-            global_tml_sum = round(result['TML'].sum(), 2)  # Round to 2 decimal places
-            global_sum_html = f"<h3>Global Sum</h3><table><tr><td><strong>Total DMN (MW):</strong></td><td><strong>{global_dmn_sum}</strong></td></tr><tr><td><strong>Total TML (MW):</strong></td><td><strong>{global_tml_sum}</strong></td></tr></table>"
-
-            # Combine everything into the final HTML output
-            final_html = f"<h3>Wilayah: {keyword.upper()}</h3>{table_html}<table>{sum_html}</table><br><br>{global_sum_html}"
-
-            return f"Wilayah: {keyword.upper()}", final_html
-
-        else:
-            return None, "Data tidak ditemukan untuk kata kunci yang diminta."
 
+###########################
+### PAGINATED RESPONSES ###
+###########################
 
+# Jumlah baris yang cocok langsung dari index, tanpa membuat DataFrame hasil
+def count_matches(df, keyword):
+    return get_search_index(df).count(keyword)
+
+# Hasil pencarian per halaman (lihat result_pages.py), None jika tidak ada yang cocok.
+# Baris diambil dari posisi index dan hanya halaman yang diminta yang di-render.
+def result_pages(dataset, df, keyword, page_size=PAGE_SIZE):
+    if dataset == 'pembangkitan':
+        return pembangkitan_pages(get_pembangkit_rollup(coerce_pembangkit_numeric(df)), keyword, page_size)
+    positions = get_search_index(df).positions(keyword)
+    if not len(positions):
+        return None
+    if dataset == 'pht':
+        return pht_pages(df, positions, keyword, page_size)
+    return mitigasi_pages(df, positions, keyword, page_size)
+
+# Keyword pengganti untuk pencarian fuzzy: term kosakata paling mirip (lihat embedding_index.py)
+# yang memang punya hasil di pencarian persis dataset ini. None jika tidak ada yang cukup mirip,
+# atau jika embedding tabel ini masih dibangun di background (pencarian tetap persis saja).
+def fuzzy_keyword(dataset, df, keyword):
+    index = ready_embedding_index(df)
+    if index is None:
+        return None
+    return index.suggest(keyword, lambda term: result_pages(dataset, df, term) is not None)
+
+FUZZY_NOTE = "Tidak ada hasil persis untuk '{keyword}'. Menampilkan hasil untuk '{term}':\n\n"
+
+def _render_page(dataset, df, keyword, page, page_size, fuzzy=False):
+    with stage(f'render_{dataset}_page'):
+        pages = result_pages(dataset, df, keyword, page_size)
+        note = ''
+        if pages is None and fuzzy:
+            term = fuzzy_keyword(dataset, df, keyword)
+            if term is not None:
+                pages = result_pages(dataset, df, term, page_size)
+                note = FUZZY_NOTE.format(keyword=keyword.upper(), term=term) if page == 0 else ''
+        if pages is None:
+            return NOT_FOUND_MESSAGE, NOT_FOUND_MESSAGE, 0, False
+        highlighted, plain = pages.page(page) or ('', '')
+        return note + highlighted, note + plain, pages.total, pages.has_more(page)
+
+# Satu halaman respons untuk tab pencarian: (teks, jumlah baris total, masih ada halaman berikutnya).
+# Halaman di-cache lintas sesi per (versi workbook, keyword, halaman) seperti respons penuh.
+# fuzzy=True: jika keyword tidak ditemukan, tampilkan hasil untuk term yang paling mirip.
+def get_response_page(dataset, df, keyword, page=0, highlight=True, page_size=PAGE_SIZE, fuzzy=False):
+    # Selama embedding belum siap halaman dihitung (dan di-cache) sebagai pencarian persis
+    fuzzy = fuzzy and ready_embedding_index(df) is not None
+    with query(f'page_{dataset}', keyword):
+        highlighted, plain, total, has_more = cached_result(
+            f'{dataset}_page', df, f"{keyword}\x1f{page}\x1f{page_size}\x1f{int(fuzzy)}",
+            lambda: _render_page(dataset, df, keyword, page, page_size, fuzzy))
+    return highlighted if highlight else plain, total, has_more
+
+# Tab pencarian (UI dan query_service): satu sumber per dataset, dicari bersamaan lewat
+# federated_search.py. Workbook baru cukup ditambahkan di DATASET_SOURCES dan di sini.
+SEARCH_TABS = {
+    'pht': ("Informasi PHT", "Informasi PHT yang ditemukan:"),
+    'mitigasi': ("Informasi Mitigasi", "Informasi mitigasi yang ditemukan:"),
+    'pembangkitan': ("Informasi Pembangkitan", "Informasi pembangkitan yang ditemukan:"),
+}
+
+# Pencarian satu dataset: halaman 0..pages-1 sebagai daftar (teks, total, has_more)
+def _page_search(name):
+    def search(keyword, pages=1, highlight=True, page_size=PAGE_SIZE, fuzzy=False):
+        df = _load_table(name)
+        return [get_response_page(name, df, keyword, page, highlight=highlight, page_size=page_size, fuzzy=fuzzy)
+                for page in range(pages)]
+    return search
+
+for _name, (_label, _caption) in SEARCH_TABS.items():
+    register_source(_name, _label, _page_search(_name), caption=_caption)
+
+# Intent daftar (derating, daftar penghantar) sebagai halaman tabel teks; None untuk intent lain
+# atau daftar kosong (pakai answer_intent untuk pesannya). Posisi baris sudah dimaterialisasi
+# di answer store, teks hanya dibuat per halaman.
+def intent_pages(intent, data_pht, page_size=PAGE_SIZE):
+    if intent not in ('derating', 'daftar_penghantar'):
+        return None
+    df, positions, columns = get_answer_store(data_pht).listing(intent)
+    if not len(positions):
+        return None
+    return table_pages(df, positions, columns, page_size)
+
+
+######################
+### CHAT FUNCTIONS ###
+######################
+
+UNKNOWN_QUESTION_MESSAGE = "Pertanyaan tidak dikenali. Harap coba dengan kata kunci yang berbeda."
+
+# Intent yang butuh input tambahan dari pengguna
+INTENT_INPUTS = {
+    'total_pht': ('wilayah',),
+    'detail_penghantar': ('gitet1', 'gitet2'),
+    'penghantar_gitet': ('gitet1',),
+    'jalur_penghantar': ('gitet1', 'gitet2'),
+}
+
+# Kolom yang ditampilkan untuk daftar penghantar per gitet dan ruas jalur
+CIRCUIT_COLUMNS = ['Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Sirkit ke', 'Kemampuan Penghantar (A)',
+                   'Keterangan Penyebab Derating']
+
+# Tentukan intent dari pertanyaan (sinonim + fuzzy matching, lihat intent_router.py), atau None
+def detect_intent(question):
+    return route(question)[0]
+
+# Jawab intent chat dari data PHT (tanpa UI, dipakai oleh Chatbot_ dan query_service).
+# Sebagian besar jawaban sudah dimaterialisasi di answer store per versi data (lihat answer_store.py),
+# sehingga cukup lookup dictionary. Mengembalikan None jika input tambahan (wilayah/gitet) belum diisi.
+def answer_intent(intent, data_pht, wilayah=None, gitet1=None, gitet2=None):
+    with query('intent', intent):
+        return _answer_intent(intent, data_pht, wilayah, gitet1, gitet2)
+
+def _answer_intent(intent, data_pht, wilayah, gitet1, gitet2):
+    if intent == 'total_pht':
+        # Respond with total PHT for a given wilayah
+        if wilayah:
+            return get_answer_store(data_pht).total_pht(wilayah)
+
+    elif intent in ('derating', 'wilayah_pht', 'daftar_penghantar', 'jumlah_penghantar', 'arus_terbesar'):
+        return get_answer_store(data_pht).answer(intent)
+
+    elif intent == 'detail_penghantar':
+        # Fetch details of a specific conductor (lewat index graf, lihat network_graph.py)
+        if gitet1 and gitet2:
+            graph = get_network_graph(data_pht)
+            detail = data_pht.iloc[graph.detail_positions(gitet1, gitet2)]
+            if detail.empty:
+                return f"Tidak ada detail untuk penghantar dari Gitet {gitet1.capitalize()} ke Gitet {gitet2.capitalize()}."
+            else:
+                return _gitet_notes(graph, gitet1, gitet2) + detail.to_string(index=False)
+
+    elif intent == 'penghantar_gitet':
+        # Semua penghantar yang terhubung ke satu gitet
+        if gitet1:
+            graph = get_network_graph(data_pht)
+            circuits = data_pht.iloc[graph.circuit_positions(gitet1)]
+            if circuits.empty:
+                return f"Tidak ada penghantar yang terhubung ke Gitet {gitet1.capitalize()}."
+            return _gitet_notes(graph, gitet1) + circuits[[col for col in CIRCUIT_COLUMNS if col in circuits.columns]].to_string(index=False)
+
+    elif intent == 'jalur_penghantar':
+        if gitet1 and gitet2:
+            return describe_path(data_pht, gitet1, gitet2)
 
+    else:
+        # Default response if no condition is met
+        return UNKNOWN_QUESTION_MESSAGE
+
+
+# Nama gitet yang tidak ditemukan persis dan dicocokkan ke gardu lain (salah ketik), diberitahukan
+# ke pengguna dengan catatan yang sama seperti pencarian fuzzy
+def _gitet_notes(graph, *names):
+    notes = []
+    for name in names:
+        matched = graph.match_nodes(name)[1]
+        if matched is not None:
+            notes.append(FUZZY_NOTE.format(keyword=name, term=matched))
+    return "".join(notes)
+
+# Jalur antara dua gitet dengan kemampuan terkecil (bottleneck) paling besar, sebagai teks
+def describe_path(data_pht, gitet1, gitet2):
+    graph = get_network_graph(data_pht)
+    path = graph.widest_path(gitet1, gitet2)
+    if path is None:
+        return f"Tidak ada jalur penghantar dari Gitet {gitet1.capitalize()} ke Gitet {gitet2.capitalize()}."
+    if not path['edges']:
+        return f"Gitet {gitet1.capitalize()} dan Gitet {gitet2.capitalize()} adalah gardu yang sama ({path['nodes'][0]})."
+    bottleneck = data_pht.iloc[path['bottleneck_edge']]
+    ruas = data_pht.iloc[path['edges']]
+    return (f"Jalur {' -> '.join(path['nodes'])} ({len(path['edges'])} ruas) dengan kemampuan terkecil "
+            f"{path['bottleneck_a']:g} A pada ruas {bottleneck['Dari Gitet/Gistet']}-{bottleneck['Ke Gitet/Gistet']} "
+            f"#{bottleneck['Sirkit ke']}.\n\n"
+            + ruas[[col for col in CIRCUIT_COLUMNS if col in ruas.columns]].to_string(index=False))
+
+# Baris tabel kontingensi (mitigasi) yang ruas SUTET/N-1-nya menyebut penghantar gitet1-gitet2,
+# atau semua ruas yang menyentuh gitet1 jika gitet2 kosong. None jika gitet tidak dikenali.
+def linked_contingencies(data_pht, data_mitigasi, gitet1, gitet2=None):
+    graph = get_network_graph(data_pht)
+    links = graph.contingency_links(data_mitigasi)
+    a = graph.resolve(gitet1)
+    b = graph.resolve(gitet2) if gitet2 else None
+    if a is None or (gitet2 and b is None):
+        return None
+    rows = links.rows_for_pair(a, b) if gitet2 else links.rows_for_node(a)
+    return data_mitigasi.iloc[rows]
 
 
 ###########################
 ### ANSWERING FUNCTIONS ###
 ###########################
 
-# Fungsi untuk mendapatkan jawaban dari model QA
-def get_answer(question, context):
+# Fungsi untuk mendapatkan jawaban dari model QA.
+# Konteks panjang dipersempit dulu ke top-k baris paling relevan (BM25), sehingga model hanya
+# memproses beberapa baris, bukan seluruh hasil pencarian.
+# Jika inference pool sudah siap (lihat inference_pool.py), model dipanggil di worker pool dan
+# pertanyaan yang datang bersamaan dijawab dalam satu batch. Selama pool masih dimulai di background,
+# jawaban dihitung model di proses ini supaya request tidak menunggu worker.
+# Jawaban disimpan di cache jawaban di disk (lihat answer_memo.py) per (pertanyaan, konteks yang
+# dipersempit, model); version = versi workbook asal konteks, supaya ikut dibuang saat data berubah.
+def get_answer(question, context, top_k=QA_TOP_K, version=None):
     # Pastikan konteks tersedia
     if context:
-        result = qa_model(question=question, context=context)
-        return result['answer']
+        with query('answer', question):
+            with stage('qa_narrow'):
+                narrowed = narrow_context(question, context, top_k)
+            memo = get_answer_memo()
+            if memo is not None:
+                with stage('qa_memo'):
+                    answer = memo.get(question, narrowed, qa_model_id())
+                if answer is not None:
+                    return answer
+            pool = ready_inference_pool()
+            qa_model = get_qa_model() if pool is None else None
+            with stage('qa_model') as timer:
+                if pool is not None:
+                    result = pool.answer(question, narrowed)
+                else:
+                    result = qa_model(question=question, context=narrowed)
+                timer.rows = 1
+            record_answer_latency(timer.seconds)
+            if memo is not None:
+                memo.put(question, narrowed, qa_model_id(), result['answer'], timer.seconds, version)
+            return result['answer']
     else:
-        return "Data tidak ditemukan untuk kata kunci yang diminta."
+        return NOT_FOUND_MESSAGE
+
+# Jawab banyak pasangan pertanyaan/konteks sekaligus dalam satu panggilan pipeline (batched).
+# Urutan jawaban sama dengan urutan input; konteks kosong dijawab dengan pesan "tidak ditemukan".
+# version: versi workbook asal semua konteks, seperti get_answer.
+def get_answers(questions, contexts, top_k=QA_TOP_K, batch_size=8, version=None):
+    questions, contexts = list(questions), list(contexts)
+    if len(questions) != len(contexts):
+        raise ValueError("Jumlah pertanyaan dan konteks harus sama.")
+
+    answers = [NOT_FOUND_MESSAGE] * len(questions)
+    todo = [i for i, context in enumerate(contexts) if context]
+    if not todo:
+        return answers
+
+    with query('answers'):
+        with stage('qa_narrow'):
+            narrowed = {i: narrow_context(questions[i], contexts[i], top_k) for i in todo}
+        memo = get_answer_memo()
+        if memo is not None:
+            with stage('qa_memo'):
+                cached = {i: memo.get(questions[i], narrowed[i], qa_model_id()) for i in todo}
+            for i, answer in cached.items():
+                if answer is not None:
+                    answers[i] = answer
+            todo = [i for i in todo if cached[i] is None]
+            if not todo:
+                return answers
+        narrowed = [narrowed[i] for i in todo]
+        pool = ready_inference_pool()
+        qa_model = get_qa_model() if pool is None else None
+        with stage('qa_model_batch') as timer:
+            if pool is not None:
+                # Pool membagi pertanyaan ke batch per worker sendiri (maks CHATBOT_INFERENCE_MAX_BATCH)
+                futures = [pool.submit(questions[i], context) for i, context in zip(todo, narrowed)]
+                results = [future.result() for future in futures]
+            else:
+                results = qa_model(question=[questions[i] for i in todo], context=narrowed, batch_size=batch_size)
+            timer.rows = len(todo)
+    if isinstance(results, dict):
+        results = [results]
+    for i, context, result in zip(todo, narrowed, results):
+        answers[i] = result['answer']
+        record_answer_latency(timer.seconds / len(todo))
+        if memo is not None:
+            memo.put(questions[i], context, qa_model_id(), result['answer'], timer.seconds / len(todo), version)
+    return answers
+
+# Jawab pertanyaan langsung dari tabel: baris kandidat diambil dari index pencarian (jika ada
+# keyword), lalu diranking dengan BM25 yang sudah dibangun saat load. Biaya model tetap
+# (top-k baris) berapa pun ukuran tabelnya.
+def answer_from_data(question, df, keyword=None, top_k=QA_TOP_K):
+    with query('answer_from_data', keyword):
+        with stage('qa_retrieve') as timer:
+            candidates = get_search_index(df).positions(keyword) if keyword else None
+            if candidates is not None and not len(candidates):
+                return NOT_FOUND_MESSAGE
+            context = retrieve_context(question, df, candidates, top_k)
+            timer.rows = len(df) if candidates is None else len(candidates)
+        return get_answer(question, context, top_k, version=frame_version(df))
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
-import time
-import numpy as py
-import re
-from Ask_me_ import load_data_pht, build_context_and_response, get_answer, build_context_and_response_mitigasi, search_data_pembangkitan, build_context_and_response_pembangkitan
+import os
+from Ask_me_ import (load_data_pht, prewarm_qa_model, detect_intent, answer_intent, linked_contingencies,
+                     result_cache_stats, qa_model_stats, answer_memo_stats, startup_bundle_stats, readiness,
+                     table_previews, table_memory_report, start_data_watcher, intent_pages, mitigasi_playbook,
+                     PAGE_SIZE)
+from federated_search import federated_search, search_sources
+from metrics import query, stage_summary, slow_queries, slow_query_config, configure_slow_queries, render_prometheus
 
 # Syntax guide for user interaction
 with st.expander("Available Syntax (How to ask questions)"):
@@ -37,6 +40,16 @@ with st.expander("Available Syntax (How to ask questions)"):
     7. **Details of a specific conductor**:
        - "Detail penghantar dari Gitet [Gitet1] ke Gitet [Gitet2]"
        - Example: "Detail penghantar dari Gitet A ke Gitet B"
+
+    8. **All conductors connected to a substation**:
+       - "Penghantar di Gitet [Gitet]"
+       - Example: "Penghantar yang terhubung ke Gitet Cirata"
+
+    9. **Path between two substations (largest minimum capacity)**:
+       - "Jalur penghantar dari Gitet [Gitet1] ke Gitet [Gitet2]"
+       - Example: "Jalur penghantar dari Gitet Cirata ke Gitet Grati"
+
+    Synonyms (e.g. "arus tertinggi", "rincian penghantar") and small typos are also recognized.
     """)
 
 # Tampilan utama dengan Streamlit
@@ -45,12 +58,22 @@ st.title('Chatbot Informasi Data PHT dengan Jawaban Deskriptif')
 # Memuat data dari file excel
 data_pht, data_mitigasi, data_pembangkitan = load_data_pht()  # Split the tuple into two separate dataframes
 
+# Model QA dimuat di background, UI tidak perlu menunggu
+prewarm_qa_model()
+
+# Perubahan workbook (misal update derating) diambil watcher di background dan diterapkan inkremental
+start_data_watcher()
+
+# Preview disiapkan satu kali per versi tabel (dan ikut startup bundle), bukan di setiap rerun
+previews = table_previews((data_pht, data_mitigasi, data_pembangkitan))
 st.write("Berikut adalah beberapa data yang tersedia:")
-st.write(data_pht.head())  # Menampilkan beberapa baris data
+st.write(previews['pht'])  # Menampilkan beberapa baris data
 st.write("Berikut adalah beberapa data mitigasi yang tersedia:")
-st.write(data_mitigasi.head())  # Menampilkan beberapa baris data mitigasi
+st.write(previews['mitigasi'])  # Menampilkan beberapa baris data mitigasi
 st.write("Berikut adalah beberapa data pembangkitan yang tersedia:")
-st.write(data_pembangkitan.head())  # Menampilkan beberapa baris data mitigasi
+st.write(previews['pembangkitan'])  # Menampilkan beberapa baris data mitigasi
+if not readiness()['model_ready']:
+    st.caption("Model QA masih dimuat di background; pencarian sudah bisa dipakai.")
 
 
 # Input dari pengguna
@@ -59,124 +82,154 @@ keyword = st.text_input("Masukkan kata kunci (misal: nama Lokasi Gitet/Gistet):"
 # Checkbox for highlighting option
 highlight_option = st.checkbox("Highlight keyword? (In Yellow)", value=True)
 
-# Helper function to remove HTML highlighting tags
-def strip_html_tags(text, keyword):
-    return re.sub(r'<.*?>', '', text).replace(f'<span style="background-color: yellow">{keyword.upper()}</span>', keyword.upper())
+# Jika kata kunci tidak ditemukan persis (salah ketik/singkatan), tampilkan hasil untuk kata yang paling mirip
+fuzzy_option = st.checkbox("Toleran salah ketik (pencarian fuzzy)?", value=True)
+
+# Hasil pencarian disimpan di session_state supaya tetap tampil saat tombol "Muat lebih banyak"
+# ditekan (setiap klik menjalankan ulang script). Jumlah halaman yang tampil dicatat per tab.
+# Tab = sumber yang terdaftar di federated_search (lihat Ask_me_.SEARCH_TABS).
+SEARCH_TABS = search_sources()
+
+def load_more(state_key, dataset):
+    st.session_state[state_key][dataset] += 1
 
 # Jika input sudah diisi
 if st.button("Cari Informasi"):
     if keyword:
-        # Bangun konteks berdasarkan kata kunci untuk PHT
-        context_pht, response_pht = build_context_and_response(data_pht, keyword)
-
-        # Bangun konteks berdasarkan kata kunci untuk mitigasi
-        context_mitigasi, response_mitigasi = build_context_and_response_mitigasi(data_mitigasi, keyword)
-        
-        # Bangun konteks berdasarkan kata kunci untuk pembangkitan
-        context_pembangkitan, response_pembangkitan = build_context_and_response_pembangkitan(data_pembangkitan, keyword)
-
-        # Use tabs to display the results separately
-        tab1, tab2, tab3 = st.tabs(["Informasi PHT", "Informasi Mitigasi", "Informasi Pembangkitan"])
-
-        # Tab 1: Informasi PHT
-        with tab1:
-            st.write("Informasi PHT yang ditemukan:")
-            if highlight_option:
-                # Render the highlighted response
-                st.markdown(response_pht, unsafe_allow_html=True)
-            else:
-                # Strip HTML and render plain text without HTML tags
-                stripped_response_pht = strip_html_tags(response_pht, keyword)
-                st.write(stripped_response_pht)
-
-        # Tab 2: Informasi Mitigasi 
-        with tab2:
-            st.write("Informasi mitigasi yang ditemukan:")
-            if highlight_option:
-                # Render the highlighted response
-                st.markdown(response_mitigasi, unsafe_allow_html=True)
-            else:
-                # Strip HTML and render plain text without HTML tags
-                stripped_response_mitigasi = strip_html_tags(response_mitigasi, keyword)
-                st.write(stripped_response_mitigasi)
-        
-        # Tab 3: Informasi Pembangkitan
-        with tab3:
-            st.write("Informasi pembangkitan yang ditemukan:")
-            if highlight_option:
-                # Render the highlighted response
-                st.markdown(response_pembangkitan, unsafe_allow_html=True)
-            else:
-                # Strip HTML and render plain text without HTML tags
-                stripped_response_pembangkitan = strip_html_tags(response_pembangkitan, keyword)
-                st.write(stripped_response_pembangkitan)
-
+        st.session_state['search_keyword'] = keyword
+        st.session_state['search_pages'] = {source.name: 1 for source in SEARCH_TABS}
     else:
+        st.session_state.pop('search_keyword', None)
         st.write("Harap masukkan kata kunci untuk pencarian.")
 
+# Isi satu tab dari hasil sumbernya: daftar halaman (teks, total, has_more) atau timeout/error
+def show_search_result(placeholder, source, result):
+    with placeholder.container():
+        st.write(source.caption)
+        if result.status == 'timeout':
+            st.warning("Pencarian di data ini melebihi batas waktu. Coba lagi sebentar lagi.")
+            return
+        if result.status == 'error':
+            st.error(f"Pencarian di data ini gagal: {result.error}")
+            return
+        pages = result.value
+        total, has_more = pages[-1][1], pages[-1][2]
+        if total:
+            shown = min(total, len(pages) * PAGE_SIZE)
+            st.caption(f"Menampilkan {shown} dari {total} hasil")
+        for text, _, _ in pages:
+            if highlight_option or source.name == 'pembangkitan':
+                # Respons dengan highlight (dan tabel pembangkitan) berupa markdown/HTML
+                st.markdown(text, unsafe_allow_html=True)
+            else:
+                # Render plain text (respons sudah tanpa tag highlight)
+                st.write(text)
+        if has_more:
+            st.button("Muat lebih banyak", key=f'more_{source.name}', on_click=load_more, args=('search_pages', source.name))
+
+if st.session_state.get('search_keyword'):
+    search_keyword = st.session_state['search_keyword']
+    page_counts = st.session_state['search_pages']
+
+    # Use tabs to display the results separately
+    tabs = st.tabs([source.label for source in SEARCH_TABS])
+    placeholders = {}
+    for tab, source in zip(tabs, SEARCH_TABS):
+        with tab:
+            placeholders[source.name] = st.empty()
+            placeholders[source.name].caption("Mencari...")
+
+    # Semua tab dicari bersamaan; setiap tab diisi begitu hasilnya siap (tab yang lambat tidak
+    # menahan tab lain). Hanya halaman yang tampil yang di-render (halaman pertama langsung).
+    sources = {source.name: source for source in SEARCH_TABS}
+    with query('ui_search', search_keyword):
+        for result in federated_search(search_keyword, highlight=highlight_option, fuzzy=fuzzy_option,
+                                       per_source={name: {'pages': page_counts.get(name, 1)} for name in sources}):
+            show_search_result(placeholders[result.name], sources[result.name], result)
+
+# Playbook mitigasi saat gangguan: langsung dari nama ruas (SUTET/N-1/N-1-1/N-1-2), tanpa pencarian penuh
+ruas = st.text_input("Playbook mitigasi untuk ruas (nama SUTET/N-1, boleh awalan saja):")
+if ruas:
+    with query('ui_playbook', ruas):
+        playbook = mitigasi_playbook(data_mitigasi, ruas, highlight=highlight_option)
+    if playbook is None:
+        st.write("Ruas tidak ditemukan di data mitigasi.")
+    else:
+        st.markdown(playbook, unsafe_allow_html=True)
+
 ##########################
 #### INTERACTIVE CHAT ####
 ##########################
 
 user_question = st.text_input("Ajukan pertanyaan tentang data ini:")
 
-# Helper function to handle user questions about the data
+# Helper function to handle user questions about the data.
+# Logika jawaban ada di Ask_me_.answer_intent; di sini hanya input tambahan dari UI.
 def handle_user_question(question, data_pht, data_mitigasi):
-    question = question.lower()
-
-    if "total pht" in question:
-        # Respond with total PHT for a given wilayah
-        wilayah = st.text_input("Masukkan wilayah UPT yang ingin dicari:")
-        if wilayah:
-            total_pht = data_pht[data_pht['Wilayah'].str.contains(wilayah, case=False)]['Panjang Penghantar'].sum()
-            return f"Total PHT di wilayah {wilayah.capitalize()} adalah {total_pht} km."
-    
-    elif "derating" in question:
-        # List penghantar that have derating
-        derating_data = data_pht[~data_pht['Keterangan Penyebab Derating'].isna()]
-        if derating_data.empty:
-            return "Tidak ada penghantar yang mengalami derating."
-        else:
-            penghantar_list = derating_data[['Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Keterangan Penyebab Derating']]
-            return penghantar_list.to_string(index=False)
-
-    elif "wilayah pht" in question:
-        # List unique regions for PHT
-        wilayah_list = data_pht['Wilayah'].unique()
-        return f"Wilayah yang terdaftar untuk PHT: {', '.join(wilayah_list)}"
-    
-    elif "daftar penghantar pht" in question:
-        # List all PHT conductors
-        penghantar_list = data_pht[['Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Panjang Penghantar']]
-        return penghantar_list.to_string(index=False)
-    
-    elif "jumlah penghantar" in question:
-        # Count total conductors
-        jumlah_penghantar = len(data_pht)
-        return f"Jumlah penghantar PHT: {jumlah_penghantar}"
-    
-    elif "arus terbesar" in question:
-        # Find conductor with the highest nominal current
-        penghantar_terbesar = data_pht.loc[data_pht['Nominal Arus (A)'].idxmax()]
-        return f"Penghantar dengan arus terbesar adalah dari {penghantar_terbesar['Dari Gitet/Gistet']} ke {penghantar_terbesar['Ke Gitet/Gistet']} dengan arus {penghantar_terbesar['Nominal Arus (A)']} A."
-    
-    elif "detail penghantar" in question:
-        # Fetch details of a specific conductor
-        gitet1 = st.text_input("Masukkan nama Gitet asal:")
-        gitet2 = st.text_input("Masukkan nama Gitet tujuan:")
-        if gitet1 and gitet2:
-            detail = data_pht[(data_pht['Dari Gitet/Gistet'].str.contains(gitet1, case=False)) & 
-                              (data_pht['Ke Gitet/Gistet'].str.contains(gitet2, case=False))]
-            if detail.empty:
-                return f"Tidak ada detail untuk penghantar dari Gitet {gitet1.capitalize()} ke Gitet {gitet2.capitalize()}."
-            else:
-                return detail.to_string(index=False)
-
-    else:
-        # Default response if no condition is met
-        return "Pertanyaan tidak dikenali. Harap coba dengan kata kunci yang berbeda."
+    intent = detect_intent(question)
+    inputs = {}
+
+    if intent == 'total_pht':
+        inputs['wilayah'] = st.text_input("Masukkan wilayah UPT yang ingin dicari:")
+    elif intent in ('detail_penghantar', 'jalur_penghantar'):
+        inputs['gitet1'] = st.text_input("Masukkan nama Gitet asal:")
+        inputs['gitet2'] = st.text_input("Masukkan nama Gitet tujuan:")
+    elif intent == 'penghantar_gitet':
+        inputs['gitet1'] = st.text_input("Masukkan nama Gitet:")
+
+    response = answer_intent(intent, data_pht, **inputs)
+
+    # Kontingensi (ruas SUTET/N-1) yang terkait dengan penghantar atau gitet yang ditanyakan
+    if intent in ('detail_penghantar', 'penghantar_gitet') and inputs.get('gitet1'):
+        contingencies = linked_contingencies(data_pht, data_mitigasi, inputs['gitet1'], inputs.get('gitet2'))
+        if contingencies is not None and not contingencies.empty:
+            with st.expander(f"Kontingensi terkait ({len(contingencies)})"):
+                st.dataframe(contingencies)
+    return response
 
 # Handle the user's question
 if user_question:
-    response = handle_user_question(user_question, data_pht, data_mitigasi)
-    st.write(response)
+    intent = detect_intent(user_question)
+    # Intent daftar (derating, daftar penghantar) ditampilkan per halaman, dimulai ulang jika pertanyaan berubah
+    pages = intent_pages(intent, data_pht)
+    if pages is not None:
+        if st.session_state.get('chat_question') != user_question:
+            st.session_state['chat_question'] = user_question
+            st.session_state['chat_pages'] = {'listing': 1}
+        shown = st.session_state['chat_pages']['listing']
+        st.caption(f"Menampilkan {min(pages.total, shown * PAGE_SIZE)} dari {pages.total} baris")
+        with query('ui_chat', user_question):
+            for page in range(shown):
+                st.text(pages.page(page)[1])
+        if pages.has_more(shown - 1):
+            st.button("Muat lebih banyak", key='more_chat', on_click=load_more, args=('chat_pages', 'listing'))
+    else:
+        with query('ui_chat', user_question):
+            response = handle_user_question(user_question, data_pht, data_mitigasi)
+        st.write(response)
+
+#######################
+#### ADMIN METRICS ####
+#######################
+
+# Panel admin opsional (CHATBOT_ADMIN_PANEL=1): latency per stage, query lambat, cache, model dan memory
+if os.environ.get('CHATBOT_ADMIN_PANEL') == '1':
+    with st.sidebar.expander("Admin: performance metrics"):
+        st.write("Latency per stage (ms):")
+        st.dataframe(pd.DataFrame(stage_summary()))
+
+        config = slow_query_config()
+        log_slow = st.checkbox("Catat query lambat", value=config['threshold_ms'] is not None)
+        threshold_ms = st.number_input("Batas query lambat (ms)", min_value=1.0, value=config['threshold_ms'] or 500.0)
+        configure_slow_queries(threshold_ms if log_slow else None)
+        for slow in slow_queries()[:20]:
+            st.json(slow, expanded=False)
+
+        st.write("Cache hasil query:", result_cache_stats())
+        st.write("Model QA:", qa_model_stats())
+        st.write("Cache jawaban QA:", answer_memo_stats())
+        st.write("Startup:", readiness(), startup_bundle_stats())
+        st.write("Memory per tabel (MB):")
+        st.dataframe(pd.DataFrame([{'tabel': name, 'baris': report['rows'], 'MB': report['bytes'] / 2**20}
+                                   for name, report in table_memory_report().items()]))
+        st.code(render_prometheus(), language='text')
@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import register_collector
+
+# Cache jawaban model QA di disk (SQLite), bertahan setelah restart dan dipakai bersama oleh
+# beberapa proses (Streamlit, query_service, worker). Key = pertanyaan yang dinormalisasi + hash
+# konteks yang benar-benar dilihat model + identitas model, sehingga jawaban yang tersimpan selalu
+# sama dengan hasil forward pass baru. Entry yang konteksnya berasal dari workbook diberi versi
+# workbook dan dibuang saat versi dataset berubah.
+#
+#   CHATBOT_ANSWER_MEMO       path file SQLite (default .answer_memo/answers.sqlite, seperti cache
+#                             .embedding_cache dan .startup_bundle; kosong = tanpa cache jawaban)
+#   CHATBOT_ANSWER_MEMO_SIZE  jumlah entry maksimum (yang paling lama tidak dipakai dibuang dulu)
+#   CHATBOT_ANSWER_MEMO_DAYS  umur maksimum entry dalam hari
+ANSWER_MEMO_PATH = os.environ.get('CHATBOT_ANSWER_MEMO', os.path.join('.answer_memo', 'answers.sqlite'))
+ANSWER_MEMO_SIZE = int(os.environ.get('CHATBOT_ANSWER_MEMO_SIZE', '50000'))
+ANSWER_MEMO_DAYS = float(os.environ.get('CHATBOT_ANSWER_MEMO_DAYS', '30'))
+
+# Eviction dijalankan setiap sekian kali put, bukan di setiap put
+EVICT_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    answer TEXT NOT NULL,
+    model TEXT NOT NULL,
+    version TEXT,
+    seconds REAL NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_used ON answers (used);
+CREATE INDEX IF NOT EXISTS answers_version ON answers (version);
+CREATE TABLE IF NOT EXISTS table_versions (
+    dataset TEXT NOT NULL,
+    version TEXT NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY (dataset, version)
+);
+"""
+
+_MEMO = None
+_MEMO_LOCK = threading.Lock()
+
+
+###########
+### KEY ###
+###########
+
+# Pertanyaan yang hanya berbeda huruf besar/kecil, spasi atau tanda tanya di akhir dianggap sama
+def normalize_question(question):
+    return " ".join(str(question).lower().split()).rstrip(' ?')
+
+def answer_key(question, context, model_id):
+    context_hash = hashlib.sha256(context.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{normalize_question(question)}\x1f{context_hash}\x1f{model_id}".encode('utf-8')).hexdigest()
+
+
+#############
+### STORE ###
+#############
+
+# Satu koneksi per thread (sqlite3 tidak boleh dipakai lintas thread) dan dibuka ulang setelah fork.
+# WAL: pembaca tidak menunggu penulis; busy_timeout menangani penulis bersamaan dari proses lain.
+class AnswerMemo:
+    def __init__(self, path=ANSWER_MEMO_PATH, max_entries=ANSWER_MEMO_SIZE, max_age_days=ANSWER_MEMO_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'puts': 0, 'expired': 0, 'evicted': 0, 'invalidated': 0,
+                         'errors': 0, 'saved_seconds': 0.0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    # Jawaban tersimpan untuk (pertanyaan, konteks, model), atau None. Kegagalan SQLite
+    # (misal disk penuh/terkunci terlalu lama) diperlakukan sebagai miss, bukan error.
+    def get(self, question, context, model_id):
+        key = answer_key(question, context, model_id)
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute('SELECT answer, seconds, created FROM answers WHERE key = ?', (key,)).fetchone()
+            if row is not None and now - row[2] > self.max_age:
+                connection.execute('DELETE FROM answers WHERE key = ?', (key,))
+                self._count('expired')
+                row = None
+            if row is not None:
+                connection.execute('UPDATE answers SET used = ?, hits = hits + 1 WHERE key = ?', (now, key))
+        except sqlite3.Error:
+            self._count('errors')
+            row = None
+        if row is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        self._count('saved_seconds', row[1])
+        return row[0]
+
+    # Simpan jawaban beserta waktu inferensinya (untuk menghitung waktu yang dihemat saat hit).
+    # version: versi workbook asal konteks (None untuk konteks bebas), lihat sync_version.
+    def put(self, question, context, model_id, answer, seconds, version=None):
+        now = time.time()
+        try:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO answers (key, answer, model, version, seconds, created, used, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                (answer_key(question, context, model_id), answer, model_id, version, seconds, now, now))
+        except sqlite3.Error:
+            self._count('errors')
+            return
+        self._count('puts')
+        if self.counters['puts'] % EVICT_EVERY == 0:
+            self.evict()
+
+    # Buang entry yang lebih tua dari max_age, lalu yang paling lama tidak dipakai di atas max_entries
+    def evict(self):
+        try:
+            connection = self._connection()
+            expired = connection.execute('DELETE FROM answers WHERE created < ?',
+                                         (time.time() - self.max_age,)).rowcount
+            evicted = connection.execute(
+                'DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)).rowcount
+        except sqlite3.Error:
+            self._count('errors')
+            return 0
+        self._count('expired', expired)
+        self._count('evicted', evicted)
+        return expired + evicted
+
+    # Catat versi dataset yang dimuat proses ini. Versi diurutkan menurut kapan pertama kali terlihat
+    # (oleh proses mana pun); jika versi ini yang terbaru, jawaban dari versi lama dataset itu dibuang.
+    # Proses yang masih memakai versi lama tidak menghapus jawaban versi yang lebih baru, sehingga dua
+    # proses dengan versi workbook berbeda tidak saling menghapus (jawaban tetap benar untuk konteksnya,
+    # versi hanya menentukan kapan dibuang; sisanya dibuang evict).
+    def sync_version(self, dataset, version):
+        if version is None:
+            return 0
+        try:
+            connection = self._connection()
+            connection.execute('INSERT OR IGNORE INTO table_versions (dataset, version, seen) VALUES (?, ?, ?)',
+                               (dataset, version, time.time()))
+            rows = connection.execute('SELECT version FROM table_versions WHERE dataset = ? '
+                                      'ORDER BY seen DESC, rowid DESC', (dataset,)).fetchall()
+            if rows[0][0] != version:
+                return 0
+            removed = 0
+            for (old,) in rows[1:]:
+                removed += connection.execute('DELETE FROM answers WHERE version = ?', (old,)).rowcount
+        except sqlite3.Error:
+            self._count('errors')
+            return 0
+        self._count('invalidated', removed)
+        return removed
+
+    def clear(self):
+        self._connection().execute('DELETE FROM answers')
+
+    # Counter proses ini, ditambah isi file (entries=True, satu query agregat pada SQLite)
+    def stats(self, entries=True):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters['hits'] + counters['misses']
+        total = total_hits = saved = None
+        if entries:
+            try:
+                total, total_hits, saved = self._connection().execute(
+                    'SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(hits * seconds), 0) FROM answers').fetchone()
+            except sqlite3.Error:
+                pass
+        return dict(
+            counters,
+            hit_ratio=counters['hits'] / lookups if lookups else None,
+            entries=total,
+            max_entries=self.max_entries,
+            max_age_days=self.max_age / 86400,
+            stored_hits=total_hits,
+            stored_saved_seconds=saved,
+        )
+
+
+####################
+### PROCESS-WIDE ###
+####################
+
+# Cache jawaban untuk proses ini, None jika dimatikan (CHATBOT_ANSWER_MEMO kosong) atau gagal dibuka
+def get_answer_memo():
+    global _MEMO
+    if _MEMO is None and ANSWER_MEMO_PATH:
+        with _MEMO_LOCK:
+            if _MEMO is None:
+                try:
+                    _MEMO = AnswerMemo()
+                except (OSError, sqlite3.Error):
+                    return None
+    return _MEMO
+
+# entries=False: hanya counter di memory, tanpa membuka atau membaca file SQLite (untuk /metrics,
+# yang juga dilayani saat startup dan tidak boleh menunggu file yang dikunci proses lain)
+def answer_memo_stats(entries=True):
+    memo = get_answer_memo() if entries else _MEMO
+    return memo.stats(entries) if memo is not None else {'enabled': 0}
+
+register_collector('answer_memo', lambda: answer_memo_stats(entries=False))
+
+
+# Ukur latency hit/miss dan kontensi beberapa proses pada file cache sementara, misal:
+#   python answer_memo.py --entries 20000 --processes 4
+if __name__ == '__main__':
+    import json
+    import multiprocessing
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Latency cache jawaban QA (SQLite WAL).")
+    parser.add_argument('--entries', type=int, default=20_000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'answers.sqlite')
+    memo = AnswerMemo(path, max_entries=args.entries)
+    contexts = [f"SUTET GITET A{i}-GITET B{i} #1 ada di wilayah UPT {i % 7} dengan panjang {i} km." for i in range(args.entries)]
+
+    start = time.perf_counter()
+    for i, context in enumerate(contexts):
+        memo.put("Berapa panjang penghantar?", context, 'bench', f"{i} km", 0.08, version='v1')
+    put_us = (time.perf_counter() - start) / len(contexts) * 1e6
+
+    start = time.perf_counter()
+    for context in contexts:
+        memo.get("berapa panjang  penghantar", context, 'bench')
+    get_us = (time.perf_counter() - start) / len(contexts) * 1e6
+    print(f"put {put_us:.1f} us  get (hit) {get_us:.1f} us")
+
+    def reader(seed):
+        local = AnswerMemo(path, max_entries=args.entries)
+        for i in range(2000):
+            context = contexts[(seed * 7919 + i) % len(contexts)]
+            if local.get("Berapa panjang penghantar?", context, 'bench') is None:
+                local.put("Berapa panjang penghantar?", context, 'bench', 'x', 0.08)
+        return local.counters['hits'], local.counters['errors']
+
+    start = time.perf_counter()
+    with multiprocessing.get_context('fork').Pool(args.processes) as pool:
+        results = pool.map(reader, range(args.processes))
+    print(f"{args.processes} proses x 2000 lookup: {time.perf_counter() - start:.2f} s, (hits, errors) = {results}")
+    print("invalidated:", memo.sync_version('pht', 'v1'), memo.sync_version('pht', 'v2'))
+    print(json.dumps(memo.stats(), indent=2))
@@ -0,0 +1,128 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+
+# Jawaban chat yang dimaterialisasi satu kali per versi data PHT. Setiap bagian mencatat kolom
+# yang dipakainya; saat data berubah, hanya bagian yang kolomnya berubah yang dihitung ulang.
+PART_COLUMNS = {
+    'wilayah_totals': ('Wilayah', 'Panjang Penghantar'),
+    'derating': ('Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Keterangan Penyebab Derating'),
+    'wilayah_pht': ('Wilayah',),
+    'daftar_penghantar': ('Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Panjang Penghantar'),
+    'jumlah_penghantar': (),
+    'arus_terbesar': ('Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Nominal Arus (A)'),
+}
+
+# Intent daftar: yang disimpan hanya posisi baris (urut asli), teks di-render per halaman saat ditampilkan
+LISTING_COLUMNS = {
+    'derating': ('Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Keterangan Penyebab Derating'),
+    'daftar_penghantar': ('Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Panjang Penghantar'),
+}
+EMPTY_LISTING_MESSAGES = {
+    'derating': "Tidak ada penghantar yang mengalami derating.",
+}
+
+
+###################
+### PART BUILDS ###
+###################
+
+def _wilayah_totals(df):
+    totals = df.groupby('Wilayah', dropna=True, observed=True)['Panjang Penghantar'].sum()
+    # (nama wilayah dalam huruf kecil untuk pencocokan, nama asli, total panjang)
+    return [(str(name).lower(), name, total) for name, total in totals.items()]
+
+def _derating(df):
+    return np.flatnonzero(df['Keterangan Penyebab Derating'].notna().to_numpy())
+
+def _wilayah_pht(df):
+    wilayah_list = df['Wilayah'].dropna().astype(str).unique()
+    return f"Wilayah yang terdaftar untuk PHT: {', '.join(wilayah_list)}"
+
+def _daftar_penghantar(df):
+    return np.arange(len(df))
+
+def _jumlah_penghantar(df):
+    return f"Jumlah penghantar PHT: {len(df)}"
+
+def _arus_terbesar(df):
+    if not df['Nominal Arus (A)'].notna().any():
+        return "Data arus penghantar tidak tersedia."
+    penghantar_terbesar = df.loc[df['Nominal Arus (A)'].idxmax()]
+    return (f"Penghantar dengan arus terbesar adalah dari {penghantar_terbesar['Dari Gitet/Gistet']} "
+            f"ke {penghantar_terbesar['Ke Gitet/Gistet']} dengan arus {penghantar_terbesar['Nominal Arus (A)']} A.")
+
+PART_BUILDERS = {
+    'wilayah_totals': _wilayah_totals,
+    'derating': _derating,
+    'wilayah_pht': _wilayah_pht,
+    'daftar_penghantar': _daftar_penghantar,
+    'jumlah_penghantar': _jumlah_penghantar,
+    'arus_terbesar': _arus_terbesar,
+}
+
+
+####################
+### ANSWER STORE ###
+####################
+
+# Fingerprint isi kolom (hash vectorized per baris + jumlah baris)
+def _fingerprint(df, columns):
+    digest = hashlib.sha1(str(len(df)).encode())
+    if columns:
+        digest.update(pd.util.hash_pandas_object(df[list(columns)], index=False).values.tobytes())
+    return digest.hexdigest()
+
+# Jawaban untuk satu DataFrame, tidak berubah setelah dibangun. previous = store versi sebelumnya:
+# bagian yang kolom sumbernya tidak berubah dipakai ulang, hanya bagian lain yang dibangun ulang.
+class AnswerStore:
+    def __init__(self, df, previous=None):
+        self.df = df
+        self.parts, self.fingerprints, self.rebuilt = {}, {}, []
+        for part, columns in PART_COLUMNS.items():
+            self.fingerprints[part] = _fingerprint(df, columns)
+            if previous is not None and previous.fingerprints.get(part) == self.fingerprints[part]:
+                self.parts[part] = previous.parts[part]
+            else:
+                self.parts[part] = PART_BUILDERS[part](df)
+                self.rebuilt.append(part)
+
+    # Jawaban yang tidak butuh input tambahan, langsung dari store.
+    # Intent daftar di-render utuh di sini; untuk tampilan per halaman pakai listing().
+    def answer(self, intent):
+        if intent in LISTING_COLUMNS:
+            positions = self.parts[intent]
+            if not len(positions) and intent in EMPTY_LISTING_MESSAGES:
+                return EMPTY_LISTING_MESSAGES[intent]
+            return self.df.iloc[positions][list(LISTING_COLUMNS[intent])].to_string(index=False)
+        return self.parts[intent]
+
+    # (DataFrame, posisi baris, kolom) untuk intent daftar
+    def listing(self, intent):
+        return self.df, self.parts[intent], LISTING_COLUMNS[intent]
+
+    # Total PHT untuk semua wilayah yang namanya mengandung input (tidak peka huruf besar/kecil)
+    def total_pht(self, wilayah):
+        needle = wilayah.lower()
+        total = sum((length for key, _, length in self.parts['wilayah_totals'] if needle in key), 0.0)
+        return f"Total PHT di wilayah {wilayah.capitalize()} adalah {round(total, 2)} km."
+
+
+# Satu store per DataFrame (per versi data PHT), dibuang bersama DataFrame-nya
+_STORES = FrameCache(AnswerStore, name='answer_store')
+
+def get_answer_store(df):
+    return _STORES.get(df)
+
+# Bangun store untuk new_df dari store old_df saat workbook dimuat ulang (lihat Ask_me_._reload_hook):
+# bagian yang kolomnya tidak berubah dipakai ulang. Tanpa store lama, store dibangun saat pertama dipakai.
+def patch_answer_store(old_df, new_df):
+    previous = _STORES.peek(old_df)
+    if previous is None:
+        return None
+    store = AnswerStore(new_df, previous)
+    _STORES.put(new_df, store)
+    return store
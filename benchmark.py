@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import qa_registry
+import snapshot_store
+from Ask_me_ import (MITIGASI_FILE, MITIGASI_SHEET, PEMBANGKITAN_FILE, PHT_FILE, answer_from_data,
+                     build_context_and_response, build_context_and_response_mitigasi,
+                     build_context_and_response_pembangkitan, get_answer, get_answers, search_data,
+                     search_data_mitigasi, search_data_pembangkitan)
+from context_retrieval import get_row_retriever, tokenize
+from pembangkit_rollup import coerce_pembangkit_numeric, get_pembangkit_rollup, render_pembangkitan
+from response_render import render_mitigasi_responses, render_pht_responses
+from search_index import get_search_index
+from synthetic_data import (BASE_WILAYAH, make_mitigasi, make_pembangkit, make_pht, substation_names,
+                            write_workbooks)
+
+# Benchmark seluruh pipeline (load, index, search, render, QA) pada data sintetis, misal:
+#   python benchmark.py --sizes 1000 10000 100000 --output benchmark_results/baseline.json
+#   python benchmark.py --sizes 1000 10000 100000 --compare benchmark_results/baseline.json
+# Stage QA memakai stub pipeline (tanpa jaringan/torch) kecuali --qa-model real.
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+RESULTS_DIR = 'benchmark_results'
+
+# Rasio waktu baru/lama di atas (1 + threshold) dianggap regresi; metrik yang sangat cepat diabaikan
+REGRESSION_THRESHOLD = 0.25
+NOISE_FLOOR_MS = 0.05
+
+QA_QUESTIONS = ['Berapa panjang penghantar?', 'Apa alasan derating?', 'Berapa kemampuan penghantar?',
+                'Di wilayah mana penghantar ini?']
+
+
+###############
+### QA STUB ###
+###############
+
+# Meniru antarmuka pipeline question-answering tanpa model. Biayanya sebanding dengan panjang
+# konteks (semua token diperiksa), sehingga efek penyempitan konteks tetap terukur.
+# cost_ms: biaya CPU tambahan per pertanyaan (memegang GIL) seperti forward pass model.
+class StubQAPipeline:
+    def __init__(self, cost_ms=0.0):
+        self.cost_ms = cost_ms
+
+    def __call__(self, question=None, context=None, batch_size=None, **kwargs):
+        if isinstance(question, list):
+            return [self._answer(q, c) for q, c in zip(question, context)]
+        return self._answer(question, context)
+
+    def _answer(self, question, context):
+        end = time.thread_time() + self.cost_ms / 1000
+        while time.thread_time() < end:
+            pass
+        wanted = set(tokenize(question))
+        words = context.split()
+        best = 0
+        for i, word in enumerate(words):
+            if word.lower().strip('.,:') in wanted:
+                best = i
+        answer = " ".join(words[best + 1:best + 3]) or context[:20]
+        start = context.find(answer)
+        return {'answer': answer, 'score': 0.5, 'start': start, 'end': start + len(answer)}
+
+
+##############
+### TIMING ###
+##############
+
+def _time(fn, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return {'median_ms': 1000 * statistics.median(timings), 'min_ms': 1000 * min(timings)}, result
+
+def _rows(result):
+    return 0 if result is None else len(result)
+
+# Keyword per dataset: satu yang selektif, satu yang cocok dengan banyak baris, satu yang tidak ada
+def _keywords(n_rows):
+    gitet = substation_names(n_rows)[-1].lower()
+    return {
+        'pht': {'selective': gitet, 'broad': BASE_WILAYAH[0].lower(), 'miss': 'tidak-ada-xyz'},
+        'mitigasi': {'selective': gitet, 'broad': 'manuver beban', 'miss': 'tidak-ada-xyz'},
+        'pembangkitan': {'selective': 'pembangkit 007', 'broad': 'pltu', 'miss': 'tidak-ada-xyz'},
+    }
+
+
+##############
+### STAGES ###
+##############
+
+# Load workbook: parse Excel + tulis snapshot (cold), baca snapshot (warm), cache per proses (hit).
+# Menulis/parse Excel besar butuh menit, jadi di atas excel_max_rows hanya snapshot yang diukur.
+def bench_load(n_rows, frames, excel_max_rows, workdir):
+    previous_dir = snapshot_store.SNAPSHOT_DIR
+    snapshot_store.SNAPSHOT_DIR = os.path.join(workdir, f"snapshots_{n_rows}")
+    results = {}
+    try:
+        if n_rows <= excel_max_rows:
+            data_dir = os.path.join(workdir, f"workbooks_{n_rows}")
+            write_workbooks(data_dir, n_rows)
+            tables = {
+                'pht': (PHT_FILE, 0, None),
+                'mitigasi': (MITIGASI_FILE, MITIGASI_SHEET, None),
+                'pembangkitan': (PEMBANGKITAN_FILE, 0, coerce_pembangkit_numeric),
+            }
+            for name, (file_name, sheet, prepare) in tables.items():
+                path = os.path.join(data_dir, file_name)
+                load = lambda: snapshot_store.load_excel_cached(path, sheet_name=sheet, prepare=prepare)
+                snapshot_store.clear_memory_cache()
+                results[f"{name}:excel_cold"], _ = _time(load, 1)
+                snapshot_store.clear_memory_cache()
+                results[f"{name}:snapshot_warm"], _ = _time(load, 1)
+                results[f"{name}:memory_hit"], _ = _time(load, 20)
+            snapshot_store.clear_memory_cache()
+        else:
+            for name, df in frames.items():
+                base = snapshot_store._snapshot_base(name, 0)
+                results[f"{name}:snapshot_write"], fmt = _time(lambda: snapshot_store._write_snapshot(df, base), 1)
+                results[f"{name}:snapshot_warm"], _ = _time(lambda: snapshot_store._read_snapshot(base, fmt), 1)
+    finally:
+        snapshot_store.SNAPSHOT_DIR = previous_dir
+    return results
+
+# Struktur turunan yang dibangun saat load_data_pht (sekali per versi data)
+def bench_index(frames):
+    results = {}
+    for name, df in frames.items():
+        results[f"{name}:search_index"], _ = _time(lambda: get_search_index(df), 1)
+        results[f"{name}:row_retriever"], _ = _time(lambda: get_row_retriever(df), 1)
+    results['pembangkitan:rollup'], _ = _time(lambda: get_pembangkit_rollup(frames['pembangkitan']), 1)
+    return results
+
+def bench_search(frames, keywords, repeat):
+    searches = {'pht': search_data, 'mitigasi': search_data_mitigasi, 'pembangkitan': search_data_pembangkitan}
+    results = {}
+    for name, search in searches.items():
+        for label, keyword in keywords[name].items():
+            timing, result = _time(lambda: search(frames[name], keyword), repeat)
+            results[f"{name}:{label}"] = dict(timing, rows=_rows(result))
+    return results
+
+# Render saja (hasil pencarian sudah ada) dan end-to-end build_context_and_response* (search + render).
+# DataFrame sintetis tidak punya versi workbook, sehingga result cache tidak ikut terukur.
+def bench_render(frames, keywords, repeat):
+    results = {}
+    for label, keyword in keywords['pht'].items():
+        found = search_data(frames['pht'], keyword)
+        if found is not None:
+            results[f"pht:{label}"], _ = _time(lambda: render_pht_responses(found, keyword), repeat)
+        results[f"pht_build:{label}"], _ = _time(lambda: build_context_and_response(frames['pht'], keyword), repeat)
+
+    for label, keyword in keywords['mitigasi'].items():
+        found = search_data_mitigasi(frames['mitigasi'], keyword)
+        if found is not None:
+            results[f"mitigasi:{label}"], _ = _time(lambda: render_mitigasi_responses(found, keyword), repeat)
+        results[f"mitigasi_build:{label}"], _ = _time(
+            lambda: build_context_and_response_mitigasi(frames['mitigasi'], keyword), repeat)
+
+    rollup = get_pembangkit_rollup(frames['pembangkitan'])
+    for label, keyword in keywords['pembangkitan'].items():
+        results[f"pembangkitan:{label}"], _ = _time(lambda: render_pembangkitan(rollup, keyword), repeat)
+        results[f"pembangkitan_build:{label}"], _ = _time(
+            lambda: build_context_and_response_pembangkitan(frames['pembangkitan'], keyword), repeat)
+    return results
+
+def bench_qa(frames, keywords, repeat):
+    results = {}
+    pht = frames['pht']
+    for label in ('selective', 'broad'):
+        keyword = keywords['pht'][label]
+        question = f"Berapa panjang penghantar {keyword}?"
+        context, _ = build_context_and_response(pht, keyword)
+        results[f"answer_from_data:{label}"], _ = _time(lambda: answer_from_data(question, pht, keyword), repeat)
+        results[f"get_answer:{label}"], _ = _time(lambda: get_answer(question, context), repeat)
+        results[f"get_answers_x{len(QA_QUESTIONS)}:{label}"], _ = _time(
+            lambda: get_answers(QA_QUESTIONS, [context] * len(QA_QUESTIONS)), repeat)
+    return results
+
+
+###############
+### RUNNING ###
+###############
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, stages, repeat=5, excel_max_rows=20_000, qa_model='stub', seed=0):
+    if 'qa' in stages and qa_model == 'stub':
+        qa_registry.use_qa_model(StubQAPipeline(), model_id='stub')
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'qa_model': qa_registry.qa_model_id() if 'qa' in stages else None,
+            'repeat': repeat,
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='chatbot_bench_') as workdir:
+        for n_rows in sizes:
+            start = time.perf_counter()
+            frames = {
+                'pht': make_pht(n_rows, seed),
+                'mitigasi': make_mitigasi(n_rows, seed),
+                'pembangkitan': coerce_pembangkit_numeric(make_pembangkit(n_rows, seed)),
+            }
+            keywords = _keywords(n_rows)
+            results = {'generate': {'all:synthetic': {'median_ms': 1000 * (time.perf_counter() - start)}}}
+            # Urutan stage tetap: index dibangun sebelum search/render/qa supaya biayanya terpisah
+            if 'load' in stages:
+                results['load'] = bench_load(n_rows, frames, excel_max_rows, workdir)
+            results['index'] = bench_index(frames)
+            if 'search' in stages:
+                results['search'] = bench_search(frames, keywords, repeat)
+            if 'render' in stages:
+                results['render'] = bench_render(frames, keywords, repeat)
+            if 'qa' in stages:
+                results['qa'] = bench_qa(frames, keywords, repeat)
+            report['results'][str(n_rows)] = results
+            print(f"{n_rows:>9,} baris selesai dalam {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return report
+
+
+##################
+### COMPARISON ###
+##################
+
+def _flatten(report):
+    return {f"{size}/{stage}/{metric}": values['median_ms']
+            for size, stages in report['results'].items()
+            for stage, metrics in stages.items()
+            for metric, values in metrics.items()}
+
+# Bandingkan dua hasil benchmark; kembalikan daftar (metrik, lama, baru, rasio, regresi?)
+def compare(old_report, new_report, threshold=REGRESSION_THRESHOLD):
+    old, new = _flatten(old_report), _flatten(new_report)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] else None
+        regression = (ratio is not None and ratio > 1 + threshold and max(old[key], new[key]) >= NOISE_FLOOR_MS)
+        rows.append((key, old[key], new[key], ratio, regression))
+    return rows
+
+def print_comparison(rows, old_report, new_report):
+    print(f"lama: {old_report['meta'].get('commit')}  baru: {new_report['meta'].get('commit')}")
+    print(f"{'metrik':64} {'lama ms':>11} {'baru ms':>11} {'rasio':>7}")
+    for key, old_ms, new_ms, ratio, regression in rows:
+        ratio_text = f"{ratio:7.2f}" if ratio is not None else f"{'-':>7}"
+        print(f"{key:64} {old_ms:11.3f} {new_ms:11.3f} {ratio_text}{'  REGRESI' if regression else ''}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark pipeline chatbot pada data sintetis.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="jumlah baris per tabel, misal 1000 10000 100000 1000000")
+    parser.add_argument('--stages', nargs='+', choices=['load', 'search', 'render', 'qa'],
+                        default=['load', 'search', 'render', 'qa'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--excel-max-rows', type=int, default=20_000,
+                        help="ukuran terbesar yang ditulis/di-parse sebagai Excel pada stage load")
+    parser.add_argument('--qa-model', choices=['stub', 'real'], default='stub',
+                        help="'real' memuat model dari qa_registry (butuh torch/transformers)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help=f"file JSON hasil (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument('--compare', default=None, help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--fail-on-regression', action='store_true', help="exit code 1 jika ada regresi")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.stages, args.repeat, args.excel_max_rows, args.qa_model, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"hasil disimpan di {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        rows = compare(previous, report, args.threshold)
+        print_comparison(rows, previous, report)
+        if args.fail_on_regression and any(row[4] for row in rows):
+            sys.exit(1)
+    else:
+        for size, stages in report['results'].items():
+            for stage, metrics in stages.items():
+                for metric, values in metrics.items():
+                    rows = f"  {values['rows']} baris" if 'rows' in values else ''
+                    print(f"{size:>9} {stage:8} {metric:36} {values['median_ms']:11.3f} ms{rows}")
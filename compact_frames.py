@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# Representasi ringkas tabel di memory. Kolom teks yang nilainya sering berulang (Wilayah,
+# Gitet/Gistet, Perusahaan, Jenis, ...) disimpan sebagai category: setiap nilai unik disimpan
+# sekali, baris hanya menyimpan kode kecil. Index pencarian juga mencari kolom category per nilai
+# unik (lihat search_index.py), sehingga korpus teks per baris hanya berisi kolom lainnya.
+
+# Kolom teks dijadikan category jika jumlah nilai uniknya paling banyak fraksi ini dari jumlah baris
+CATEGORY_MAX_UNIQUE = 0.5
+
+
+##################
+### COMPACTION ###
+##################
+
+# True jika semua nilai yang terisi bertipe str (kolom campuran angka/teks dibiarkan object)
+def _is_text(series):
+    values = series.dropna()
+    return len(values) > 0 and values.map(type).eq(str).all()
+
+# Integer diperkecil paling jauh ke int32: aritmatika per elemen pada int8/int16 mudah overflow
+def _downcast_integer(series):
+    if series.dtype.itemsize <= 4 or not len(series):
+        return series
+    info = np.iinfo(np.int32)
+    if series.min() >= info.min and series.max() <= info.max:
+        return series.astype(np.int32)
+    return series
+
+# Salinan DataFrame dengan kolom teks berulang sebagai category dan integer yang diperkecil.
+# Isi tetap sama (to_string, pencarian, hash baris untuk diff); float tidak diubah karena
+# penjumlahan float32 menggeser hasil subtotal yang ditampilkan.
+def compact_frame(df, max_unique=CATEGORY_MAX_UNIQUE):
+    out = df.copy(deep=False)
+    for i in range(len(df.columns)):
+        series = df.iloc[:, i]
+        if series.dtype == object and _is_text(series):
+            if series.nunique(dropna=True) <= max_unique * len(series):
+                out.isetitem(i, series.astype('category'))
+        elif pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            out.isetitem(i, _downcast_integer(series))
+    return out
+
+
+#####################
+### MEMORY REPORT ###
+#####################
+
+# Pemakaian memory satu tabel per kolom (bytes, deep=True menghitung isi string object)
+def memory_report(df):
+    usage = df.memory_usage(deep=True, index=True)
+    columns = [{'column': str(col), 'dtype': str(dtype), 'bytes': int(usage.iloc[i + 1])}
+               for i, (col, dtype) in enumerate(df.dtypes.items())]
+    return {'rows': len(df), 'bytes': int(usage.sum()), 'index_bytes': int(usage.iloc[0]), 'columns': columns}
+
+
+# Bandingkan ukuran tabel sintetis sebelum dan sesudah compact_frame, misal:
+#   python compact_frames.py --rows 100000
+if __name__ == '__main__':
+    from pembangkit_rollup import coerce_pembangkit_numeric
+    from search_index import SearchIndex
+    from synthetic_data import make_mitigasi, make_pembangkit, make_pht
+
+    parser = argparse.ArgumentParser(description="Ukuran tabel (deep) dan index pencarian: object vs compact.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    tables = {
+        'pht': make_pht(args.rows),
+        'mitigasi': make_mitigasi(args.rows),
+        'pembangkitan': coerce_pembangkit_numeric(make_pembangkit(args.rows)),
+    }
+    for name, table in tables.items():
+        start = time.perf_counter()
+        compact = compact_frame(table)
+        elapsed = time.perf_counter() - start
+        before, after = memory_report(table)['bytes'], memory_report(compact)['bytes']
+        corpus_before, corpus_after = len(SearchIndex(table).corpus), len(SearchIndex(compact).corpus)
+        print(f"{name:13} tabel {before / 2**20:7.1f} -> {after / 2**20:6.1f} MB ({before / after:4.1f}x, "
+              f"{elapsed * 1000:.0f} ms)  korpus index {corpus_before / 2**20:6.1f} -> {corpus_after / 2**20:6.1f} MB")
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import re
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+from frame_cache import FrameCache
+from result_cache import LRUCache
+
+# Jumlah baris konteks yang dikirim ke model QA
+QA_TOP_K = int(os.environ.get('CHATBOT_QA_TOP_K', '5'))
+
+# Parameter BM25 standar
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Retriever hasil patch dibangun ulang penuh jika baris delta melebihi fraksi ini dari tabel
+_COMPACT_FRACTION = 0.1
+
+# Jumlah index BM25 konteks teks (narrow_context) yang disimpan, per hash konteks
+_CONTEXT_INDEX_SIZE = 64
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+############
+### BM25 ###
+############
+
+# Index BM25 sparse: untuk setiap token disimpan posting (id baris, bobot BM25 per baris).
+# Bobot sudah termasuk normalisasi panjang, sehingga skor query = jumlah idf * bobot.
+# avg_length bisa diberikan dari luar (segmen delta memakai panjang rata-rata segmen dasar).
+# Posting semua token disimpan berurutan dalam dua array datar (CSR): posting token t =
+# rows/weights[offsets[t]:offsets[t + 1]], tanpa objek array terpisah per token.
+class BM25Index:
+    def __init__(self, texts, avg_length=None):
+        # Satu lintasan per dokumen: daftar token semua dokumen tidak pernah disimpan sekaligus
+        self.vocab = {}
+        token_ids, doc_rows, freqs, doc_lengths = array('i'), array('i'), array('i'), array('i')
+        for row, text in enumerate(texts):
+            counts = defaultdict(int)
+            doc = tokenize(text)
+            doc_lengths.append(len(doc))
+            for token in doc:
+                counts[token] += 1
+            for token, tf in counts.items():
+                token_ids.append(self.vocab.setdefault(token, len(self.vocab)))
+                doc_rows.append(row)
+                freqs.append(tf)
+
+        self.n_docs = len(doc_lengths)
+        lengths = np.frombuffer(doc_lengths, dtype=np.int32).astype(np.float64)
+        if avg_length is None:
+            avg_length = lengths.mean() if self.n_docs else 0.0
+        self.avg_length = avg_length
+
+        token_ids = np.frombuffer(token_ids, dtype=np.int32)
+        order = np.argsort(token_ids, kind='stable')
+        self.rows = np.frombuffer(doc_rows, dtype=np.int32)[order]
+        tf = np.frombuffer(freqs, dtype=np.int32)[order].astype(np.float64)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[self.rows] / (avg_length or 1.0))
+        self.weights = (tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        doc_freq = np.bincount(token_ids, minlength=len(self.vocab))
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self.offsets[1:])
+        self.idf = np.log(1 + (self.n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    # Posting satu token: (id baris, bobot), atau None jika token tidak ada
+    def posting(self, token):
+        token_id = self.vocab.get(token)
+        if token_id is None:
+            return None
+        start, end = self.offsets[token_id], self.offsets[token_id + 1]
+        return self.rows[start:end], self.weights[start:end]
+
+    def document_frequency(self, token):
+        token_id = self.vocab.get(token)
+        return 0 if token_id is None else int(self.offsets[token_id + 1] - self.offsets[token_id])
+
+    # Skor BM25 untuk semua baris (nol untuk baris tanpa token query)
+    def scores(self, query):
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self.posting(token)
+            if posting is not None:
+                rows, weights = posting
+                scores[rows] += float(self.idf[self.vocab[token]]) * weights
+        return scores
+
+    # Posisi top-k baris untuk query, dibatasi ke `candidates` jika diberikan.
+    # Hasil dikembalikan dalam urutan baris asli supaya tabel konteks tetap mudah dibaca.
+    def top_k(self, query, k, candidates=None):
+        if candidates is None:
+            candidates = np.arange(self.n_docs)
+        candidates = np.asarray(candidates, dtype=np.intp)
+        if len(candidates) <= k:
+            return candidates
+        candidate_scores = self.scores(query)[candidates]
+        if not candidate_scores.any():
+            # Tidak ada token yang sama dengan pertanyaan: ambil k baris pertama
+            return candidates[:k]
+        best = np.argpartition(-candidate_scores, k - 1)[:k]
+        return np.sort(candidates[best])
+
+
+######################
+### ROW RETRIEVERS ###
+######################
+
+# Teks per baris untuk retrieval: semua sel digabung dengan spasi
+def _row_texts(df):
+    if len(df.columns) == 0:
+        return [''] * len(df)
+    cols = [df[c].astype(str) for c in df.columns]
+    return cols[0].str.cat(cols[1:], sep=' ').tolist() if len(cols) > 1 else cols[0].tolist()
+
+# BM25 di atas baris DataFrame, dibangun satu kali per tabel saat load
+_RETRIEVERS = FrameCache(lambda df: BM25Index(_row_texts(df)), name='row_retriever')
+
+def get_row_retriever(df):
+    return _RETRIEVERS.get(df)
+
+# Retriever versi tabel baru: skor segmen dasar (retriever versi lama, posisi lewat remap) +
+# segmen delta untuk baris yang ditambah/diubah. idf token delta dihitung dari frekuensi dokumen
+# gabungan; statistik segmen dasar baru diperbarui penuh saat kompaksi.
+class PatchedBM25Index(BM25Index):
+    def __init__(self, base, remap, delta_positions, delta_texts, n_docs):
+        self.base = base
+        self.remap = remap
+        self.delta_positions = delta_positions
+        self.n_docs = n_docs
+        self.delta = BM25Index(delta_texts, avg_length=base.avg_length)
+        for token, token_id in self.delta.vocab.items():
+            df_t = self.delta.document_frequency(token) + base.document_frequency(token)
+            self.delta.idf[token_id] = np.log(1 + (n_docs - df_t + 0.5) / (df_t + 0.5))
+
+    def scores(self, query):
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        valid = self.remap >= 0
+        scores[self.remap[valid]] = self.base.scores(query)[valid]
+        scores[self.delta_positions] = self.delta.scores(query)
+        return scores
+
+# Perbarui retriever untuk new_df dari retriever old_df + diff baris (lihat dataset_watcher.diff_tables)
+def patch_row_retriever(old_df, new_df, diff):
+    old = _RETRIEVERS.peek(old_df)
+    if old is None:
+        return None
+    if isinstance(old, PatchedBM25Index):
+        base = old.base
+        remap, delta = diff.compose(old.remap, old.delta_positions)
+    else:
+        base, remap, delta = old, diff.remap, diff.changed
+
+    if len(delta) > len(new_df) * _COMPACT_FRACTION:
+        retriever = BM25Index(_row_texts(new_df))
+    else:
+        retriever = PatchedBM25Index(base, remap, delta, _row_texts(new_df.iloc[delta]), len(new_df))
+    _RETRIEVERS.put(new_df, retriever)
+    return retriever
+
+# Susun konteks model dari top-k baris tabel yang paling relevan dengan pertanyaan
+def retrieve_context(question, df, candidates=None, k=QA_TOP_K):
+    top = get_row_retriever(df).top_k(question, k, candidates)
+    if not len(top):
+        return None
+    return df.iloc[top].to_string(index=False)
+
+_CONTEXT_INDEXES = LRUCache(_CONTEXT_INDEX_SIZE)
+
+# Output DataFrame.to_string: header + satu baris per record, semua baris dipadding ke lebar yang sama
+def _is_table_text(lines):
+    return len(lines) > 1 and lines[0].strip() != '' and len({len(line) for line in lines}) == 1
+
+# Persempit konteks tabel teks (output DataFrame.to_string) ke header + top-k baris yang paling relevan.
+# Konteks lain (teks bebas) dikirim utuh: baris pertamanya bukan header dan tidak boleh hilang.
+# Index BM25 disimpan per hash konteks, karena konteks yang sama dipakai ulang untuk banyak pertanyaan.
+def narrow_context(question, context, k=QA_TOP_K):
+    lines = context.splitlines()
+    if len(lines) <= k + 1 or not _is_table_text(lines):
+        return context
+    header, rows = lines[0], lines[1:]
+    key = hashlib.sha256(context.encode('utf-8')).hexdigest()
+    top = _CONTEXT_INDEXES.get_or_compute(key, lambda: BM25Index(rows)).top_k(question, k)
+    return "\n".join([header] + [rows[i] for i in top])
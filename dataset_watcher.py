@@ -0,0 +1,125 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Reload inkremental workbook: watcher di background mendeteksi perubahan file, lalu baris baru
+# dibandingkan dengan tabel di memory per key (misal Dari/Ke Gitet + Sirkit ke). Hanya baris yang
+# ditambah/diubah yang di-index ulang; pembaca tetap memakai versi lama sampai versi baru siap.
+
+
+######################
+### ROW-LEVEL DIFF ###
+######################
+
+# Hasil diff dua versi tabel.
+#   remap[i]  posisi baru baris lama i jika isinya tidak berubah, -1 jika dihapus atau diubah
+#   changed   posisi baru (urut) untuk baris yang ditambah atau diubah
+class TableDiff:
+    def __init__(self, remap, changed, inserted, updated, deleted):
+        self.remap = remap
+        self.changed = changed
+        self.inserted = inserted
+        self.updated = updated
+        self.deleted = deleted
+
+    @property
+    def is_empty(self):
+        return not (self.inserted or self.updated or self.deleted)
+
+    # Gabungkan dengan patch sebelumnya: remap ke segmen dasar dan posisi segmen delta lama
+    # dibawa ke posisi tabel baru, sehingga struktur hasil patch tetap satu tingkat
+    def compose(self, base_remap, delta_positions):
+        valid = base_remap >= 0
+        remap = np.full(len(base_remap), -1, dtype=np.intp)
+        remap[valid] = self.remap[base_remap[valid]]
+        carried = self.remap[delta_positions]
+        delta = np.union1d(carried[carried >= 0], self.changed).astype(np.intp)
+        return remap, delta
+
+    def summary(self):
+        return {'inserted': self.inserted, 'updated': self.updated, 'deleted': self.deleted,
+                'unchanged': int((self.remap >= 0).sum())}
+
+# Key unik per baris: kolom key (atau hash isi baris jika kolom key tidak ada) + nomor kemunculan,
+# sehingga key ganda tetap dipasangkan sesuai urutan
+def _row_keys(df, key_columns, row_hash):
+    if key_columns and all(col in df.columns for col in key_columns):
+        keys = df[list(key_columns)].reset_index(drop=True)
+    else:
+        keys = pd.DataFrame({'__row_hash__': row_hash})
+    occurrence = keys.groupby(list(keys.columns), sort=False, dropna=False, observed=True).cumcount()
+    return pd.MultiIndex.from_frame(keys.assign(__occurrence__=occurrence.to_numpy()))
+
+# Diff baris antara tabel lama dan baru berdasarkan key. None jika kolomnya berbeda (skema berubah).
+def diff_tables(old, new, key_columns=None):
+    if list(old.columns) != list(new.columns):
+        return None
+    old_hash = pd.util.hash_pandas_object(old, index=False).to_numpy()
+    new_hash = pd.util.hash_pandas_object(new, index=False).to_numpy()
+    old_keys = _row_keys(old, key_columns, old_hash)
+    new_keys = _row_keys(new, key_columns, new_hash)
+
+    matched = new_keys.get_indexer(old_keys)
+    found = matched >= 0
+    same = found.copy()
+    same[found] = old_hash[found] == new_hash[matched[found]]
+    remap = np.where(same, matched, -1).astype(np.intp)
+
+    fresh = np.ones(len(new), dtype=bool)
+    fresh[remap[same]] = False
+    changed = np.flatnonzero(fresh)
+    inserted = int((old_keys.get_indexer(new_keys) < 0).sum())
+    return TableDiff(remap, changed, inserted, len(changed) - inserted, int((~found).sum()))
+
+
+###############
+### WATCHER ###
+###############
+
+# Thread polling yang memanggil refresh() setiap `interval` detik. refresh() memeriksa file dan
+# memuat ulang yang berubah, lalu mengembalikan ringkasan per tabel yang berubah ({} jika tidak ada).
+class DatasetWatcher:
+    def __init__(self, refresh, interval=5.0):
+        self.refresh = refresh
+        self.interval = interval
+        self.stats = {'checks': 0, 'reloads': 0, 'errors': 0, 'last_error': None,
+                      'last_reload_at': None, 'last_reload_seconds': None, 'last_changes': None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        self.stats['checks'] += 1
+        start = time.perf_counter()
+        try:
+            changes = self.refresh()
+        except Exception as exc:
+            # Tetap jalan: versi lama tetap dilayani, percobaan berikutnya di interval selanjutnya
+            self.stats['errors'] += 1
+            self.stats['last_error'] = f"{type(exc).__name__}: {exc}"
+            return None
+        if changes:
+            self.stats['reloads'] += 1
+            self.stats['last_reload_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            self.stats['last_reload_seconds'] = time.perf_counter() - start
+            self.stats['last_changes'] = changes
+        return changes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='dataset-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
@@ -0,0 +1,263 @@
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+from metrics import inc, stage
+from search_index import normalize
+from snapshot_store import frame_version
+
+# Pencarian fuzzy (toleran salah ketik dan penulisan berbeda). Yang di-embed bukan baris, tetapi
+# kosakata tabel: nilai sel teks yang pendek dan kata-kata di dalamnya. Setiap term diubah menjadi
+# vektor n-gram karakter yang di-hash (tanpa model, tanpa jaringan), dinormalisasi L2, lalu keyword
+# dicari dengan cosine top-k. Term terbaik yang memang punya hasil di jalur pencarian persis dipakai
+# sebagai keyword pengganti, sehingga baris, highlight dan halaman tetap dari index yang sama.
+# Ukuran kosakata jauh lebih kecil dari jumlah baris, sehingga query tetap beberapa ms di 1 juta baris.
+# Membangun kosakata tabel besar butuh puluhan detik, jadi index disiapkan di background setiap kali
+# versi tabel berubah (prewarm_embedding_index); selama belum siap pencarian tetap persis saja.
+#
+#   CHATBOT_EMBEDDING_DIR  lokasi matriks embedding (.npy, dibaca dengan memory-map) per versi workbook
+EMBEDDING_DIR = os.environ.get('CHATBOT_EMBEDDING_DIR', '.embedding_cache')
+EMBEDDING_DIM = 256
+NGRAM_SIZES = (2, 3)
+MIN_TERM_LENGTH = 3
+MAX_TERM_LENGTH = 48
+MIN_SIMILARITY = 0.45
+TOP_K = 10
+
+_WORD = re.compile(r'[0-9a-z]+(?:[-/][0-9a-z]+)*')
+_LOG = logging.getLogger(__name__)
+
+
+##################
+### VECTORIZER ###
+##################
+
+def _ngrams(term):
+    padded = f' {term} '
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            yield padded[i:i + n]
+
+# Matriks (len(terms), dim) float32: n-gram karakter di-hash ke kolom dengan tanda +/- (mengurangi
+# bias tabrakan hash), lalu setiap baris dinormalisasi L2 sehingga perkalian titik = cosine
+def embed_terms(terms, dim=EMBEDDING_DIM):
+    cells, weights = [], []
+    for row, term in enumerate(terms):
+        for gram in _ngrams(term):
+            h = zlib.crc32(gram.encode('utf-8'))
+            cells.append(row * dim + h % dim)
+            weights.append(1.0 if h & 0x80000000 else -1.0)
+    flat = np.bincount(np.asarray(cells, dtype=np.int64), weights=weights, minlength=len(terms) * dim)
+    vectors = flat.reshape(len(terms), dim).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+# Kosakata tabel: kata-kata di dalam sel teks (minimal satu huruf, angka/ID saja tidak ikut), ditambah
+# nilai sel utuh yang cukup pendek dari kolom category (nilai berulang, misal nama Gitet/Gistet).
+# Kolom berisi ID unik per baris tidak memperbesar kosakata karena hanya kata-katanya yang diambil.
+def table_terms(df):
+    terms = set()
+    for i in range(len(df.columns)):
+        series = df.iloc[:, i]
+        categorical = isinstance(series.dtype, pd.CategoricalDtype)
+        if categorical:
+            values = series.cat.categories
+        elif series.dtype == object:
+            values = pd.unique(series.dropna())
+        else:
+            continue
+        texts = [normalize(value) for value in values if isinstance(value, str)]
+        # Satu findall pada gabungan nilai unik jauh lebih cepat daripada regex per nilai
+        terms.update(word for word in set(_WORD.findall('\n'.join(texts)))
+                     if len(word) >= MIN_TERM_LENGTH and not word.isdigit())
+        if categorical:
+            terms.update(text.strip() for text in texts
+                         if MIN_TERM_LENGTH <= len(text.strip()) <= MAX_TERM_LENGTH and '\n' not in text)
+    return sorted(terms)
+
+
+#############
+### INDEX ###
+#############
+
+# Kosakata + matriks embedding satu tabel. Untuk tabel dari workbook (punya frame_version) matriks
+# disimpan di EMBEDDING_DIR dan dibaca dengan memory-map: dihitung sekali (atau offline, lihat
+# __main__), lalu halaman matriks dipakai bersama oleh semua proses lewat page cache.
+class EmbeddingIndex:
+    def __init__(self, df, directory=EMBEDDING_DIR):
+        version = frame_version(df)
+        base = os.path.join(directory, _cache_name(df, version)) if version else None
+        loaded = _load(base) if base else None
+        if loaded is None:
+            with stage('embedding_build') as timer:
+                self.terms = table_terms(df)
+                self.vectors = embed_terms(self.terms)
+                timer.rows = len(self.terms)
+            if base:
+                _save(base, self.terms, self.vectors)
+                _remove_stale(base)
+                self.vectors = np.load(base + '.npy', mmap_mode='r')
+        else:
+            self.terms, self.vectors = loaded
+
+    # Term paling mirip dengan keyword: [(term, cosine)] urut skor menurun, hanya skor >= min_score
+    def similar_terms(self, keyword, top_k=TOP_K, min_score=MIN_SIMILARITY):
+        text = normalize(keyword).strip()
+        if not text or not len(self.terms):
+            return []
+        with stage('embedding_search') as timer:
+            query = embed_terms([text], self.vectors.shape[1])[0]
+            scores = self.vectors @ query
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            timer.rows = len(self.terms)
+        return [(self.terms[i], float(scores[i])) for i in top if scores[i] >= min_score]
+
+    # Term pengganti untuk keyword: term mirip pertama (selain keyword itu sendiri) yang lolos
+    # has_results(term), yaitu jalur pencarian persis dataset tersebut. None jika tidak ada.
+    def suggest(self, keyword, has_results, top_k=TOP_K, min_score=MIN_SIMILARITY):
+        text = normalize(keyword).strip()
+        for term, _ in self.similar_terms(keyword, top_k, min_score):
+            if term != text and has_results(term):
+                return term
+        return None
+
+# Versi workbook adalah hash file; kolom tabel ikut di nama file karena satu workbook bisa punya
+# beberapa sheet
+def _cache_name(df, version):
+    columns = zlib.crc32('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    return f'{version}_{columns:08x}'
+
+def _load(base):
+    try:
+        with open(base + '.json', 'r') as f:
+            terms = json.load(f)
+        vectors = np.load(base + '.npy', mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if vectors.shape != (len(terms), EMBEDDING_DIM):
+        return None
+    return terms, vectors
+
+# Tulis ke file sementara lalu rename, supaya proses lain tidak pernah membaca file setengah jadi
+def _save(base, terms, vectors):
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    pid = os.getpid()
+    with open(f'{base}.{pid}.npy', 'wb') as f:
+        np.save(f, vectors)
+    with open(f'{base}.{pid}.json', 'w') as f:
+        json.dump(terms, f)
+    os.replace(f'{base}.{pid}.npy', base + '.npy')
+    os.replace(f'{base}.{pid}.json', base + '.json')
+
+# Hapus embedding versi lama tabel yang sama (kolom sama, versi workbook lain) setelah versi baru
+# tersimpan. Tabel dengan kolom lain (sheet/workbook lain) tidak disentuh.
+def _remove_stale(base):
+    directory, current = os.path.split(base)
+    stale = re.compile(r'[0-9a-f]+_' + re.escape(current.rsplit('_', 1)[1]) + r'\.(npy|json)')
+    for filename in os.listdir(directory):
+        if stale.fullmatch(filename) and not filename.startswith(current + '.'):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+
+###########################
+### PER-DATAFRAME CACHE ###
+###########################
+
+_EMBEDDINGS = FrameCache(EmbeddingIndex, name='embedding_index')
+
+# Index untuk tabel ini, dibangun (blocking) jika belum ada
+def get_embedding_index(df):
+    return _EMBEDDINGS.get(df)
+
+# Mulai membangun index di background thread, satu kali per tabel (seperti prewarm_qa_model).
+# Error (misal disk penuh) dicatat di log dan metrik chatbot_embedding_build_errors_total.
+def _start_build(df):
+    def build():
+        try:
+            _EMBEDDINGS.get(df)
+        except Exception:
+            inc('chatbot_embedding_build_errors_total')
+            _LOG.exception("Embedding untuk pencarian fuzzy gagal dibangun, dicoba lagi pada pencarian berikutnya")
+
+    thread = threading.Thread(target=build, name='embedding-prewarm', daemon=True)
+    thread.start()
+    return thread
+
+_BUILDS = FrameCache(_start_build)
+
+def prewarm_embedding_index(df):
+    thread = _BUILDS.get(df)
+    if not thread.is_alive() and _EMBEDDINGS.peek(df) is None:
+        # Build sebelumnya gagal: mulai lagi, supaya pencarian fuzzy tidak mati untuk tabel ini
+        _BUILDS.invalidate(df)
+        thread = _BUILDS.get(df)
+    return thread
+
+# Index yang sudah siap untuk tabel ini, atau None (pembangunan di background dimulai jika belum)
+def ready_embedding_index(df):
+    index = _EMBEDDINGS.peek(df)
+    if index is None:
+        prewarm_embedding_index(df)
+    return index
+
+
+# Hitung embedding workbook secara offline (sebelum server/Streamlit dijalankan):
+#   python embedding_index.py --build
+# atau ukur latency query pada tabel sintetis:
+#   python embedding_index.py --rows 1000000
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Embedding kosakata untuk pencarian fuzzy: build offline atau benchmark.")
+    parser.add_argument('--build', action='store_true', help="hitung dan simpan embedding semua workbook")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.build:
+        from Ask_me_ import DATASET_SOURCES, _load_table
+
+        for name in DATASET_SOURCES:
+            start = time.perf_counter()
+            index = get_embedding_index(_load_table(name))
+            print(f"{name:13} {len(index.terms):8} term  {index.vectors.nbytes / 2**20:6.1f} MB  "
+                  f"{time.perf_counter() - start:.2f} s")
+    else:
+        from compact_frames import compact_frame
+        from pembangkit_rollup import coerce_pembangkit_numeric
+        from synthetic_data import make_mitigasi, make_pembangkit, make_pht
+
+        tables = {
+            'pht': compact_frame(make_pht(args.rows)),
+            'mitigasi': compact_frame(make_mitigasi(args.rows)),
+            'pembangkitan': compact_frame(coerce_pembangkit_numeric(make_pembangkit(args.rows))),
+        }
+        typos = ['cirta', 'saguling', 'gitet tasik', 'bekas', 'pltuu', 'derating']
+        for name, table in tables.items():
+            start = time.perf_counter()
+            index = EmbeddingIndex(table)
+            build = time.perf_counter() - start
+            timings = []
+            for _ in range(args.repeat):
+                for keyword in typos:
+                    start = time.perf_counter()
+                    index.similar_terms(keyword)
+                    timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"{name:13} {len(table):8} baris {len(index.terms):7} term  build {build:6.2f} s  "
+                  f"query p50 {timings[len(timings) // 2] * 1000:6.2f} ms  p95 {timings[int(len(timings) * 0.95)] * 1000:6.2f} ms")
+            for keyword in typos[:3]:
+                print(f"    {keyword!r} -> {index.similar_terms(keyword, top_k=3)}")
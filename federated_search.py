@@ -0,0 +1,180 @@
+import argparse
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import inc, observe, register_collector
+
+# Pencarian gabungan ke beberapa dataset sekaligus. Setiap dataset (sumber) didaftarkan sekali
+# dengan fungsi pencariannya; pencarian dijalankan bersamaan di thread pool terbatas dan hasil
+# dikembalikan sesuai urutan selesai, sehingga tab yang sudah siap bisa langsung ditampilkan.
+# Setiap sumber punya batas waktu sendiri: sumber yang lambat dilaporkan 'timeout' tanpa menahan yang lain.
+#
+#   CHATBOT_SEARCH_WORKERS  jumlah thread pencarian per proses (default 4)
+#   CHATBOT_SEARCH_TIMEOUT  batas waktu default per sumber dalam detik (default 10)
+SEARCH_WORKERS = int(os.environ.get('CHATBOT_SEARCH_WORKERS', '4'))
+SEARCH_TIMEOUT = float(os.environ.get('CHATBOT_SEARCH_TIMEOUT', '10'))
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+_SOURCES = {}
+_COUNTS = defaultdict(int)
+
+
+################
+### REGISTRY ###
+################
+
+# Satu dataset yang bisa dicari: search(keyword, **options) -> hasil (bebas, misal daftar halaman)
+class SearchSource:
+    def __init__(self, name, label, search, timeout=None, caption=None):
+        self.name = name
+        self.label = label
+        self.search = search
+        self.timeout = timeout
+        self.caption = caption
+
+# Daftarkan (atau ganti) sumber pencarian. Urutan pendaftaran = urutan tab di UI.
+def register_source(name, label, search, timeout=None, caption=None):
+    _SOURCES[name] = SearchSource(name, label, search, timeout, caption)
+    return _SOURCES[name]
+
+def unregister_source(name):
+    _SOURCES.pop(name, None)
+
+def search_sources():
+    return list(_SOURCES.values())
+
+
+###############
+### RUNNING ###
+###############
+
+# Hasil satu sumber: status 'ok', 'timeout' atau 'error'
+class SourceResult:
+    def __init__(self, name, status, value=None, error=None, seconds=None):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.status == 'ok'
+
+def _executor():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='federated-search')
+    return _EXECUTOR
+
+def _record(result):
+    _COUNTS[(result.name, result.status)] += 1
+    inc('chatbot_federated_results_total', source=result.name, status=result.status)
+    if result.seconds is not None:
+        observe('chatbot_federated_seconds', result.seconds, source=result.name)
+    return result
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+# Jalankan pekerjaan {nama: fungsi tanpa argumen} bersamaan dan hasilkan SourceResult sesuai urutan
+# selesai. timeouts[nama] (detik, dihitung sejak pengiriman) menggantikan default_timeout.
+# Pekerjaan yang timeout tetap selesai di background (thread tidak bisa dihentikan paksa);
+# hasilnya tetap mengisi cache hasil query untuk permintaan berikutnya.
+def run_each(jobs, timeouts=None, default_timeout=None):
+    timeouts = timeouts or {}
+    default_timeout = SEARCH_TIMEOUT if default_timeout is None else default_timeout
+    start = time.monotonic()
+    pending = {}
+    for name, fn in jobs.items():
+        # Salin context supaya stage di thread pencarian ikut tercatat di trace query pemanggil
+        future = _executor().submit(contextvars.copy_context().run, _timed, fn)
+        pending[future] = (name, start + timeouts.get(name, default_timeout))
+
+    while pending:
+        next_deadline = min(deadline for _, deadline in pending.values())
+        done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in done:
+            name, _ = pending.pop(future)
+            try:
+                value, seconds = future.result()
+            except Exception as exc:
+                yield _record(SourceResult(name, 'error', error=f"{type(exc).__name__}: {exc}"))
+            else:
+                yield _record(SourceResult(name, 'ok', value=value, seconds=seconds))
+        now = time.monotonic()
+        for future, (name, deadline) in list(pending.items()):
+            if deadline <= now and not future.done():
+                del pending[future]
+                yield _record(SourceResult(name, 'timeout', seconds=now - start))
+
+# Cari keyword di semua sumber terdaftar (atau `names`), hasil sesuai urutan selesai.
+# options diteruskan ke semua sumber, per_source[nama] menambah/mengganti options untuk satu sumber.
+def federated_search(keyword, names=None, per_source=None, **options):
+    per_source = per_source or {}
+    sources = [_SOURCES[name] for name in names] if names is not None else search_sources()
+    jobs = {source.name: (lambda source=source: source.search(keyword, **dict(options, **per_source.get(source.name, {}))))
+            for source in sources}
+    timeouts = {source.name: source.timeout for source in sources if source.timeout is not None}
+    return run_each(jobs, timeouts)
+
+# Kumpulkan semua hasil menjadi {nama: SourceResult} (untuk pemanggil yang tidak butuh progresif)
+def gather(results):
+    return {result.name: result for result in results}
+
+def federated_stats():
+    stats = {'workers': SEARCH_WORKERS, 'timeout_seconds': SEARCH_TIMEOUT, 'sources': len(_SOURCES)}
+    for (name, status), count in sorted(_COUNTS.items()):
+        stats[f'{name}_{status}'] = count
+    return stats
+
+register_collector('federated_search', federated_stats)
+
+
+# Bandingkan pencarian berurutan dengan pencarian gabungan pada tabel sintetis, misal:
+#   python federated_search.py --rows 100000
+if __name__ == '__main__':
+    from Ask_me_ import get_response_page
+    from compact_frames import compact_frame
+    from pembangkit_rollup import coerce_pembangkit_numeric
+    from synthetic_data import make_mitigasi, make_pembangkit, make_pht
+
+    parser = argparse.ArgumentParser(description="Latency pencarian tiga dataset: berurutan vs bersamaan.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--pages', type=int, default=4)
+    args = parser.parse_args()
+
+    tables = {
+        'pht': compact_frame(make_pht(args.rows)),
+        'mitigasi': compact_frame(make_mitigasi(args.rows)),
+        'pembangkitan': compact_frame(coerce_pembangkit_numeric(make_pembangkit(args.rows))),
+    }
+
+    def job(name, keyword):
+        return lambda: [get_response_page(name, tables[name], keyword, page) for page in range(args.pages)]
+
+    for keyword in ['gitet', 'cirata', 'pltu', 'jawa']:
+        # Index dibangun dulu supaya kedua cara diukur dalam kondisi yang sama
+        for name in tables:
+            job(name, keyword)()
+        start = time.perf_counter()
+        for name in tables:
+            job(name, keyword)()
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first = None
+        for result in run_each({name: job(name, keyword) for name in tables}):
+            first = first or time.perf_counter() - start
+        concurrent = time.perf_counter() - start
+        print(f"{keyword!r:10} berurutan {sequential * 1000:8.1f} ms  bersamaan {concurrent * 1000:8.1f} ms "
+              f"(tab pertama {first * 1000:6.1f} ms)")
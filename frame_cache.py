@@ -0,0 +1,63 @@
+import threading
+import weakref
+
+# Cache bernama, supaya isinya bisa disimpan/dipasang ulang dari luar modul pemiliknya
+# (misal startup bundle, lihat startup_bundle.py)
+_NAMED = {}
+
+
+# Cache struktur turunan (index, rollup, dll.) per objek DataFrame.
+# DataFrame tidak hashable, jadi key-nya id(df) + weakref untuk memastikan objeknya masih sama;
+# entry otomatis dibuang saat DataFrame di-garbage-collect.
+class FrameCache:
+    def __init__(self, build, name=None):
+        self._build = build
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.name = name
+        if name is not None:
+            _NAMED[name] = self
+
+    def _forget(self, key):
+        def callback(_ref):
+            self._entries.pop(key, None)
+        return callback
+
+    def _lookup(self, df):
+        entry = self._entries.get(id(df))
+        if entry is not None and entry[0]() is df and entry[2] == len(df):
+            return entry[1]
+        return None
+
+    # Ambil struktur turunan untuk DataFrame ini, bangun satu kali jika belum ada
+    def get(self, df):
+        value = self._lookup(df)
+        if value is not None:
+            return value
+        with self._lock:
+            value = self._lookup(df)
+            if value is None:
+                value = self._build(df)
+                self.put(df, value)
+            return value
+
+    # Struktur yang sudah ada untuk DataFrame ini, tanpa membangun (None jika belum ada)
+    def peek(self, df):
+        return self._lookup(df)
+
+    # Simpan struktur yang sudah dibangun di luar (misal hasil update inkremental)
+    def put(self, df, value):
+        key = id(df)
+        self._entries[key] = (weakref.ref(df, self._forget(key)), value, len(df))
+
+    # Semua struktur yang DataFrame-nya masih hidup
+    def values(self):
+        return [entry[1] for entry in list(self._entries.values()) if entry[0]() is not None]
+
+    def invalidate(self, df):
+        self._entries.pop(id(df), None)
+
+
+# FrameCache dengan nama tertentu, atau None jika modul pemiliknya belum diimpor
+def frame_cache(name):
+    return _NAMED.get(name)
@@ -0,0 +1,366 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from multiprocessing import forkserver
+
+from metrics import inc, observe, register_collector
+from qa_registry import get_qa_model, load_qa_model_spec, qa_model_spec, use_qa_model
+
+# Pool proses untuk inferensi model QA. Worker dibuat lewat forkserver, bukan fork dari proses ini:
+# pool dimulai di background saat proses sudah menjalankan banyak thread (Streamlit, pencarian) dan
+# fork pada kondisi itu bisa mewarisi lock yang sedang dipegang. Model dimuat satu kali di proses
+# forkserver sebelum worker pertama dibuat; worker di-fork dari sana sehingga bobot model dipakai
+# bersama (copy-on-write, halaman tensor tidak pernah ditulis) dan proses ini tidak memuat model.
+# Pertanyaan yang datang bersamaan dikumpulkan dalam jendela waktu kecil dan dikirim ke worker
+# sebagai satu batch pipeline; inferensi berjalan paralel di beberapa core tanpa GIL bersama.
+#
+#   CHATBOT_INFERENCE_WORKERS   jumlah proses worker (0 = tanpa pool, model dipanggil di proses ini);
+#                               jika > 0 pool dimulai di background saat startup (prewarm_inference_pool)
+#   CHATBOT_INFERENCE_BATCH_MS  jendela pengumpulan batch setelah request pertama (ms, default 5)
+#   CHATBOT_INFERENCE_MAX_BATCH ukuran batch maksimum (default 8)
+INFERENCE_WORKERS = int(os.environ.get('CHATBOT_INFERENCE_WORKERS', '0'))
+BATCH_WINDOW = float(os.environ.get('CHATBOT_INFERENCE_BATCH_MS', '5')) / 1000
+MAX_BATCH = int(os.environ.get('CHATBOT_INFERENCE_MAX_BATCH', '8'))
+
+# Konfigurasi model (JSON) untuk proses forkserver, dibaca saat modul ini di-preload di sana
+_PRELOAD_ENV = 'CHATBOT_INFERENCE_PRELOAD'
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_PREWARM_THREAD = None
+_PREWARM_LOCK = threading.Lock()
+_START_ERROR = None
+_LOG = logging.getLogger(__name__)
+
+
+######################
+### WORKER PROCESS ###
+######################
+
+# Start method worker. Untuk model dari Hub/direktori, forkserver dijalankan dengan preload modul ini
+# dan konfigurasi model di _PRELOAD_ENV, sehingga model dimuat di proses server (satu kali, tanpa
+# inferensi, jadi belum ada thread OpenMP) sebelum worker di-fork. Jika forkserver sudah berjalan
+# tanpa preload, atau platform hanya punya spawn, worker memuat model sendiri saat batch pertama.
+def _mp_context(config, custom):
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    if custom is None:
+        context.set_forkserver_preload(['inference_pool'])
+        os.environ[_PRELOAD_ENV] = json.dumps(config)
+        try:
+            forkserver.ensure_running()
+        finally:
+            os.environ.pop(_PRELOAD_ENV, None)
+    return context
+
+# Dijalankan sekali per worker: pipeline custom (misal stub benchmark, kecil) dipasang apa adanya,
+# model asli sudah ada dari forkserver. Thread torch dibagi rata antar worker supaya total thread
+# tidak melebihi jumlah core.
+def _init_worker(threads, custom, model_id):
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    if custom is not None:
+        use_qa_model(custom, model_id)
+    torch = sys.modules.get('torch')
+    if torch is not None and threads:
+        torch.set_num_threads(threads)
+
+def _worker_pid():
+    return os.getpid()
+
+# Satu batch di worker: pipeline dari forkserver (atau _init_worker) dipanggil dengan daftar pertanyaan
+def _answer_batch(questions, contexts):
+    start = time.perf_counter()
+    results = get_qa_model()(question=questions, context=contexts, batch_size=len(questions))
+    if isinstance(results, dict):
+        results = [results]
+    return results, time.perf_counter() - start
+
+
+############
+### POOL ###
+############
+
+class _Request:
+    def __init__(self, question, context):
+        self.question = question
+        self.context = context
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+# Pool worker dengan micro-batching. submit() memasukkan request ke antrian; thread dispatcher
+# mengambil request saat ada worker kosong, menunggu paling lama `batch_window` detik untuk
+# request berikutnya (maks `max_batch`), lalu mengirim batch ke worker. Selama semua worker
+# sibuk, request menumpuk di antrian dan otomatis terkumpul menjadi batch yang lebih besar.
+class InferencePool:
+    def __init__(self, workers, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, threads_per_worker=None):
+        self.workers = workers
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers)
+        self._executor = None
+        self._dispatcher = None
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.counters = {'requests': 0, 'batches': 0, 'errors': 0, 'max_batch_seen': 0, 'in_flight': 0}
+        self._latencies = deque(maxlen=1000)
+        self._waits = deque(maxlen=1000)
+        self.pids = []
+
+    # Mulai semua worker dan tunggu sampai semuanya berjalan. Model dimuat di forkserver, bukan di
+    # proses ini. Aman dipanggil dari proses yang sudah menjalankan thread lain (lihat _mp_context).
+    def start(self):
+        config, custom = qa_model_spec()
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=_mp_context(config, custom),
+                                             initializer=_init_worker,
+                                             initargs=(self.threads_per_worker, custom, config['model']))
+        # Worker dibuat per submit selama belum ada yang menganggur: semua submit dikirim sekaligus
+        self.pids = sorted({future.result() for future in
+                            [self._executor.submit(_worker_pid) for _ in range(self.workers)]})
+        self._dispatcher = threading.Thread(target=self._dispatch, name='inference-dispatch', daemon=True)
+        self._dispatcher.start()
+        return self
+
+    def submit(self, question, context):
+        if self._closed:
+            raise RuntimeError("Inference pool sudah ditutup.")
+        request = _Request(question, context)
+        self._queue.put(request)
+        return request.future
+
+    # Jawaban satu pertanyaan (dict hasil pipeline: answer, score, start, end)
+    def answer(self, question, context, timeout=None):
+        return self.submit(question, context).result(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Sentinel dikembalikan supaya loop dispatcher berhenti setelah batch ini
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            if batch is None:
+                self._slots.release()
+                return
+            sent = time.perf_counter()
+            with self._stats_lock:
+                self.counters['in_flight'] += 1
+            try:
+                future = self._executor.submit(_answer_batch, [r.question for r in batch], [r.context for r in batch])
+            except Exception as exc:
+                self._finish(batch, sent, None, exc)
+                continue
+            future.add_done_callback(lambda done, batch=batch, sent=sent: self._finish(batch, sent, done))
+
+    def _finish(self, batch, sent, done, error=None):
+        self._slots.release()
+        if error is None:
+            error = CancelledError() if done.cancelled() else done.exception()
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self.counters['in_flight'] -= 1
+            self.counters['batches'] += 1
+            self.counters['requests'] += len(batch)
+            self.counters['max_batch_seen'] = max(self.counters['max_batch_seen'], len(batch))
+            if error is not None:
+                self.counters['errors'] += len(batch)
+            for request in batch:
+                self._latencies.append(finished - request.enqueued)
+                self._waits.append(sent - request.enqueued)
+        inc('chatbot_inference_batches_total')
+        inc('chatbot_inference_requests_total', len(batch))
+        for request in batch:
+            observe('chatbot_inference_seconds', sent - request.enqueued, phase='queue')
+            observe('chatbot_inference_seconds', finished - request.enqueued, phase='total')
+
+        if error is not None:
+            for request in batch:
+                request.future.set_exception(error)
+            return
+        results, _ = done.result()
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._stats_lock:
+            counts = dict(self.counters)
+            latencies = sorted(self._latencies)
+            waits = sorted(self._waits)
+
+        def percentile(values, q):
+            return 1000 * values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else None
+
+        return dict(
+            counts,
+            workers=self.workers,
+            threads_per_worker=self.threads_per_worker,
+            batch_window_ms=self.batch_window * 1000,
+            max_batch=self.max_batch,
+            queue_depth=self._queue.qsize(),
+            mean_batch_size=counts['requests'] / counts['batches'] if counts['batches'] else None,
+            latency_p50_ms=percentile(latencies, 0.50),
+            latency_p95_ms=percentile(latencies, 0.95),
+            queue_wait_p50_ms=percentile(waits, 0.50),
+            queue_wait_p95_ms=percentile(waits, 0.95),
+        )
+
+
+####################
+### PROCESS-WIDE ###
+####################
+
+# Mulai satu pool per proses (blocking), atau kembalikan pool yang sudah berjalan.
+# workers None = CHATBOT_INFERENCE_WORKERS; workers <= 0: tanpa pool (None).
+def start_inference_pool(workers=None, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, threads_per_worker=None):
+    global _POOL
+    workers = INFERENCE_WORKERS if workers is None else workers
+    if _POOL is not None or workers <= 0:
+        return _POOL
+    with _POOL_LOCK:
+        if _POOL is None and workers > 0:
+            _POOL = InferencePool(workers, batch_window, max_batch, threads_per_worker).start()
+    return _POOL
+
+# Mulai pool di background thread (seperti prewarm_qa_model) supaya startup dan request pertama tidak
+# menunggu worker. Jika start gagal, error dicatat (lihat inference_pool_stats) dan tidak dicoba lagi
+# sampai stop_inference_pool(); jawaban tetap dihitung model di proses ini.
+def prewarm_inference_pool(workers=None):
+    global _PREWARM_THREAD
+    workers = INFERENCE_WORKERS if workers is None else workers
+    if _POOL is not None or workers <= 0 or _START_ERROR is not None:
+        return None
+    with _PREWARM_LOCK:
+        if _PREWARM_THREAD is not None and _PREWARM_THREAD.is_alive():
+            return _PREWARM_THREAD
+
+        def warm():
+            global _START_ERROR
+            try:
+                start_inference_pool(workers)
+            except Exception as exc:
+                _START_ERROR = exc
+                _LOG.exception("Inference pool gagal dimulai, model dipanggil di proses ini")
+
+        _PREWARM_THREAD = threading.Thread(target=warm, name='inference-pool-prewarm', daemon=True)
+        _PREWARM_THREAD.start()
+        return _PREWARM_THREAD
+
+# Pool yang sudah siap, atau None selama pool belum dikonfigurasi/masih dimulai di background
+# (pemanggil memakai model di proses ini). Memulai prewarm jika belum berjalan.
+def ready_inference_pool():
+    if _POOL is None:
+        prewarm_inference_pool()
+    return _POOL
+
+def get_inference_pool():
+    return _POOL
+
+def stop_inference_pool():
+    global _POOL, _START_ERROR
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+            _POOL = None
+        _START_ERROR = None
+
+def inference_pool_stats():
+    if _POOL is not None:
+        return _POOL.stats()
+    return {'workers': 0, 'starting': int(_PREWARM_THREAD is not None and _PREWARM_THREAD.is_alive()),
+            'start_error': repr(_START_ERROR) if _START_ERROR is not None else None}
+
+register_collector('inference_pool', inference_pool_stats)
+
+# Di proses forkserver (lihat _mp_context): muat model QA saat modul ini di-preload, sebelum worker
+# di-fork. Error tidak boleh mematikan forkserver; worker lalu memuat model sendiri.
+if os.environ.get(_PRELOAD_ENV):
+    try:
+        load_qa_model_spec(json.loads(os.environ.pop(_PRELOAD_ENV)))
+    except Exception:
+        _LOG.exception("Model QA gagal dimuat di forkserver")
+
+
+# Bandingkan throughput model di proses ini (thread) dengan pool worker, misal:
+#   python inference_pool.py --workers 4 --clients 16
+# Default memakai stub pipeline (tanpa jaringan/torch); --model real memuat model QA asli.
+if __name__ == '__main__':
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    import qa_registry
+    from benchmark import QA_QUESTIONS, StubQAPipeline
+    from synthetic_data import make_pht
+    from response_render import render_pht_responses
+    from search_index import case_rows
+
+    parser = argparse.ArgumentParser(description="Throughput QA: satu proses vs pool worker dengan micro-batching.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--clients', type=int, default=16, help="jumlah request bersamaan")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--batch-ms', type=float, default=BATCH_WINDOW * 1000)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--model', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--stub-ms', type=float, default=20.0, help="biaya CPU stub per pertanyaan (memegang GIL)")
+    args = parser.parse_args()
+
+    # Stub dengan biaya CPU per pertanyaan seperti forward pass model (ms, bukan mikrodetik)
+    if args.model == 'stub':
+        qa_registry.use_qa_model(StubQAPipeline(cost_ms=args.stub_ms), model_id='stub')
+    model = get_qa_model()
+
+    # Konteks seukuran hasil penyempitan (top-k baris PHT)
+    rows = case_rows(make_pht(2_000))
+    _, contexts = render_pht_responses(rows, 'gitet')
+    lines = contexts.split('\n')
+    work = [(QA_QUESTIONS[i % len(QA_QUESTIONS)], "\n".join(lines[i % 200:i % 200 + 5]))
+            for i in range(args.requests)]
+
+    def run(answer):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as clients:
+            answers = list(clients.map(lambda item: answer(*item)['answer'], work))
+        return time.perf_counter() - start, answers
+
+    pool = InferencePool(args.workers, args.batch_ms / 1000, args.max_batch).start()
+    pooled, pooled_answers = run(pool.answer)
+    single, single_answers = run(lambda question, context: model(question=question, context=context))
+    assert pooled_answers == single_answers
+
+    print(f"satu proses  {args.requests / single:8.1f} jawaban/detik")
+    print(f"pool {args.workers:2} worker {args.requests / pooled:8.1f} jawaban/detik ({single / pooled:.2f}x)")
+    print(json.dumps(pool.stats(), indent=2))
+    pool.close()
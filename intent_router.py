@@ -0,0 +1,58 @@
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Sinonim untuk setiap intent chat. Urutan intent = prioritas jika beberapa frasa cocok persis;
+# frasa pertama di setiap intent adalah frasa asli yang tercantum di panduan sintaks.
+INTENT_SYNONYMS = (
+    ('total_pht', ('total pht', 'total panjang pht', 'total panjang penghantar', 'panjang total pht')),
+    ('derating', ('derating', 'penurunan kemampuan', 'kemampuan turun')),
+    ('wilayah_pht', ('wilayah pht', 'daftar wilayah', 'wilayah upt', 'region pht')),
+    ('daftar_penghantar', ('daftar penghantar pht', 'daftar penghantar', 'list penghantar', 'semua penghantar')),
+    ('jumlah_penghantar', ('jumlah penghantar', 'banyak penghantar', 'berapa penghantar', 'total penghantar')),
+    ('arus_terbesar', ('arus terbesar', 'arus tertinggi', 'arus paling besar', 'arus maksimum', 'arus maksimal')),
+    ('detail_penghantar', ('detail penghantar', 'rincian penghantar', 'info penghantar', 'informasi penghantar')),
+    ('penghantar_gitet', ('penghantar di gitet', 'terhubung ke gitet', 'sirkit di gitet', 'penghantar gitet')),
+    ('jalur_penghantar', ('jalur penghantar', 'jalur antara', 'rute penghantar', 'jalur dari gitet')),
+)
+
+# Skor minimum (0..1, difflib ratio) agar frasa yang salah ketik tetap dikenali
+FUZZY_THRESHOLD = 0.82
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def _tokens(text):
+    return _TOKEN_RE.findall(text.lower())
+
+# Skor kemiripan terbaik antara frasa dan potongan pertanyaan dengan jumlah kata yang sama
+def _fuzzy_score(question_tokens, phrase):
+    phrase_tokens = phrase.split()
+    width = len(phrase_tokens)
+    if len(question_tokens) < width:
+        return 0.0
+    best = 0.0
+    for start in range(len(question_tokens) - width + 1):
+        window = " ".join(question_tokens[start:start + width])
+        best = max(best, SequenceMatcher(None, window, phrase).ratio())
+    return best
+
+# Tentukan intent pertanyaan: (intent, skor). Frasa yang muncul persis menang dengan skor 1.0
+# (mengikuti prioritas), jika tidak dipakai kecocokan fuzzy terbaik di atas FUZZY_THRESHOLD.
+# Hasil di-cache per pertanyaan karena operator sering mengulang pertanyaan yang sama.
+@lru_cache(maxsize=4096)
+def route(question):
+    normalized = " ".join(_tokens(question))
+    for intent, phrases in INTENT_SYNONYMS:
+        if any(phrase in normalized for phrase in phrases):
+            return intent, 1.0
+
+    question_tokens = normalized.split()
+    best_intent, best_score = None, 0.0
+    for intent, phrases in INTENT_SYNONYMS:
+        for phrase in phrases:
+            score = _fuzzy_score(question_tokens, phrase)
+            if score > best_score:
+                best_intent, best_score = intent, score
+    if best_score >= FUZZY_THRESHOLD:
+        return best_intent, best_score
+    return None, best_score
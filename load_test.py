@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+
+# Load test sederhana untuk query_service.py (asyncio, koneksi keep-alive), misal:
+#   python load_test.py --port 8502 --concurrency 32 --requests 2000 --endpoint search
+# Melaporkan latency p50/p99 dan request per detik.
+
+DEFAULT_KEYWORDS = ['cirata', 'bekasi', 'saguling', '500', 'pltu', 'gandul', 'paiton', 'jawa']
+
+
+def _payloads(endpoint, keywords):
+    if endpoint == 'search':
+        return ({'keyword': kw, 'dataset': 'all'} for kw in itertools.cycle(keywords))
+    if endpoint == 'intent':
+        questions = ['Berapa jumlah penghantar?', 'Penghantar dengan arus terbesar', 'Wilayah PHT mana saja?']
+        return ({'question': q} for q in itertools.cycle(questions))
+    if endpoint == 'answer':
+        return ({'question': f"Berapa panjang penghantar {kw}?", 'dataset': 'pht', 'keyword': kw}
+                for kw in itertools.cycle(keywords))
+    raise ValueError(f"Endpoint tidak dikenal: {endpoint}")
+
+
+async def _request(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, path, payloads, remaining, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                status = await _request(reader, writer, host, path, next(payloads))
+            except (ConnectionError, asyncio.IncompleteReadError):
+                statuses['connection-error'] += 1
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run(host, port, endpoint, concurrency, requests, keywords):
+    payloads = _payloads(endpoint, keywords)
+    remaining = [requests]
+    latencies, statuses = [], Counter()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_worker(host, port, f"/{endpoint}", payloads, remaining, latencies, statuses)
+                           for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed else None,
+        'p50_ms': 1000 * _percentile(ordered, 0.50) if ordered else None,
+        'p99_ms': 1000 * _percentile(ordered, 0.99) if ordered else None,
+        'max_ms': 1000 * ordered[-1] if ordered else None,
+        'statuses': {str(status): count for status, count in statuses.items()},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test untuk query_service.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--endpoint', choices=['search', 'intent', 'answer'], default='search')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--keywords', nargs='+', default=DEFAULT_KEYWORDS)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.host, args.port, args.endpoint, args.concurrency, args.requests, args.keywords))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,238 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Instrumentasi hot path: histogram latency per stage, jumlah baris yang diproses, statistik cache,
+# dan (opsional) log query lambat beserta rincian per stage. Diekspor dalam format teks Prometheus.
+#
+# Log query lambat aktif jika CHATBOT_SLOW_QUERY_MS diisi (misal 500); CHATBOT_SLOW_QUERY_SAMPLE
+# (0..1, default 1) menentukan fraksi query yang dilacak per stage.
+
+# Batas bucket histogram dalam detik
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_WINDOW = 1000
+SLOW_QUERY_LOG_SIZE = 100
+
+METRIC_HELP = {
+    'chatbot_stage_seconds': ('histogram', "Latency per stage pipeline (load, search, render, QA, UI)."),
+    'chatbot_query_seconds': ('histogram', "Latency end-to-end per jenis query."),
+    'chatbot_http_request_seconds': ('histogram', "Latency request query_service per endpoint."),
+    'chatbot_rows_processed_total': ('counter', "Jumlah baris yang diproses per stage."),
+    'chatbot_queries_total': ('counter', "Jumlah query per jenis."),
+    'chatbot_slow_queries_total': ('counter', "Jumlah query yang melewati batas query lambat."),
+    'chatbot_federated_seconds': ('histogram', "Latency pencarian per sumber di pencarian gabungan."),
+    'chatbot_federated_results_total': ('counter', "Hasil pencarian gabungan per sumber dan status (ok/timeout/error)."),
+    'chatbot_inference_seconds': ('histogram', "Latency inference pool per request (phase=queue: menunggu batch, total)."),
+    'chatbot_inference_batches_total': ('counter', "Jumlah batch yang dikirim ke worker inference pool."),
+    'chatbot_inference_requests_total': ('counter', "Jumlah pertanyaan yang dijawab inference pool."),
+}
+
+_SLOW_CONFIG = {
+    'threshold_ms': float(os.environ['CHATBOT_SLOW_QUERY_MS']) if os.environ.get('CHATBOT_SLOW_QUERY_MS') else None,
+    'sample_rate': float(os.environ.get('CHATBOT_SLOW_QUERY_SAMPLE', '1')),
+}
+
+_LOCK = threading.Lock()
+_HISTOGRAMS = {}
+_COUNTERS = defaultdict(int)
+_COLLECTORS = {}
+_SLOW_QUERIES = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+# Query yang sedang dilacak di thread/task ini (None jika tidak disampel)
+_CURRENT_TRACE = contextvars.ContextVar('chatbot_query_trace', default=None)
+
+
+##################
+### PRIMITIVES ###
+##################
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RECENT_WINDOW)
+
+    def observe(self, seconds):
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _LOCK:
+        histogram = _HISTOGRAMS.get(key)
+        if histogram is None:
+            histogram = _HISTOGRAMS[key] = Histogram()
+        histogram.observe(seconds)
+
+def inc(name, value=1, **labels):
+    with _LOCK:
+        _COUNTERS[_key(name, labels)] += value
+
+# Statistik dari modul lain (cache, model) yang ikut diekspor sebagai gauge: fn() -> dict angka
+def register_collector(name, fn):
+    _COLLECTORS[name] = fn
+
+
+##############
+### STAGES ###
+##############
+
+class StageTimer:
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.seconds = None
+
+# Ukur satu stage: with stage('search_pht') as timer: ...; timer.rows = len(hasil)
+@contextmanager
+def stage(name):
+    timer = StageTimer(name)
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        timer.seconds = time.perf_counter() - start
+        observe('chatbot_stage_seconds', timer.seconds, stage=name)
+        if timer.rows is not None:
+            inc('chatbot_rows_processed_total', timer.rows, stage=name)
+        trace = _CURRENT_TRACE.get()
+        if trace is not None:
+            trace['stages'].append({'stage': name, 'ms': 1000 * timer.seconds, 'rows': timer.rows})
+
+# Ukur satu query end-to-end. Jika log query lambat aktif dan query ini disampel, setiap stage
+# di dalamnya dicatat; query yang melewati batas disimpan beserta keyword dan rincian stage.
+# Query bersarang (misal pencarian dari UI yang memanggil builder) ikut trace query terluar.
+@contextmanager
+def query(kind, keyword=None):
+    threshold_ms = _SLOW_CONFIG['threshold_ms']
+    outer = _CURRENT_TRACE.get()
+    trace = token = None
+    if outer is None and threshold_ms is not None and random.random() < _SLOW_CONFIG['sample_rate']:
+        trace = {'kind': kind, 'keyword': keyword, 'stages': []}
+        token = _CURRENT_TRACE.set(trace)
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe('chatbot_query_seconds', seconds, kind=kind)
+        inc('chatbot_queries_total', kind=kind)
+        if token is not None:
+            _CURRENT_TRACE.reset(token)
+            if 1000 * seconds >= threshold_ms:
+                trace.update(ms=1000 * seconds, at=time.strftime('%Y-%m-%d %H:%M:%S'))
+                inc('chatbot_slow_queries_total', kind=kind)
+                with _LOCK:
+                    _SLOW_QUERIES.append(trace)
+
+
+#########################
+### SLOW QUERY LOGGER ###
+#########################
+
+# Aktifkan (threshold_ms angka) atau matikan (threshold_ms=None) log query lambat saat runtime
+def configure_slow_queries(threshold_ms=None, sample_rate=None):
+    _SLOW_CONFIG['threshold_ms'] = threshold_ms
+    if sample_rate is not None:
+        _SLOW_CONFIG['sample_rate'] = min(1.0, max(0.0, sample_rate))
+
+def slow_query_config():
+    return dict(_SLOW_CONFIG)
+
+# Query lambat terbaru dulu
+def slow_queries():
+    with _LOCK:
+        return list(reversed(_SLOW_QUERIES))
+
+
+###############
+### EXPORTS ###
+###############
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+# Ringkasan per stage untuk ditampilkan (count, mean, p50/p95 dari jendela terakhir, total baris)
+def stage_summary():
+    with _LOCK:
+        items = [(dict(labels)['stage'], histogram.count, histogram.sum, sorted(histogram.recent))
+                 for (name, labels), histogram in _HISTOGRAMS.items() if name == 'chatbot_stage_seconds']
+        rows = {dict(labels)['stage']: value for (name, labels), value in _COUNTERS.items()
+                if name == 'chatbot_rows_processed_total'}
+    return [{
+        'stage': stage_name,
+        'count': count,
+        'mean_ms': 1000 * total / count,
+        'p50_ms': 1000 * _percentile(recent, 0.50),
+        'p95_ms': 1000 * _percentile(recent, 0.95),
+        'rows': rows.get(stage_name),
+    } for stage_name, count, total, recent in sorted(items)]
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _header(lines, name, kind, help_text):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+# Semua metrik dalam format teks Prometheus (exposition format 0.0.4)
+def render_prometheus():
+    with _LOCK:
+        histograms = {key: (list(h.buckets), h.sum, h.count) for key, h in _HISTOGRAMS.items()}
+        counters = dict(_COUNTERS)
+
+    lines = []
+    for name in sorted({name for name, _ in histograms}):
+        _header(lines, name, *METRIC_HELP.get(name, ('histogram', name)))
+        for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS + (float('inf'),), buckets):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_labels_text(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {total}")
+            lines.append(f"{name}_count{_labels_text(labels)} {count}")
+
+    for name in sorted({name for name, _ in counters}):
+        _header(lines, name, *METRIC_HELP.get(name, ('counter', name)))
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_labels_text(labels)} {value:g}")
+
+    for collector, fn in sorted(_COLLECTORS.items()):
+        try:
+            values = fn()
+        except Exception:
+            continue
+        for field, value in sorted(values.items()):
+            if not isinstance(value, (int, float)):
+                continue
+            name = f"chatbot_{collector}_{field}"
+            _header(lines, name, 'gauge', f"{collector} {field}")
+            lines.append(f"{name} {float(value):g}")
+    return "\n".join(lines) + "\n"
+
+# Reset semua metrik (misal antar benchmark)
+def reset_metrics():
+    with _LOCK:
+        _HISTOGRAMS.clear()
+        _COUNTERS.clear()
+        _SLOW_QUERIES.clear()
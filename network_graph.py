@@ -0,0 +1,323 @@
+import argparse
+import heapq
+import re
+import time
+from difflib import get_close_matches
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+
+# Kolom Dari/Ke Gitet/Gistet di DataPHT membentuk graf jaringan transmisi: gardu induk sebagai node,
+# setiap baris (penghantar/sirkit) sebagai edge. Index graf dibangun satu kali per DataFrame sehingga
+# detail penghantar cukup melihat edge milik node yang dicari (O(degree)), bukan scan seluruh tabel,
+# dan query baru seperti penghantar per gitet atau jalur antar gitet menjadi murah.
+
+FROM_COLUMN = 'Dari Gitet/Gistet'
+TO_COLUMN = 'Ke Gitet/Gistet'
+CAPACITY_COLUMN = 'Kemampuan Penghantar (A)'
+DERATING_COLUMN = 'Keterangan Penyebab Derating'
+
+# Kolom ruas di tabel kontingensi (sheet Contingency) yang bisa dipetakan ke edge graf
+RUAS_COLUMNS = ('SUTET', 'N-1', 'N-1-1', 'N-1-2')
+
+# Skor minimum difflib untuk nama gardu yang salah ketik
+FUZZY_CUTOFF = 0.8
+
+# Kata yang tidak membedakan gardu (jenis gardu, tegangan, nomor sirkit) pada nama longgar
+_NOISE_RE = re.compile(r'\b(?:sutet|sutt|gitet|gistet|gis|gi|\d+\s*kv|kv)\b|#\s*\d+')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+#######################
+### NAME NORMALIZER ###
+#######################
+
+# Identitas node: huruf kecil dan spasi dirapikan (ejaan huruf besar/kecil yang berbeda = node yang sama)
+def name_key(name):
+    return " ".join(str(name).lower().split())
+
+# Nama longgar untuk fuzzy lookup: tanpa jenis gardu, tegangan, nomor sirkit dan tanda baca
+def loose_key(name):
+    return " ".join(_NON_ALNUM_RE.sub(' ', _NOISE_RE.sub(' ', name_key(name))).split())
+
+
+#############
+### GRAPH ###
+#############
+
+# Graf jaringan transmisi untuk satu versi DataPHT. Edge i adalah baris ke-i tabel (posisi iloc),
+# dengan endpoint src/dst (-1 jika nama kosong), kapasitas deklarasi dan status derating.
+# Adjacency disimpan dalam bentuk CSR: edge milik node n = adjacency[offsets[n]:offsets[n + 1]].
+class NetworkGraph:
+    def __init__(self, df):
+        # Nama dinormalisasi per nilai unik (jumlah gardu jauh lebih kecil dari jumlah baris)
+        all_names = pd.concat([df[FROM_COLUMN], df[TO_COLUMN]], ignore_index=True)
+        codes, uniques = pd.factorize(all_names)
+        unique_keys = np.array([name_key(v) if isinstance(v, str) and v.strip() else None for v in uniques],
+                               dtype=object)
+
+        # Node urut kemunculan; nama tampilan = ejaan pertama yang ditemukan
+        node_codes, first = pd.factorize(pd.Series(unique_keys))
+        valid = node_codes >= 0
+        self.keys = first.tolist()
+        self.names = [None] * len(self.keys)
+        for value, node in zip(reversed(uniques[valid].tolist()), reversed(node_codes[valid].tolist())):
+            self.names[node] = value.strip()
+        ends = np.where(codes >= 0, node_codes[codes], -1).astype(np.intp)
+        self.src, self.dst = ends[:len(df)], ends[len(df):]
+
+        self.capacity = pd.to_numeric(df[CAPACITY_COLUMN], errors='coerce').to_numpy(dtype=float) \
+            if CAPACITY_COLUMN in df.columns else np.full(len(df), np.nan)
+        self.derating = df[DERATING_COLUMN].notna().to_numpy() \
+            if DERATING_COLUMN in df.columns else np.zeros(len(df), dtype=bool)
+
+        # CSR adjacency; self-loop hanya dicatat satu kali
+        edge_ids = np.arange(len(df), dtype=np.intp)
+        owners = np.concatenate([edge_ids, edge_ids])
+        keep = ends >= 0
+        keep[len(df):] &= self.dst != self.src
+        ends, owners = ends[keep], owners[keep]
+        order = np.argsort(ends, kind='stable')
+        self.adjacency = owners[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(ends, minlength=len(self.keys)))]).astype(np.intp)
+
+        self._node_ids = {key: node for node, key in enumerate(self.keys)}
+        self._loose = {}
+        for node, key in enumerate(self.keys):
+            self._loose.setdefault(loose_key(key), []).append(node)
+        self._links = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def n_edges(self):
+        return len(self.src)
+
+    def degree(self, node):
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+    def edges_of(self, node):
+        return self.adjacency[self.offsets[node]:self.offsets[node + 1]]
+
+    # Semua node yang namanya mengandung `name` (case-insensitive, seperti str.contains sebelumnya).
+    # Jika tidak ada, pakai nama longgar: sama persis, lalu ejaan terdekat (fuzzy).
+    def find_nodes(self, name):
+        return self.match_nodes(name)[0]
+
+    # Seperti find_nodes, ditambah nama gardu yang akhirnya dipakai jika hasilnya dari nama longgar/fuzzy
+    # (None jika `name` memang terkandung di nama gardu): (nodes, nama yang dipakai)
+    def match_nodes(self, name):
+        needle = name_key(name)
+        if not needle:
+            return [], None
+        nodes = [node for node, key in enumerate(self.keys) if needle in key]
+        if nodes:
+            return nodes, None
+        nodes = self._fuzzy_nodes(name)
+        return nodes, ", ".join(self.names[node] for node in nodes) if nodes else None
+
+    def _fuzzy_nodes(self, name):
+        loose = loose_key(name)
+        if not loose:
+            return []
+        if loose in self._loose:
+            return list(self._loose[loose])
+        close = get_close_matches(loose, list(self._loose), n=1, cutoff=FUZZY_CUTOFF)
+        return list(self._loose[close[0]]) if close else []
+
+    # Satu node untuk `name` (untuk jalur dan ruas): nama persis, nama longgar persis, lalu
+    # kandidat substring/fuzzy dengan nama terpendek (paling dekat dengan yang diketik). None jika tidak ada.
+    def resolve(self, name):
+        node = self._node_ids.get(name_key(name))
+        if node is not None:
+            return node
+        loose = self._loose.get(loose_key(name))
+        if loose:
+            return loose[0]
+        nodes = self.find_nodes(name)
+        return min(nodes, key=lambda n: (len(self.keys[n]), n)) if nodes else None
+
+    def _touching(self, nodes):
+        if not nodes:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate([self.edges_of(node) for node in nodes]))
+
+    # Posisi baris penghantar dari gitet1 ke gitet2 (arah Dari -> Ke seperti tabel), urut asli tabel
+    def detail_positions(self, gitet1, gitet2):
+        origins = self.find_nodes(gitet1)
+        targets = self.find_nodes(gitet2)
+        if not origins or not targets:
+            return np.empty(0, dtype=np.intp)
+        # Mulai dari sisi dengan degree terkecil
+        if sum(map(self.degree, targets)) < sum(map(self.degree, origins)):
+            edges = self._touching(targets)
+        else:
+            edges = self._touching(origins)
+        keep = np.isin(self.src[edges], origins) & np.isin(self.dst[edges], targets)
+        return edges[keep]
+
+    # Posisi baris semua penghantar yang terhubung ke gitet (sebagai Dari atau Ke), urut asli tabel
+    def circuit_positions(self, gitet):
+        return self._touching(self.find_nodes(gitet))
+
+    # Posisi baris penghantar antara dua node (kedua arah)
+    def between(self, a, b):
+        edges = self.edges_of(a)
+        other = np.where(self.src[edges] == a, self.dst[edges], self.src[edges])
+        return edges[other == b]
+
+    # Jalur antara dua gitet yang kemampuan terkecilnya (bottleneck) paling besar, lewat Dijkstra
+    # versi widest-path di atas adjacency; jika bottleneck sama, jalur dengan ruas paling sedikit.
+    # Penghantar tanpa kapasitas deklarasi dilewati.
+    # Mengembalikan dict (nodes, edges, bottleneck_a, bottleneck_edge) atau None jika tidak terhubung.
+    def widest_path(self, origin, target):
+        start, goal = self.resolve(origin), self.resolve(target)
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return {'nodes': [self.names[start]], 'edges': [], 'bottleneck_a': None, 'bottleneck_edge': None}
+
+        best = np.full(len(self.keys), -np.inf)
+        hops = np.zeros(len(self.keys), dtype=np.intp)
+        via = np.full(len(self.keys), -1, dtype=np.intp)
+        best[start] = np.inf
+        heap = [(-np.inf, 0, start)]
+        done = np.zeros(len(self.keys), dtype=bool)
+        while heap:
+            width, length, node = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            if node == goal:
+                break
+            edges = self.edges_of(node)
+            capacities = self.capacity[edges]
+            others = np.where(self.src[edges] == node, self.dst[edges], self.src[edges])
+            widths = np.minimum(-width, capacities)
+            better = ((widths > best[others]) | ((widths == best[others]) & (length + 1 < hops[others]))) & ~done[others]
+            for edge, other, w in zip(edges[better].tolist(), others[better].tolist(), widths[better].tolist()):
+                if w > best[other] or (w == best[other] and length + 1 < hops[other]):
+                    best[other], hops[other], via[other] = w, length + 1, edge
+                    heapq.heappush(heap, (-w, length + 1, other))
+        if not done[goal]:
+            return None
+
+        nodes, edges, node = [goal], [], goal
+        while node != start:
+            edge = int(via[node])
+            edges.append(edge)
+            node = int(self.src[edge] if self.dst[edge] == node else self.dst[edge])
+            nodes.append(node)
+        edges.reverse()
+        bottleneck_edge = min(edges, key=lambda e: self.capacity[e])
+        return {'nodes': [self.names[n] for n in reversed(nodes)], 'edges': edges,
+                'bottleneck_a': float(best[goal]), 'bottleneck_edge': bottleneck_edge}
+
+    # Edge untuk satu teks ruas (misal "SUTET GITET A - GITET B" atau "A-B #2"): percobaan setiap
+    # posisi '-' sampai kedua sisi dikenali sebagai node. (node_a, node_b, posisi baris) atau None.
+    def ruas_edges(self, text):
+        if not isinstance(text, str):
+            return None
+        parts = text.split('-')
+        for cut in range(1, len(parts)):
+            left, right = '-'.join(parts[:cut]), '-'.join(parts[cut:])
+            if not loose_key(left) or not loose_key(right):
+                continue
+            a, b = self.resolve(left), self.resolve(right)
+            if a is not None and b is not None and a != b:
+                return a, b, self.between(a, b)
+        return None
+
+    # Tautan tabel kontingensi ke graf, dibangun satu kali per pasangan (graf, tabel kontingensi)
+    def contingency_links(self, mitigasi_df):
+        links = self._links
+        if links is None or links.table is not mitigasi_df:
+            links = self._links = ContingencyLinks(self, mitigasi_df)
+        return links
+
+
+# Pemetaan baris tabel kontingensi (kolom SUTET dan N-1 ruas) ke pasangan node dan baris DataPHT.
+#   by_pair[(a, b)]  baris kontingensi (posisi, kolom) yang ruasnya a-b (a < b)
+#   by_row[i]        baris DataPHT untuk ruas SUTET baris kontingensi i
+class ContingencyLinks:
+    def __init__(self, graph, mitigasi_df):
+        self.table = mitigasi_df
+        self.by_pair = {}
+        self.by_node = {}
+        self.by_row = {}
+        resolved = {}
+        for column in RUAS_COLUMNS:
+            if column not in mitigasi_df.columns:
+                continue
+            for row, text in enumerate(mitigasi_df[column].tolist()):
+                if text not in resolved:
+                    resolved[text] = graph.ruas_edges(text)
+                match = resolved[text]
+                if match is None:
+                    continue
+                a, b, edges = match
+                self.by_pair.setdefault((min(a, b), max(a, b)), []).append((row, column))
+                for node in (a, b):
+                    self.by_node.setdefault(node, set()).add(row)
+                if column == 'SUTET':
+                    self.by_row[row] = edges
+        self.unresolved = sum(1 for match in resolved.values() if match is None)
+
+    # Posisi baris kontingensi yang menyebut ruas a-b (kolom apa pun), urut
+    def rows_for_pair(self, a, b):
+        return sorted({row for row, _ in self.by_pair.get((min(a, b), max(a, b)), ())})
+
+    # Posisi baris kontingensi yang ruasnya menyentuh node
+    def rows_for_node(self, node):
+        return sorted(self.by_node.get(node, ()))
+
+
+###########################
+### PER-DATAFRAME CACHE ###
+###########################
+
+_GRAPHS = FrameCache(NetworkGraph, name='network_graph')
+
+# Ambil graf untuk DataFrame PHT ini, bangun jika belum ada
+def get_network_graph(df):
+    return _GRAPHS.get(df)
+
+
+#################
+### BENCHMARK ###
+#################
+
+def _scan_detail(df, gitet1, gitet2):
+    return df[(df[FROM_COLUMN].str.contains(gitet1, case=False, na=False, regex=False)) &
+              (df[TO_COLUMN].str.contains(gitet2, case=False, na=False, regex=False))]
+
+# Bandingkan detail penghantar (scan str.contains vs graf) dan ukur query jalur, misal:
+#   python network_graph.py --rows 100000
+if __name__ == '__main__':
+    from synthetic_data import make_pht
+
+    parser = argparse.ArgumentParser(description="Ukur index graf jaringan: build, detail penghantar dan jalur.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    table = make_pht(args.rows)
+    start = time.perf_counter()
+    graph = NetworkGraph(table)
+    print(f"build: {(time.perf_counter() - start) * 1000:.1f} ms, {len(graph)} node, {graph.n_edges} edge")
+
+    pairs = [(table[FROM_COLUMN].iloc[i], table[TO_COLUMN].iloc[i]) for i in range(0, args.rows, max(1, args.rows // args.repeat))]
+    for name, fn in (('scan str.contains', lambda a, b: _scan_detail(table, a, b)),
+                     ('graf', lambda a, b: table.iloc[graph.detail_positions(a, b)])):
+        start = time.perf_counter()
+        for a, b in pairs:
+            fn(a, b)
+        print(f"detail penghantar ({name}): {(time.perf_counter() - start) * 1000 / len(pairs):.3f} ms/query")
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        graph.widest_path(a, b)
+    print(f"jalur bottleneck terbesar: {(time.perf_counter() - start) * 1000 / len(pairs):.3f} ms/query")
@@ -0,0 +1,239 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+from response_render import TABLE_HIGHLIGHT_REPL, compile_highlight, highlight_frame
+from search_index import case_rows, get_search_index
+
+# Dimensi rollup (urutan = prioritas pencocokan keyword) dan ukuran yang dijumlahkan
+DIMENSIONS = ('Perusahaan', 'Jenis', 'Unit ', 'Wilayah')
+MEASURES = ['DMN', 'TML']
+TABLE_COLUMNS = ['Perusahaan', 'Jenis', 'Unit ', 'DMN', 'TML']
+
+# (dimensi, label judul, judul memakai keyword?, tampilkan header <h3> judul?).
+# Seperti baseline, cabang Perusahaan menampilkan semua baris hasil pencarian (keyword di kolom
+# mana pun), cabang lain hanya baris yang nilai dimensinya mengandung keyword.
+BRANCHES = (
+    ('Perusahaan', 'Perusahaan', False, False),
+    ('Jenis', 'Jenis Pembangkit', True, True),
+    ('Unit ', 'Unit', True, True),
+    ('Wilayah', 'Wilayah', True, True),
+)
+
+
+########################
+### NUMERIC COERCION ###
+########################
+
+# Pastikan DMN dan TML numerik (nilai non-numerik jadi 0). Dipanggil sekali saat load;
+# DataFrame yang sudah bersih dikembalikan apa adanya, selain itu dibuat salinan (tidak mutasi).
+def coerce_pembangkit_numeric(df):
+    if all(pd.api.types.is_numeric_dtype(df[c]) and not df[c].isna().any() for c in MEASURES):
+        return df
+    out = df.copy()
+    for col in MEASURES:
+        out[col] = pd.to_numeric(out[col], errors='coerce').fillna(0)
+    return out
+
+# Nilai dimensi dalam huruf besar (sama seperti tampilan hasil pencarian), nilai kosong tetap kosong
+def _upper_key(series):
+    return series.astype(object).where(series.isna(), series.astype(str).str.upper())
+
+
+##############
+### ROLLUP ###
+##############
+
+# Rollup DMN/TML per Wilayah x Perusahaan x Jenis x Unit, dibangun satu kali per DataFrame.
+# Subtotal per Wilayah dan total global untuk keyword apa pun menjadi lookup di tabel agregat,
+# bukan filter + sum ulang di seluruh tabel.
+class PembangkitRollup:
+    def __init__(self, df):
+        self.df = df
+        keys = pd.DataFrame({dim: _upper_key(df[dim]) for dim in DIMENSIONS}, index=df.index)
+        frame = pd.concat([keys, df[MEASURES]], axis=1)
+        self.cube = frame.groupby(list(DIMENSIONS), sort=False, dropna=False)[MEASURES].sum()
+
+        self.values = {}
+        self.rows = {}
+        self.by_wilayah = {}
+        for dim in DIMENSIONS:
+            # Nilai unik (urut kemunculan pertama) dan posisi baris untuk setiap nilai
+            codes, uniques = pd.factorize(keys[dim])
+            self.values[dim] = pd.Series(uniques, dtype=object)
+            order = np.argsort(codes, kind='stable')
+            order = order[codes[order] >= 0]
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            self.rows[dim] = np.split(order, np.cumsum(counts)[:-1]) if len(uniques) else []
+
+            levels = ['Wilayah'] if dim == 'Wilayah' else [dim, 'Wilayah']
+            self.by_wilayah[dim] = self.cube.groupby(level=levels, sort=False, dropna=False).sum()
+
+    # Id nilai dimensi yang mengandung keyword (dicek di nilai unik saja, bukan per baris)
+    def match_values(self, dim, keyword):
+        mask = self.values[dim].str.contains(keyword.upper(), regex=False, na=False)
+        return np.flatnonzero(mask.to_numpy(dtype=bool))
+
+    # Subtotal DMN/TML per Wilayah dan total global untuk nilai dimensi yang dipilih
+    def totals(self, dim, value_ids):
+        names = self.values[dim].iloc[value_ids].tolist()
+        selected = self.by_wilayah[dim].loc[names]
+        if dim != 'Wilayah':
+            selected = selected.groupby(level='Wilayah', sort=False, dropna=False).sum()
+        return selected, selected.sum()
+
+    # Subtotal DMN/TML per Wilayah dan total global untuk posisi baris sembarang
+    def row_totals(self, positions):
+        rows = self.df[MEASURES].iloc[positions]
+        wilayah = _upper_key(self.df['Wilayah'].iloc[positions]).to_numpy()
+        return rows.groupby(wilayah, sort=False, dropna=False).sum(), rows.sum()
+
+    # Posisi baris (iloc, urut asli) untuk nilai dimensi yang dipilih
+    def positions(self, dim, value_ids):
+        if not len(value_ids):
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate([self.rows[dim][i] for i in value_ids]))
+
+
+_ROLLUPS = FrameCache(PembangkitRollup, name='pembangkit_rollup')
+
+def get_pembangkit_rollup(df):
+    return _ROLLUPS.get(df)
+
+
+#################
+### RENDERING ###
+#################
+
+def _sum_row_html(label, dmn, tml):
+    return (f"<tr><td><strong>Total for {label}</strong></td><td></td><td><strong>{round(dmn, 2)}</strong></td>"
+            f"<td><strong>{round(tml, 2)}</strong></td></tr>")
+
+def _global_sum_html(dmn, tml):
+    return ("<h3>Global Sum</h3><table><tr><td><strong>Total DMN (MW):</strong></td>"
+            f"<td><strong>{round(dmn, 2)}</strong></td></tr><tr><td><strong>Total TML (MW):</strong></td>"
+            f"<td><strong>{round(tml, 2)}</strong></td></tr></table>")
+
+# Dimensi pertama (urut prioritas) yang nilainya mengandung keyword: (branch, id nilai) atau None
+def _match_branch(rollup, keyword):
+    for branch in BRANCHES:
+        value_ids = rollup.match_values(branch[0], keyword)
+        if len(value_ids):
+            return branch, value_ids
+    return None
+
+# Halaman tabel pembangkitan untuk keyword: (judul, jumlah baris, daftar halaman) atau None jika
+# tidak ada yang cocok. Setiap halaman berisi paling banyak page_size baris (None = satu halaman)
+# dan baru di-render saat dipanggil: render_page(i) -> (html dengan highlight, html polos).
+# Bagian Wilayah yang terpotong berlanjut di halaman berikutnya; subtotal muncul di potongan terakhir.
+def paginate_pembangkitan(rollup, keyword, page_size=None):
+    match = _match_branch(rollup, keyword)
+    if match is None:
+        return None
+    (dim, label, keyword_title, show_header), value_ids = match
+
+    if dim == 'Perusahaan':
+        positions = get_search_index(rollup.df).positions(keyword)
+        per_wilayah, global_totals = rollup.row_totals(positions)
+    else:
+        per_wilayah, global_totals = rollup.totals(dim, value_ids)
+        positions = rollup.positions(dim, value_ids)
+    wilayah = _upper_key(rollup.df['Wilayah'].iloc[positions]).reset_index(drop=True)
+
+    # Urutan tampil: Wilayah urut kemunculan, baris di dalamnya urut asli
+    groups = wilayah.groupby(wilayah, sort=False).indices
+    segments = []
+    for name in pd.unique(wilayah):
+        if name in groups:
+            rows = groups[name]
+            step = page_size or len(rows)
+            for offset in range(0, len(rows), step):
+                segments.append((name, rows[offset:offset + step], offset + step >= len(rows)))
+
+    # Kelompokkan potongan ke halaman
+    pages, current, filled = [], [], 0
+    for name, rows, last in segments:
+        while page_size and filled + len(rows) > page_size:
+            take = page_size - filled
+            current.append((name, rows[:take], False))
+            pages.append(current)
+            current, filled, rows = [], 0, rows[take:]
+        if len(rows):
+            current.append((name, rows, last))
+            filled += len(rows)
+    if current or not pages:
+        pages.append(current)
+
+    title = keyword.upper() if keyword_title else rollup.values[dim].iloc[value_ids[0]]
+    header = f"<h3>{label}: {title}</h3>" if show_header else ""
+    global_html = _global_sum_html(global_totals['DMN'], global_totals['TML'])
+    pattern = compile_highlight(keyword)
+    # Baseline cabang Perusahaan mengambil nama Wilayah dari tabel yang sudah di-highlight
+    highlight_name = ((lambda name: pattern.sub(TABLE_HIGHLIGHT_REPL, name)) if dim == 'Perusahaan'
+                      else (lambda name: name))
+
+    def render_page(number):
+        page = pages[number]
+        page_positions = positions[np.concatenate([rows for _, rows, _ in page])] if page else positions[:0]
+        rows = case_rows(rollup.df.iloc[page_positions][TABLE_COLUMNS + ['Wilayah']], upper=True)
+        highlighted_rows = highlight_frame(rows, pattern)
+
+        sections = {True: [], False: []}
+        offset = 0
+        for name, segment, last in page:
+            local = np.arange(offset, offset + len(segment))
+            offset += len(segment)
+            for highlighted, frame in ((True, highlighted_rows), (False, rows)):
+                wilayah_label = highlight_name(name) if highlighted else name
+                footer = ""
+                if last:
+                    sum_html = _sum_row_html(wilayah_label, per_wilayah.loc[name, 'DMN'], per_wilayah.loc[name, 'TML'])
+                    footer = f"<table>{sum_html}</table><br><br>"
+                table_html = frame.iloc[local][TABLE_COLUMNS].to_html(escape=False, index=False)
+                sections[highlighted].append(f"<h3>Wilayah: {wilayah_label}</h3>{table_html}{footer}")
+
+        prefix = header if number == 0 else ""
+        suffix = global_html if number == len(pages) - 1 else ""
+        return (prefix + "".join(sections[True]) + suffix,
+                prefix + "".join(sections[False]) + suffix)
+
+    return f"{label}: {title}", len(positions), [lambda number=number: render_page(number) for number in range(len(pages))]
+
+# Render tabel pembangkitan per Wilayah untuk keyword, satu jalur untuk keempat dimensi.
+# Mengembalikan (judul, html dengan highlight, html polos) atau None jika tidak ada yang cocok.
+def render_pembangkitan(rollup, keyword):
+    paginated = paginate_pembangkitan(rollup, keyword)
+    if paginated is None:
+        return None
+    title, _, pages = paginated
+    highlighted, plain = pages[0]()
+    return title, highlighted, plain
+
+
+#################
+### BENCHMARK ###
+#################
+
+# Ukur waktu agregasi per keyword, misal: python pembangkit_rollup.py --units 50000
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark rollup DMN/TML pembangkitan.")
+    parser.add_argument('--units', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    from synthetic_data import make_pembangkit
+    fleet = coerce_pembangkit_numeric(make_pembangkit(args.units))
+    start = time.perf_counter()
+    rollup = PembangkitRollup(fleet)
+    print(f"build: {time.perf_counter() - start:.3f} s untuk {args.units} unit, {len(rollup.cube)} sel rollup")
+
+    for dim, keyword in [('Perusahaan', 'pembangkit 042'), ('Perusahaan', 'pembangkit'), ('Jenis', 'pltu'), ('Wilayah', 'jawa')]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            ids = rollup.match_values(dim, keyword)
+            per_wilayah, global_totals = rollup.totals(dim, ids)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{dim:10} {keyword!r:18} {len(per_wilayah):3d} wilayah  DMN {global_totals['DMN']:14,.1f}  {elapsed * 1000:7.3f} ms")
@@ -0,0 +1,206 @@
+import argparse
+import time
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+from response_render import HIGHLIGHT_TEMPLATE, compile_highlight, highlight_series, mitigasi_descriptions
+from search_index import case_rows, normalize
+
+# Playbook mitigasi yang sudah jadi. Setiap baris kontingensi di-render sekali saat load menjadi
+# markdown final; semua playbook disimpan dalam satu string dengan offset per baris (tanpa objek
+# str per baris). Nama ruas (SUTET, N-1, N-1-1, N-1-2) menjadi key untuk lookup persis dan prefix,
+# dan posisi kemunculan nama ruas di playbook barisnya dihitung di depan, sehingga highlight untuk
+# keyword = nama ruas cukup menyambung potongan string tanpa regex.
+RUAS_COLUMNS = ('SUTET', 'N-1', 'N-1-1', 'N-1-2')
+PLAYBOOK_SEP = "\n\n"
+
+
+#############
+### STORE ###
+#############
+
+class PlaybookStore:
+    def __init__(self, df):
+        texts = mitigasi_descriptions(case_rows(df, upper=True)) if len(df) else pd.Series([], dtype=object)
+        lengths = texts.str.len().to_numpy(dtype=np.int64) if len(texts) else np.zeros(0, dtype=np.int64)
+        self.bounds = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        self.buffer = ''.join(texts.tolist())
+        self._build_keys(df)
+        self._build_offsets()
+
+    # Pasangan (key ruas, baris) urut key lalu baris. key_start[k]:key_start[k + 1] adalah pasangan key k.
+    # Key di-factorize dulu, lalu pasangan diurutkan sebagai integer (bukan sort string per baris).
+    def _build_keys(self, df):
+        keys, rows = [], []
+        for col in RUAS_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy(dtype=object)
+            is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+            positions = np.flatnonzero(is_str)
+            keys.append(pd.Series(values[positions], dtype=object).str.lower().str.strip().to_numpy(dtype=object))
+            rows.append(positions)
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=object)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+        codes, uniques = pd.factorize(keys)
+        order = np.argsort(uniques.astype(str), kind='stable')
+        rank = np.empty(len(uniques), dtype=np.int64)
+        rank[order] = np.arange(len(uniques))
+        n = max(len(df), 1)
+        pairs = np.unique(rank[codes] * n + rows)
+        pair_keys = pairs // n
+        if len(uniques) and uniques[order[0]] == '':
+            # Sel kosong/spasi bukan nama ruas
+            pairs, pair_keys = pairs[pair_keys > 0], pair_keys[pair_keys > 0] - 1
+            order = order[1:]
+
+        self.keys = uniques[order].tolist()
+        self.pair_rows = pairs % n
+        self.key_start = np.searchsorted(pair_keys, np.arange(len(self.keys) + 1)).astype(np.int64)
+
+    # Kemunculan setiap key di playbook barisnya (sama dengan highlight regex: tidak peka huruf
+    # besar/kecil, tidak tumpang tindih). hl_start[p]:hl_start[p + 1] adalah offset pasangan p.
+    # Dicari dengan str.find pada salinan huruf besar (compile regex per key terlalu mahal untuk
+    # puluhan ribu key); jika upper() mengubah panjang teks (karakter non-ASCII tertentu), offset
+    # tidak bisa dipakai dan semua highlight memakai regex.
+    def _build_offsets(self):
+        begins, ends, counts = [], [], []
+        upper = self.buffer.upper()
+        self.has_offsets = len(upper) == len(self.buffer)
+        bounds = self.bounds.tolist()
+        for k, key in enumerate(self.keys if self.has_offsets else []):
+            needle = key.upper()
+            rows = self.pair_rows[self.key_start[k]:self.key_start[k + 1]].tolist()
+            if len(needle) != len(key):
+                # Regex tidak peka huruf besar/kecil tidak mencocokkan 'ß' dengan 'SS' di teks: tanpa highlight
+                counts.extend([0] * len(rows))
+                continue
+            for row in rows:
+                found, position, end = 0, bounds[row], bounds[row + 1]
+                while True:
+                    position = upper.find(needle, position, end)
+                    if position < 0:
+                        break
+                    begins.append(position - bounds[row])
+                    ends.append(position + len(needle) - bounds[row])
+                    position += len(needle)
+                    found += 1
+                counts.append(found)
+        self.hl_begin = np.asarray(begins, dtype=np.int32)
+        self.hl_end = np.asarray(ends, dtype=np.int32)
+        self.hl_start = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64)
+
+    def __len__(self):
+        return len(self.bounds) - 1
+
+    def playbook(self, row):
+        return self.buffer[self.bounds[row]:self.bounds[row + 1]]
+
+    def _key_range(self, ruas, prefix):
+        key = normalize(ruas).strip()
+        if not key:
+            return 0, 0
+        first = bisect_left(self.keys, key)
+        if not prefix:
+            return (first, first + 1) if first < len(self.keys) and self.keys[first] == key else (first, first)
+        return first, bisect_left(self.keys, key + '\U0010ffff', first)
+
+    # Posisi baris (urut) yang punya ruas bernama `ruas` (persis, tidak peka huruf besar/kecil),
+    # atau yang nama ruasnya diawali `ruas` jika prefix=True. Hanya bisect pada daftar key.
+    def lookup(self, ruas, prefix=False):
+        first, last = self._key_range(ruas, prefix)
+        rows = self.pair_rows[self.key_start[first]:self.key_start[last]]
+        return np.unique(rows) if last - first > 1 else rows
+
+    # Playbook untuk posisi baris: (dengan highlight keyword, polos), dipisah baris kosong.
+    # Jika keyword adalah nama ruas baris tersebut, highlight diambil dari offset yang sudah dihitung;
+    # baris lain (misal keyword hanya muncul di langkah mitigasi) memakai regex seperti sebelumnya.
+    def render(self, positions, keyword=None):
+        texts = [self.playbook(row) for row in positions]
+        plain = PLAYBOOK_SEP.join(texts)
+        if not keyword:
+            return plain, plain
+        replacement = HIGHLIGHT_TEMPLATE.format(keyword.upper())
+        key = keyword.lower()
+        first, last = self._key_range(keyword, False)
+        exact = self.has_offsets and first < last and self.keys[first] == key
+
+        highlighted, fallback = [], []
+        for i, row in enumerate(positions):
+            pair = self._pair(first, row) if exact else -1
+            if pair < 0:
+                highlighted.append(None)
+                fallback.append(i)
+                continue
+            text, start, pieces = texts[i], 0, []
+            for begin, end in zip(self.hl_begin[self.hl_start[pair]:self.hl_start[pair + 1]],
+                                  self.hl_end[self.hl_start[pair]:self.hl_start[pair + 1]]):
+                pieces.append(text[start:begin])
+                pieces.append(replacement)
+                start = end
+            pieces.append(text[start:])
+            highlighted.append(''.join(pieces))
+        if fallback:
+            replaced = highlight_series(pd.Series([texts[i] for i in fallback], dtype=object),
+                                        compile_highlight(keyword), replacement)
+            for i, text in zip(fallback, replaced):
+                highlighted[i] = text
+        return PLAYBOOK_SEP.join(highlighted), plain
+
+    # Indeks pasangan (key k, baris row), -1 jika baris tersebut tidak punya ruas k
+    def _pair(self, k, row):
+        start, end = self.key_start[k], self.key_start[k + 1]
+        i = start + np.searchsorted(self.pair_rows[start:end], row)
+        return int(i) if i < end and self.pair_rows[i] == row else -1
+
+    def stats(self):
+        return {'playbooks': len(self), 'keys': len(self.keys), 'pairs': len(self.pair_rows),
+                'buffer_bytes': len(self.buffer), 'highlight_offsets': len(self.hl_begin)}
+
+
+###########################
+### PER-DATAFRAME CACHE ###
+###########################
+
+_STORES = FrameCache(PlaybookStore, name='playbook_store')
+
+def get_playbook_store(df):
+    return _STORES.get(df)
+
+
+# Bandingkan render playbook per query dengan lookup dari store, misal:
+#   python playbook_store.py --rows 10000
+if __name__ == '__main__':
+    from response_render import render_mitigasi_responses
+    from synthetic_data import make_mitigasi
+
+    parser = argparse.ArgumentParser(description="Latency playbook mitigasi: render per query vs store.")
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    table = make_mitigasi(args.rows)
+    start = time.perf_counter()
+    store = PlaybookStore(table)
+    print(f"build {args.rows} baris: {time.perf_counter() - start:.2f} s  {store.stats()}")
+
+    ruas = str(table['SUTET'].iloc[args.rows // 2])
+    rows = store.lookup(ruas)
+    expected = render_mitigasi_responses(case_rows(table.iloc[rows], upper=True), ruas)
+    assert store.render(rows, ruas) == expected
+
+    cases = [
+        ('render per query (lama)', lambda: render_mitigasi_responses(case_rows(table.iloc[rows], upper=True), ruas)),
+        ('lookup persis', lambda: store.lookup(ruas)),
+        ('lookup prefix', lambda: store.lookup(ruas[:-3], prefix=True)),
+        ('lookup + render highlight', lambda: store.render(store.lookup(ruas), ruas)),
+    ]
+    for name, fn in cases:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        print(f"{name:28} {(time.perf_counter() - start) / args.repeat * 1e6:10.1f} us")
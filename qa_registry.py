@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Konfigurasi model QA, bisa diatur lewat environment variable atau configure_qa_model():
+#   CHATBOT_QA_MODEL      nama model di Hugging Face Hub
+#   CHATBOT_QA_MODEL_DIR  direktori lokal berisi model + tokenizer (tanpa akses jaringan)
+#   CHATBOT_QA_MODE       'default' atau 'quantized' (dynamic int8 untuk layer Linear)
+#   CHATBOT_QA_THREADS    jumlah thread torch untuk inferensi di CPU
+QA_TASK = 'question-answering'
+QA_MODES = ('default', 'quantized')
+
+_CONFIG = {
+    'model': os.environ.get('CHATBOT_QA_MODEL', 'distilbert-base-cased-distilled-squad'),
+    'model_dir': os.environ.get('CHATBOT_QA_MODEL_DIR') or None,
+    'mode': os.environ.get('CHATBOT_QA_MODE', 'default'),
+    'threads': int(os.environ['CHATBOT_QA_THREADS']) if os.environ.get('CHATBOT_QA_THREADS') else None,
+}
+
+# Satu pipeline per proses, dimuat saat pertama kali dibutuhkan
+_MODEL = None
+_LOAD_ERROR = None
+# True jika _MODEL dipasang lewat use_qa_model (bukan dimuat dari konfigurasi)
+_CUSTOM = False
+_LOCK = threading.Lock()
+_PREWARM_THREAD = None
+
+_STATS = {
+    'load_seconds': None,
+    'rss_before_mb': None,
+    'rss_after_mb': None,
+}
+_LATENCIES = deque(maxlen=1000)
+
+
+#####################
+### CONFIGURATION ###
+#####################
+
+# Ubah konfigurasi model; hanya berlaku jika model belum dimuat
+def configure_qa_model(model=None, model_dir=None, mode=None, threads=None):
+    if mode is not None and mode not in QA_MODES:
+        raise ValueError(f"Mode QA tidak dikenal: {mode!r} (pilihan: {', '.join(QA_MODES)})")
+    with _LOCK:
+        if _MODEL is not None:
+            raise RuntimeError("Model QA sudah dimuat; konfigurasi harus diatur sebelum pemakaian pertama.")
+        if model is not None:
+            _CONFIG['model'] = model
+        if model_dir is not None:
+            _CONFIG['model_dir'] = model_dir
+        if mode is not None:
+            _CONFIG['mode'] = mode
+        if threads is not None:
+            _CONFIG['threads'] = threads
+
+# Identitas model yang dipakai (nama/direktori + mode), berguna sebagai bagian dari cache key
+def qa_model_id():
+    return f"{_CONFIG['model_dir'] or _CONFIG['model']}:{_CONFIG['mode']}"
+
+
+###############
+### LOADING ###
+###############
+
+# Resident memory proses saat ini dalam MB
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _load_pipeline():
+    # transformers/torch sengaja diimpor di sini supaya import Ask_me_ tetap ringan
+    import torch
+    from transformers import AutoModelForQuestionAnswering, AutoTokenizer, pipeline
+
+    if _CONFIG['threads']:
+        torch.set_num_threads(_CONFIG['threads'])
+
+    source = _CONFIG['model_dir'] or _CONFIG['model']
+    local_only = _CONFIG['model_dir'] is not None
+    tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local_only)
+    model = AutoModelForQuestionAnswering.from_pretrained(source, local_files_only=local_only)
+    model.eval()
+
+    if _CONFIG['mode'] == 'quantized':
+        # Dynamic int8 quantization: bobot Linear disimpan int8, aktivasi dikuantisasi saat runtime
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return pipeline(QA_TASK, model=model, tokenizer=tokenizer, device=-1)
+
+# Ambil pipeline QA, muat jika belum ada (thread-safe, hanya dimuat satu kali)
+def get_qa_model():
+    global _MODEL, _LOAD_ERROR
+    if _MODEL is not None:
+        return _MODEL
+    with _LOCK:
+        if _MODEL is None:
+            _STATS['rss_before_mb'] = _rss_mb()
+            start = time.perf_counter()
+            try:
+                _MODEL = _load_pipeline()
+            except Exception as exc:
+                _LOAD_ERROR = exc
+                raise
+            _LOAD_ERROR = None
+            _STATS['load_seconds'] = time.perf_counter() - start
+            _STATS['rss_after_mb'] = _rss_mb()
+    return _MODEL
+
+# Pasang pipeline yang dibuat di luar registry (misal stub untuk benchmark tanpa jaringan).
+# model_id menggantikan nama model supaya qa_model_id() tidak tertukar dengan model asli.
+def use_qa_model(model, model_id='custom'):
+    global _MODEL, _LOAD_ERROR, _CUSTOM
+    with _LOCK:
+        _MODEL, _LOAD_ERROR, _CUSTOM = model, None, True
+        _CONFIG['model'], _CONFIG['model_dir'] = model_id, None
+
+# Cara memuat model yang sama di proses lain (forkserver inference_pool.py): (konfigurasi, pipeline
+# custom atau None). Pipeline dari Hub/direktori tidak dikirim; proses lain memuatnya dari konfigurasi.
+def qa_model_spec():
+    with _LOCK:
+        return dict(_CONFIG), _MODEL if _CUSTOM else None
+
+# Pasang konfigurasi hasil qa_model_spec() di proses ini lalu muat modelnya
+def load_qa_model_spec(config):
+    with _LOCK:
+        _CONFIG.update(config)
+    return get_qa_model()
+
+# Mulai memuat model di background thread supaya UI sudah bisa melayani pengguna
+def prewarm_qa_model():
+    global _PREWARM_THREAD
+    with _LOCK:
+        if _MODEL is not None or (_PREWARM_THREAD is not None and _PREWARM_THREAD.is_alive()):
+            return _PREWARM_THREAD
+
+        def warm():
+            try:
+                get_qa_model()
+            except Exception:
+                # Error disimpan di _LOAD_ERROR dan akan muncul lagi saat get_qa_model() dipanggil
+                pass
+
+        _PREWARM_THREAD = threading.Thread(target=warm, name='qa-model-prewarm', daemon=True)
+        _PREWARM_THREAD.start()
+        return _PREWARM_THREAD
+
+def is_qa_model_ready():
+    return _MODEL is not None
+
+
+###############
+### METRICS ###
+###############
+
+def record_answer_latency(seconds):
+    _LATENCIES.append(seconds)
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+# Ringkasan waktu startup, memory dan latency per jawaban untuk membandingkan mode
+def qa_model_stats():
+    latencies = list(_LATENCIES)
+    rss_delta = None
+    if _STATS['rss_after_mb'] is not None:
+        rss_delta = _STATS['rss_after_mb'] - _STATS['rss_before_mb']
+    return {
+        'model': qa_model_id(),
+        'threads': _CONFIG['threads'],
+        'ready': is_qa_model_ready(),
+        'load_error': repr(_LOAD_ERROR) if _LOAD_ERROR is not None else None,
+        'load_seconds': _STATS['load_seconds'],
+        'rss_mb': _rss_mb(),
+        'model_rss_delta_mb': rss_delta,
+        'answers': len(latencies),
+        'answer_latency_mean_ms': 1000 * sum(latencies) / len(latencies) if latencies else None,
+        'answer_latency_p50_ms': 1000 * _percentile(latencies, 0.50) if latencies else None,
+        'answer_latency_p95_ms': 1000 * _percentile(latencies, 0.95) if latencies else None,
+    }
+
+
+# Bandingkan mode model dari command line, misal:
+#   python qa_registry.py --mode quantized --threads 2
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ukur waktu muat, memory dan latency model QA.")
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--model-dir', default=None)
+    parser.add_argument('--mode', choices=QA_MODES, default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    configure_qa_model(model=args.model, model_dir=args.model_dir, mode=args.mode, threads=args.threads)
+    qa = get_qa_model()
+
+    context = ("SUTET GITET CIRATA-GITET SAGULING #1 ada di wilayah UPT BEKASI dengan panjang penghantar "
+               "48.5 km dan kemampuan maksimal sebesar 2500 A, 80.0 % dari nominal 3000 A. "
+               "Alasan Derating: Jointing rusak.")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        qa(question="Berapa panjang penghantar?", context=context)
+        record_answer_latency(time.perf_counter() - start)
+
+    print(json.dumps(qa_model_stats(), indent=2))
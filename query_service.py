@@ -0,0 +1,424 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from Ask_me_ import (INTENT_INPUTS, answer_memo_stats, readiness, startup_bundle_stats, NOT_FOUND_MESSAGE, answer_from_data, answer_intent,
+                     build_context_and_response, build_context_and_response_mitigasi,
+                     build_context_and_response_pembangkitan, detect_intent, fuzzy_keyword, get_answer, get_answers, mitigasi_playbook,
+                     get_response_page, is_qa_model_ready, load_data_pht, prewarm_qa_model, qa_model_stats, result_cache_stats,
+                     start_data_watcher, table_memory_report)
+from result_pages import PAGE_SIZE
+from federated_search import gather, run_each
+from inference_pool import INFERENCE_WORKERS, inference_pool_stats, start_inference_pool, stop_inference_pool
+from metrics import observe, register_collector, render_prometheus, slow_queries, stage_summary
+
+# Layanan HTTP/JSON (asyncio, tanpa dependensi tambahan) untuk akses programatik ke data PHT,
+# mitigasi dan pembangkitan. Dataset dan model dimuat satu kali per proses; pekerjaan CPU
+# dijalankan di executor terbatas dengan timeout dan backpressure.
+#
+#   python query_service.py --port 8502
+#
+# Endpoint:
+#   GET  /health                 status layanan dan kesiapan model (selalu 200 selama proses hidup)
+#   GET  /ready                  200 jika data dan index sudah siap, 503 selama startup; kesiapan model
+#                                dilaporkan terpisah (model_ready), karena pencarian tidak butuh model
+#   GET  /stats                  counter layanan, cache hasil query, statistik model QA dan inference pool,
+#                                per stage dan memory tabel
+#   GET  /metrics                semua metrik dalam format teks Prometheus
+#   POST /search   {"keyword", "dataset": "pht|mitigasi|pembangkitan|all", "highlight"}
+#                  + opsional {"page", "page_size"}: satu halaman respons dengan total dan has_more
+#                  + opsional {"fuzzy": true}: tanpa hasil persis, cari dengan term yang paling mirip
+#   POST /intent   {"question", "wilayah", "gitet1", "gitet2"}
+#   POST /answer   {"question", "context"} atau {"question", "dataset", "keyword"}
+#   POST /answers  {"questions": [...], "contexts": [...]}
+#   POST /playbook {"ruas", "highlight"}: playbook mitigasi untuk nama ruas (persis, lalu prefix)
+
+MAX_BODY_BYTES = 1 << 20
+MAX_PAGE_SIZE = 500
+
+# Endpoint yang tetap dilayani selama data masih dimuat; endpoint lain mendapat 503 + Retry-After.
+# Collector /metrics hanya membaca counter di memory (tidak memuat workbook atau membuka SQLite).
+STARTUP_ROUTES = ('/health', '/ready', '/metrics')
+
+DATASETS = ('pht', 'mitigasi', 'pembangkitan')
+BUILDERS = {
+    'pht': build_context_and_response,
+    'mitigasi': build_context_and_response_mitigasi,
+    'pembangkitan': build_context_and_response_pembangkitan,
+}
+
+
+# Error yang dikembalikan ke klien sebagai {"error": message} dengan status HTTP tertentu
+class ServiceError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+# Respons non-JSON (misal /metrics untuk Prometheus)
+class TextResponse:
+    def __init__(self, body, content_type='text/plain; charset=utf-8'):
+        self.body = body
+        self.content_type = content_type
+
+
+def _require_text(payload, name):
+    value = payload.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"Field '{name}' wajib diisi (string).")
+    return value
+
+# Field boolean opsional: hanya true/false JSON yang diterima (string "false" bukan False)
+def _optional_flag(payload, name, default):
+    value = payload.get(name, default)
+    if not isinstance(value, bool):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"Field '{name}' harus boolean (true/false).")
+    return value
+
+
+class QueryService:
+    def __init__(self, workers=4, model_workers=1, max_pending=64, timeout=10.0):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='query')
+        self.model_executor = ThreadPoolExecutor(model_workers, thread_name_prefix='qa')
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.started = time.time()
+        self.counters = {'requests': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0}
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('GET', '/ready'): self.ready,
+            ('GET', '/stats'): self.stats,
+            ('GET', '/metrics'): self.metrics,
+            ('POST', '/search'): self.search,
+            ('POST', '/intent'): self.intent,
+            ('POST', '/answer'): self.answer,
+            ('POST', '/answers'): self.answers,
+            ('POST', '/playbook'): self.playbook,
+        }
+        register_collector('service', lambda: dict(self.counters, pending=self.pending))
+
+    # Dataset diambil lewat load_data_pht: satu salinan per proses, otomatis ikut versi workbook terbaru
+    @staticmethod
+    def datasets():
+        return dict(zip(DATASETS, load_data_pht()))
+
+    #######################
+    ### EXECUTOR ACCESS ###
+    #######################
+
+    def _release(self, _future):
+        self.pending -= 1
+
+    # Jalankan fungsi blocking di executor. Jika antrian penuh, request langsung ditolak (503)
+    # daripada menumpuk; jika melewati timeout, klien mendapat 504. Slot baru dilepas setelah
+    # pekerjaan benar-benar selesai, supaya pekerjaan yang timeout tetap dihitung sebagai beban.
+    async def run_blocking(self, executor, fn, *args):
+        if self.pending >= self.max_pending:
+            self.counters['rejected'] += 1
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "Server sedang sibuk, coba lagi.",
+                               {'Retry-After': '1'})
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise ServiceError(HTTPStatus.GATEWAY_TIMEOUT, f"Request melebihi batas waktu {self.timeout} detik.")
+
+    ################
+    ### HANDLERS ###
+    ################
+
+    async def health(self, payload):
+        return {'status': 'ok', 'ui_ready': readiness()['ui_ready'], 'model_ready': is_qa_model_ready(),
+                'uptime_seconds': time.time() - self.started}
+
+    async def ready(self, payload):
+        status = readiness()
+        if not status['ui_ready']:
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "Data dan index masih dimuat.", {'Retry-After': '1'})
+        return status
+
+    async def stats(self, payload):
+        return {
+            'service': dict(self.counters, pending=self.pending, max_pending=self.max_pending),
+            'result_cache': result_cache_stats(),
+            'qa_model': qa_model_stats(),
+            'inference_pool': inference_pool_stats(),
+            'answer_memo': answer_memo_stats(),
+            'startup_bundle': startup_bundle_stats(),
+            'stages': stage_summary(),
+            'slow_queries': slow_queries(),
+            'tables': table_memory_report(),
+        }
+
+    async def metrics(self, payload):
+        return TextResponse(render_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+
+    # Dataset dicari bersamaan (federated_search.run_each); dataset yang timeout/gagal dilaporkan
+    # sebagai tidak ditemukan dengan 'error', dataset lain tetap dikembalikan
+    def _search_each(self, names, run, format_result):
+        data = self.datasets()
+        finished = gather(run_each({name: (lambda name=name: run(name, data[name])) for name in names}))
+        results = {}
+        for name in names:
+            result = finished[name]
+            if result.ok:
+                results[name] = format_result(result.value)
+            else:
+                results[name] = {'found': False, 'error': result.status if result.error is None else result.error}
+        return results
+
+    # fuzzy: dataset tanpa hasil persis dicari ulang dengan term yang paling mirip ('matched_keyword')
+    def _search(self, names, keyword, highlight, fuzzy):
+        def run(name, df):
+            context, response = BUILDERS[name](df, keyword, highlight=highlight)
+            if context is None and fuzzy:
+                term = fuzzy_keyword(name, df, keyword)
+                if term is not None:
+                    context, response = BUILDERS[name](df, term, highlight=highlight)
+                    return context, response, term
+            return context, response, keyword
+
+        def format_result(value):
+            context, response, matched = value
+            return {'found': context is not None, 'matched_keyword': matched, 'context': context,
+                    'response': response}
+        return self._search_each(names, run, format_result)
+
+    def _search_page(self, names, keyword, highlight, page, page_size, fuzzy):
+        def run(name, df):
+            return get_response_page(name, df, keyword, page, highlight=highlight, page_size=page_size, fuzzy=fuzzy)
+
+        def format_result(value):
+            response, total, has_more = value
+            return {'found': total > 0, 'total': total, 'page': page, 'has_more': has_more, 'response': response}
+        return self._search_each(names, run, format_result)
+
+    async def search(self, payload):
+        keyword = _require_text(payload, 'keyword')
+        dataset = payload.get('dataset', 'all')
+        if dataset != 'all' and dataset not in DATASETS:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Dataset tidak dikenal: {dataset!r}.")
+        names = DATASETS if dataset == 'all' else (dataset,)
+        highlight = _optional_flag(payload, 'highlight', True)
+        fuzzy = _optional_flag(payload, 'fuzzy', False)
+        if 'page' in payload:
+            page, page_size = payload['page'], payload.get('page_size', PAGE_SIZE)
+            if not isinstance(page, int) or page < 0:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Field 'page' harus bilangan bulat >= 0.")
+            if not isinstance(page_size, int) or not 0 < page_size <= MAX_PAGE_SIZE:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"Field 'page_size' harus 1..{MAX_PAGE_SIZE}.")
+            results = await self.run_blocking(self.executor, self._search_page, names, keyword,
+                                              highlight, page, page_size, fuzzy)
+        else:
+            results = await self.run_blocking(self.executor, self._search, names, keyword, highlight, fuzzy)
+        return {'keyword': keyword, 'results': results}
+
+    def _intent(self, question, inputs):
+        intent = detect_intent(question)
+        answer = answer_intent(intent, self.datasets()['pht'], **inputs)
+        missing = [name for name in INTENT_INPUTS.get(intent, ()) if not inputs.get(name)]
+        return {'intent': intent, 'answer': answer, 'missing_inputs': missing if answer is None else []}
+
+    async def intent(self, payload):
+        question = _require_text(payload, 'question')
+        inputs = {name: payload[name] for name in ('wilayah', 'gitet1', 'gitet2')
+                  if isinstance(payload.get(name), str)}
+        return await self.run_blocking(self.executor, self._intent, question, inputs)
+
+    def _answer_from_dataset(self, question, dataset, keyword):
+        return answer_from_data(question, self.datasets()[dataset], keyword)
+
+    async def answer(self, payload):
+        question = _require_text(payload, 'question')
+        if 'context' in payload:
+            context = payload['context']
+            if context is not None and not isinstance(context, str):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Field 'context' harus string.")
+            answer = await self.run_blocking(self.model_executor, get_answer, question, context)
+        else:
+            dataset = payload.get('dataset', 'pht')
+            if dataset not in DATASETS:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"Dataset tidak dikenal: {dataset!r}.")
+            keyword = payload.get('keyword')
+            if keyword is not None and not isinstance(keyword, str):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Field 'keyword' harus string.")
+            answer = await self.run_blocking(self.model_executor, self._answer_from_dataset,
+                                             question, dataset, keyword)
+        return {'answer': answer, 'found': answer != NOT_FOUND_MESSAGE}
+
+    async def answers(self, payload):
+        questions, contexts = payload.get('questions'), payload.get('contexts')
+        if not isinstance(questions, list) or not isinstance(contexts, list) or len(questions) != len(contexts):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Field 'questions' dan 'contexts' harus list dengan panjang sama.")
+        if not all(isinstance(q, str) for q in questions) or not all(c is None or isinstance(c, str) for c in contexts):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Isi 'questions' harus string, isi 'contexts' string atau null.")
+        answers = await self.run_blocking(self.model_executor, get_answers, questions, contexts)
+        return {'answers': answers}
+
+    def _playbook(self, ruas, highlight):
+        return mitigasi_playbook(self.datasets()['mitigasi'], ruas, highlight=highlight)
+
+    async def playbook(self, payload):
+        ruas = _require_text(payload, 'ruas')
+        highlight = _optional_flag(payload, 'highlight', True)
+        playbook = await self.run_blocking(self.executor, self._playbook, ruas, highlight)
+        return {'ruas': ruas, 'found': playbook is not None, 'playbook': playbook or NOT_FOUND_MESSAGE}
+
+    ############
+    ### HTTP ###
+    ############
+
+    async def dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method {method} tidak didukung untuk {path}.")
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Endpoint {path} tidak ditemukan.")
+        if path not in STARTUP_ROUTES and not readiness()['ui_ready']:
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "Layanan masih memuat data, coba lagi.", {'Retry-After': '1'})
+        payload = {}
+        if method == 'POST':
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Body harus JSON yang valid.")
+            if not isinstance(payload, dict):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Body harus berupa objek JSON.")
+        return await handler(payload)
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive, headers=None):
+        if isinstance(payload, TextResponse):
+            body, content_type = payload.body.encode('utf-8'), payload.content_type
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+
+    # Satu koneksi bisa membawa banyak request (HTTP/1.1 keep-alive)
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    self._write_response(writer, HTTPStatus.BAD_REQUEST, {'error': "Request line tidak valid."}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                if 'transfer-encoding' in headers:
+                    # Body chunked tidak didukung; tanpa Content-Length body-nya akan terbaca kosong
+                    self._write_response(writer, HTTPStatus.LENGTH_REQUIRED,
+                                         {'error': "Transfer-Encoding tidak didukung, kirim body dengan Content-Length."}, False)
+                    break
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_BYTES:
+                    self._write_response(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE if length > 0 else HTTPStatus.BAD_REQUEST,
+                                         {'error': "Content-Length tidak valid atau terlalu besar."}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                self.counters['requests'] += 1
+                extra_headers = None
+                path = target.split('?', 1)[0]
+                start = time.perf_counter()
+                try:
+                    status, payload = HTTPStatus.OK, await self.dispatch(method.upper(), path, body)
+                except ServiceError as exc:
+                    status, payload, extra_headers = HTTPStatus(exc.status), {'error': exc.message}, exc.headers
+                except Exception as exc:
+                    self.counters['errors'] += 1
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(exc).__name__}: {exc}"}
+                # Path yang tidak dikenal digabung supaya jumlah label tetap terbatas
+                known = any(route_path == path for _, route_path in self.routes)
+                observe('chatbot_http_request_seconds', time.perf_counter() - start,
+                        path=path if known else 'other', status=status.value)
+
+                self._write_response(writer, status, payload, keep_alive, extra_headers)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.model_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host, port, prewarm=True, watch=True, **options):
+    service = QueryService(**options)
+    # Port dibuka dulu supaya /health dan /ready bisa dijawab selama startup; dataset (dari startup
+    # bundle jika ada) dan index turunannya dimuat sebelum endpoint data dilayani
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    await asyncio.get_running_loop().run_in_executor(service.executor, load_data_pht)
+    if watch:
+        # Workbook yang berubah dimuat ulang inkremental di background
+        start_data_watcher()
+    if prewarm:
+        prewarm_qa_model()
+    print(f"query_service siap di http://{host}:{port} (bundle: {startup_bundle_stats()['status']})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Layanan HTTP/JSON untuk pencarian dan tanya-jawab data PHT.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--workers', type=int, default=4, help="thread untuk pencarian/render")
+    parser.add_argument('--model-workers', type=int, default=1, help="thread untuk inferensi model QA")
+    parser.add_argument('--inference-workers', type=int, default=INFERENCE_WORKERS,
+                        help="proses worker model QA (model dimuat sekali di forkserver); 0 = model di proses ini")
+    parser.add_argument('--max-pending', type=int, default=64, help="batas request yang sedang diproses")
+    parser.add_argument('--timeout', type=float, default=10.0, help="batas waktu per request (detik)")
+    parser.add_argument('--no-prewarm', action='store_true', help="jangan muat model QA saat startup")
+    parser.add_argument('--no-watch', action='store_true', help="jangan awasi perubahan workbook")
+    args = parser.parse_args()
+
+    model_workers = args.model_workers
+    if args.inference_workers > 0:
+        # Pool dimulai sebelum melayani request supaya request pertama tidak menunggu worker memuat model.
+        # Thread model hanya menunggu hasil pool, jadi jumlahnya cukup untuk mengisi batch semua worker.
+        pool = start_inference_pool(args.inference_workers)
+        model_workers = max(model_workers, pool.workers * pool.max_batch)
+
+    try:
+        asyncio.run(serve(args.host, args.port, prewarm=not args.no_prewarm, watch=not args.no_watch, workers=args.workers,
+                          model_workers=model_workers, max_pending=args.max_pending, timeout=args.timeout))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_inference_pool()
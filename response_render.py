@@ -0,0 +1,166 @@
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+# Template highlight (span kuning) yang dipakai di respons PHT/mitigasi dan tabel pembangkitan
+HIGHLIGHT_TEMPLATE = '<span style="background-color: yellow">{}</span>'
+TABLE_HIGHLIGHT_REPL = r"<span style='background-color: yellow'>\g<0></span>"
+NOT_AVAILABLE = 'tidak tersedia'
+
+
+#################
+### HIGHLIGHT ###
+#################
+
+# Satu pola highlight per query: keyword di-escape (bukan regex) dan tidak peka huruf besar/kecil
+def compile_highlight(keyword):
+    return re.compile(re.escape(keyword), re.IGNORECASE)
+
+# Ganti semua kemunculan keyword dengan versi highlight, sekaligus untuk satu Series
+def highlight_series(series, pattern, replacement):
+    # Escape backslash supaya replacement diperlakukan sebagai teks literal
+    return series.str.replace(pattern, replacement.replace('\\', '\\\\'), regex=True)
+
+# Highlight keyword di semua sel bertipe str (kolom angka dibiarkan), setara dengan applymap lama
+def highlight_frame(df, pattern):
+    out = df.copy()
+    for col in out.columns:
+        series = out[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        elif series.dtype != object:
+            continue
+        is_str = series.map(lambda v: isinstance(v, str)).astype(bool)
+        if is_str.any():
+            out[col] = series.str.replace(pattern, TABLE_HIGHLIGHT_REPL, regex=True).where(is_str, series)
+    return out
+
+
+#########################
+### COLUMN FORMATTING ###
+#########################
+
+# Nilai kolom sebagai teks, nilai kosong diganti dengan `missing`
+def _text(series, missing=NOT_AVAILABLE):
+    return series.astype(object).where(series.notna(), missing).astype(str)
+
+# Huruf besar untuk nilai yang terisi, nilai kosong tetap kosong
+def _upper(series):
+    return series.astype(object).where(series.isna(), series.astype(str).str.upper())
+
+# Ambil kolom jika ada, jika tidak Series berisi nilai default (setara row.get(col, default))
+def _column(result, name, default):
+    if name in result.columns:
+        return result[name]
+    return pd.Series(default, index=result.index, dtype=object)
+
+# Helper function to format mitigation steps and handle NaN values
+def format_mitigation(mitigation):
+    if pd.isna(mitigation):
+        return "Tidak ada mitigasi yang tersedia."
+    # Split each line, and add a "-" before each line to make it a bullet point.
+    lines = str(mitigation).splitlines()
+    return "\n".join([f"- {line.strip()}" for line in lines if line.strip()])
+
+# fn per nilai unik lalu disebar ke semua baris (langkah mitigasi sangat berulang antar baris)
+def _map_unique(series, fn):
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = np.array([fn(value) for value in uniques] + [fn(np.nan)], dtype=object)
+    return pd.Series(mapped[codes], index=series.index, dtype=object)
+
+# Tambahkan nomor "1. ", "2. ", ... di depan setiap baris (mulai dari `start`, misal untuk halaman berikutnya)
+def _numbered(series, start=1):
+    numbers = pd.Series(np.arange(start, start + len(series)), index=series.index).astype(str)
+    return numbers + '. ' + series
+
+
+#################
+### RENDERERS ###
+#################
+
+# Susun kalimat deskriptif PHT untuk semua baris sekaligus (per kolom, bukan per baris).
+# Mengembalikan (respons dengan highlight, respons polos). start = nomor urut baris pertama.
+def render_pht_responses(result, keyword, start=1):
+    dari_gitet = result['Dari Gitet/Gistet'].astype(str).str.upper()
+    ke_gitet = result['Ke Gitet/Gistet'].astype(str).str.upper()
+    sirkit = result['Sirkit ke'].astype(str)
+    panjang = _text(result['Panjang Penghantar'])
+    nominal = _text(result['Nominal Arus (A)'])
+    kemampuan_max = _text(result['Kemampuan Penghantar (A)'])
+    wilayah = _text(_upper(result['Wilayah']))
+    derating = _text(result['Keterangan Penyebab Derating'])
+    persen_derating = _text(pd.to_numeric(result['Deklarasi Kemampuan (%)'], errors='coerce') * 100)
+
+    descriptions = ("SUTET " + dari_gitet + "-" + ke_gitet + " #" + sirkit + " ada di wilayah " + wilayah
+                    + " dengan panjang penghantar " + panjang + " km dan kemampuan maksimal sebesar "
+                    + kemampuan_max + " A, " + persen_derating + " % dari nominal " + nominal
+                    + " A. Alasan Derating: " + derating + ".")
+
+    highlighted = highlight_series(descriptions, compile_highlight(keyword),
+                                   HIGHLIGHT_TEMPLATE.format(keyword.upper()))
+    return "\n".join(_numbered(highlighted, start)), "\n".join(_numbered(descriptions, start))
+
+# Playbook mitigasi (markdown) per baris sebagai Series teks, tanpa highlight
+def mitigasi_descriptions(result):
+    sutet = _column(result, 'SUTET', 'SUTET tidak ditemukan').astype(str)
+    n_1 = _column(result, 'N-1', 'Data N-1 tidak ditemukan').astype(str)
+    n_1_1 = _column(result, 'N-1-1', NOT_AVAILABLE).astype(str)
+    n_1_2 = _column(result, 'N-1-2', NOT_AVAILABLE).astype(str)
+    mit_1 = _map_unique(_column(result, 'Mitigasi_1', NOT_AVAILABLE), format_mitigation)
+    mit_2 = _map_unique(_column(result, 'Mitigasi_2', NOT_AVAILABLE), format_mitigation)
+    mit_3 = _map_unique(_column(result, 'Mitigasi_3', NOT_AVAILABLE), format_mitigation)
+    ket = _column(result, 'Ket', 'tidak ada').astype(str)
+
+    descriptions = ("## ***" + sutet + "***\n\n"
+                    + "Jika terjadi gangguan di ruas **" + sutet + "**, mitigasi yang harus dilakukan adalah sebagai berikut:\n\n"
+                    + "**MITIGASI N-1** di ruas **" + n_1 + "**:\n" + mit_1 + "\n\n"
+                    + "**MITIGASI N-1-1** di ruas **" + n_1_1 + "**:\n" + mit_2 + "\n\n"
+                    + "**MITIGASI N-1-2** di ruas **" + n_1_2 + "**:\n" + mit_3 + "\n\n"
+                    + "**KETERANGAN** : **" + ket + "**")
+    return descriptions
+
+# Susun playbook mitigasi (markdown) untuk semua baris sekaligus.
+# Mengembalikan (respons dengan highlight, respons polos).
+def render_mitigasi_responses(result, keyword):
+    descriptions = mitigasi_descriptions(result)
+    highlighted = highlight_series(descriptions, compile_highlight(keyword),
+                                   HIGHLIGHT_TEMPLATE.format(keyword.upper()))
+    # Use double newline for clarity between entries
+    return "\n\n".join(highlighted), "\n\n".join(descriptions)
+
+
+#################
+### BENCHMARK ###
+#################
+
+# Implementasi lama (iterrows + re.sub per baris), hanya untuk perbandingan throughput
+def _legacy_render_pht(result, keyword):
+    keyword_highlighted = HIGHLIGHT_TEMPLATE.format(keyword.upper())
+    responses = []
+    for _, row in result.iterrows():
+        description = (f"SUTET {row['Dari Gitet/Gistet'].upper()}-{row['Ke Gitet/Gistet'].upper()} #{row['Sirkit ke']} "
+                       f"ada di wilayah {row['Wilayah'].upper()} dengan panjang penghantar {row['Panjang Penghantar']} km "
+                       f"dan kemampuan maksimal sebesar {row['Kemampuan Penghantar (A)']} A, "
+                       f"{row['Deklarasi Kemampuan (%)'] * 100} % dari nominal {row['Nominal Arus (A)']} A. "
+                       f"Alasan Derating: {row['Keterangan Penyebab Derating'] if not pd.isnull(row['Keterangan Penyebab Derating']) else NOT_AVAILABLE}.")
+        responses.append(re.sub(keyword, keyword_highlighted, description, flags=re.IGNORECASE))
+    return "\n".join(f"{i + 1}. {resp}" for i, resp in enumerate(responses))
+
+# Ukur throughput rendering (baris/detik), misal: python response_render.py --rows 50000
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark rendering respons PHT.")
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--keyword', default='500')
+    args = parser.parse_args()
+
+    from synthetic_data import make_pht
+    table = make_pht(args.rows)
+    for name, render in [('iterrows (lama)', _legacy_render_pht),
+                         ('vectorized', lambda df, kw: render_pht_responses(df, kw)[0])]:
+        start = time.perf_counter()
+        render(table, args.keyword)
+        elapsed = time.perf_counter() - start
+        print(f"{name:16} {elapsed:8.3f} s  {args.rows / elapsed:12,.0f} baris/detik")
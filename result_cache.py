@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import OrderedDict
+
+from frame_cache import FrameCache
+from search_index import normalize
+from snapshot_store import frame_version
+
+# Jumlah maksimum hasil query yang disimpan (LRU)
+RESULT_CACHE_SIZE = int(os.environ.get('CHATBOT_RESULT_CACHE_SIZE', '512'))
+
+
+# Cache LRU thread-safe dengan counter hit/miss. Nilai yang disimpan harus immutable
+# (string/tuple) karena dipakai bersama oleh semua sesi Streamlit di proses ini.
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    # Ambil dari cache, atau hitung lalu simpan. compute() dijalankan di luar lock
+    # supaya query lain tidak ikut menunggu.
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    # Hapus semua entry yang key-nya memenuhi predicate
+    def invalidate(self, predicate):
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else None,
+            }
+
+
+# Satu LRU hasil query per DataFrame (per versi workbook), dipakai bersama oleh semua sesi.
+# Entry versi lama ikut dibuang saat DataFrame lamanya di-garbage-collect, sehingga dua versi yang
+# masih dipakai bersamaan (misal saat watcher menukar tabel) tidak saling membuang cache.
+_RESULTS = FrameCache(lambda df: LRUCache(RESULT_CACHE_SIZE))
+
+# Normalisasi keyword untuk cache key: sama dengan normalisasi pencarian (search_index.normalize),
+# sehingga dua keyword berbagi entry hanya jika hasil pencariannya memang sama
+def normalize_keyword(keyword):
+    return normalize(keyword)
+
+# Ambil hasil render untuk (dataset, DataFrame, keyword) dari cache, atau hitung dengan compute()
+def cached_result(dataset, df, keyword, compute):
+    if frame_version(df) is None:
+        # DataFrame yang tidak berasal dari workbook (misal hasil olahan sendiri): tanpa cache
+        return compute()
+    return _RESULTS.get(df).get_or_compute((dataset, normalize_keyword(keyword)), compute)
+
+# Statistik gabungan dari cache semua DataFrame yang masih dipakai
+def result_cache_stats():
+    caches = [cache.stats() for cache in _RESULTS.values()]
+    hits, misses = sum(c['hits'] for c in caches), sum(c['misses'] for c in caches)
+    return {
+        'tables': len(caches),
+        'size': sum(c['size'] for c in caches),
+        'maxsize': RESULT_CACHE_SIZE,
+        'hits': hits,
+        'misses': misses,
+        'evictions': sum(c['evictions'] for c in caches),
+        'hit_ratio': hits / (hits + misses) if hits + misses else None,
+    }
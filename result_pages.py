@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from pembangkit_rollup import paginate_pembangkitan
+from playbook_store import get_playbook_store
+from response_render import render_pht_responses
+from search_index import case_rows
+
+# Hasil pencarian dan daftar panjang ditampilkan per halaman: posisi baris (dari index) dipotong
+# per halaman dan hanya halaman yang diminta yang di-render. Jumlah total = jumlah posisi, tanpa
+# membuat DataFrame/teks untuk seluruh hasil.
+PAGE_SIZE = int(os.environ.get('CHATBOT_PAGE_SIZE', '50'))
+
+
+# Halaman hasil yang di-render saat diminta. page(i) -> (teks dengan highlight, teks polos) atau
+# None jika di luar jangkauan; iterasi menghasilkan halaman satu per satu (generator).
+class ResultPages:
+    def __init__(self, total, n_pages, render_page, title=None):
+        self.total = total
+        self.n_pages = n_pages
+        self.title = title
+        self._render_page = render_page
+
+    def __len__(self):
+        return self.n_pages
+
+    def page(self, number):
+        if not 0 <= number < self.n_pages:
+            return None
+        return self._render_page(number)
+
+    def __iter__(self):
+        for number in range(self.n_pages):
+            yield self._render_page(number)
+
+    def has_more(self, number):
+        return number + 1 < self.n_pages
+
+
+def _chunks(positions, page_size):
+    return [positions[start:start + page_size] for start in range(0, len(positions), page_size)] or [positions]
+
+# Kalimat deskriptif PHT per halaman; nomor urut berlanjut antar halaman
+def pht_pages(df, positions, keyword, page_size=PAGE_SIZE):
+    chunks = _chunks(positions, page_size)
+
+    def render(number):
+        return render_pht_responses(case_rows(df.iloc[chunks[number]]), keyword, start=number * page_size + 1)
+    return ResultPages(len(positions), len(chunks), render)
+
+# Playbook mitigasi per halaman, diambil dari playbook yang sudah di-render saat load
+def mitigasi_pages(df, positions, keyword, page_size=PAGE_SIZE):
+    chunks = _chunks(positions, page_size)
+    store = get_playbook_store(df)
+
+    def render(number):
+        return store.render(chunks[number], keyword)
+    return ResultPages(len(positions), len(chunks), render)
+
+# Tabel pembangkitan per halaman (per Wilayah dengan subtotal), None jika tidak ada yang cocok
+def pembangkitan_pages(rollup, keyword, page_size=PAGE_SIZE):
+    paginated = paginate_pembangkitan(rollup, keyword, page_size)
+    if paginated is None:
+        return None
+    title, total, pages = paginated
+    return ResultPages(total, len(pages), lambda number: pages[number](), title=title)
+
+# Daftar baris (misal daftar penghantar) sebagai tabel teks per halaman, tanpa highlight
+def table_pages(df, positions, columns, page_size=PAGE_SIZE):
+    chunks = _chunks(positions, page_size)
+
+    def render(number):
+        text = df.iloc[chunks[number]][list(columns)].to_string(index=False)
+        return text, text
+    return ResultPages(len(positions), len(chunks), render)
+
+
+#################
+### BENCHMARK ###
+#################
+
+# Waktu diukur tanpa tracemalloc (yang memperlambat alokasi), peak memory di run terpisah
+def _measure(fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+# Bandingkan render penuh dengan halaman pertama pada daftar besar, misal:
+#   python result_pages.py --rows 100000
+if __name__ == '__main__':
+    from synthetic_data import make_pht
+
+    parser = argparse.ArgumentParser(description="Time-to-first-row dan peak memory: render penuh vs per halaman.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    table = make_pht(args.rows)
+    everything = np.arange(len(table))
+    columns = ['Dari Gitet/Gistet', 'Ke Gitet/Gistet', 'Panjang Penghantar']
+    cases = [
+        ('daftar penghantar: to_string penuh', lambda: table[columns].to_string(index=False)),
+        ('daftar penghantar: halaman pertama', lambda: table_pages(table, everything, columns, args.page_size).page(0)),
+        ('respons PHT: render penuh', lambda: render_pht_responses(case_rows(table), 'gitet')),
+        ('respons PHT: halaman pertama', lambda: pht_pages(table, everything, 'gitet', args.page_size).page(0)),
+    ]
+    for name, fn in cases:
+        elapsed, peak_mb = _measure(fn)
+        print(f"{name:38} {elapsed * 1000:10.1f} ms  peak {peak_mb:8.1f} MB")
@@ -0,0 +1,260 @@
+import argparse
+import time
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+
+# Pemisah antar sel dan antar baris di dalam korpus teks. Karakter kontrol ini tidak
+# pernah muncul di keyword, sehingga pencarian tidak akan cocok melintasi batas sel.
+CELL_SEP = '\x1f'
+ROW_SEP = '\x1e'
+NGRAM = 3
+
+# Jika kandidat dari posting list terlalu banyak, scan korpus langsung lebih cepat
+_SCAN_FRACTION = 0.125
+_VERIFY_LIMIT = 2048
+
+# Index hasil patch dibangun ulang penuh jika baris delta melebihi fraksi ini dari tabel
+_COMPACT_FRACTION = 0.1
+
+
+##########################
+### TEXT NORMALIZATION ###
+##########################
+
+# Normalisasi untuk pencarian case-insensitive
+def normalize(text):
+    return str(text).lower()
+
+# Teks per baris: setiap sel di-cast ke str (sama seperti row.astype(str) sebelumnya)
+# lalu digabung dengan CELL_SEP
+def _row_texts(df):
+    if len(df.columns) == 0:
+        return pd.Series([''] * len(df), index=df.index)
+    cols = [df[c].astype(str).str.lower() for c in df.columns]
+    return cols[0].str.cat(cols[1:], sep=CELL_SEP) if len(cols) > 1 else cols[0]
+
+
+####################
+### SEARCH INDEX ###
+####################
+
+# Index pencarian substring: korpus teks ternormalisasi + posting list trigram.
+# Kolom category (lihat compact_frames.py) tidak masuk korpus per baris: keyword dicocokkan ke
+# nilai uniknya, lalu baris dipilih lewat kode category.
+# Dibangun satu kali per DataFrame, query mengembalikan posisi baris (iloc) yang cocok.
+class SearchIndex:
+    def __init__(self, df):
+        categorical = [isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes]
+        # (kode per baris, teks ternormalisasi per kode); kode -1 (kosong) = 'nan' seperti astype(str)
+        self.dictionaries = [(series.cat.codes.to_numpy(), series.cat.categories.astype(str).str.lower().tolist())
+                             for series in (df.iloc[:, i] for i, is_cat in enumerate(categorical) if is_cat)]
+        texts = _row_texts(df.iloc[:, [i for i, is_cat in enumerate(categorical) if not is_cat]]).tolist()
+        self.n_rows = len(texts)
+        self.corpus = ROW_SEP.join(texts)
+
+        # Offset awal setiap baris di dalam korpus (+1 di akhir sebagai batas baris terakhir)
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+        self.starts = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.starts[1:])
+        self._starts_list = self.starts.tolist()
+
+        # Posting dikumpulkan di array int32 (bukan list objek int), lalu dibungkus numpy tanpa salinan
+        postings = defaultdict(lambda: array('i'))
+        for row, text in enumerate(texts):
+            for gram in {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}:
+                postings[gram].append(row)
+        self.postings = {gram: np.frombuffer(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    # Cari baris yang mengandung needle dengan scan korpus (str.find berjalan di C)
+    def _scan(self, needle):
+        hits = []
+        corpus, starts = self.corpus, self._starts_list
+        pos = corpus.find(needle)
+        while pos != -1:
+            row = bisect_right(starts, pos) - 1
+            hits.append(row)
+            if row + 1 >= self.n_rows:
+                break
+            # Lompat ke baris berikutnya: satu baris cukup dihitung sekali
+            pos = corpus.find(needle, starts[row + 1])
+        return np.asarray(hits, dtype=np.intp)
+
+    # Posisi baris yang mengandung keyword sebagai substring literal (case-insensitive)
+    def positions(self, keyword):
+        needle = normalize(keyword)
+        if not needle:
+            return np.arange(self.n_rows, dtype=np.intp)
+        if CELL_SEP in needle or ROW_SEP in needle:
+            return np.empty(0, dtype=np.intp)
+        rows = self._row_positions(needle)
+        if not self.dictionaries:
+            return rows
+
+        hit = np.zeros(self.n_rows, dtype=bool)
+        hit[rows] = True
+        for codes, values in self.dictionaries:
+            matched = [code for code, value in enumerate(values) if needle in value]
+            if needle in 'nan':
+                matched.append(-1)
+            if matched:
+                hit |= np.isin(codes, matched)
+        return np.flatnonzero(hit)
+
+    # Pencarian di korpus per baris (kolom selain category)
+    def _row_positions(self, needle):
+        if len(needle) < NGRAM:
+            return self._scan(needle)
+
+        lists = []
+        for gram in {needle[i:i + NGRAM] for i in range(len(needle) - NGRAM + 1)}:
+            rows = self.postings.get(gram)
+            if rows is None:
+                return np.empty(0, dtype=np.intp)
+            lists.append(rows)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            # Kandidat yang sudah sedikit lebih murah diverifikasi langsung daripada
+            # di-intersect dengan posting list yang besar
+            if len(candidates) <= _VERIFY_LIMIT:
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                return np.empty(0, dtype=np.intp)
+
+        if len(candidates) > self.n_rows * _SCAN_FRACTION:
+            return self._scan(needle)
+
+        # Verifikasi kandidat: trigram cocok belum tentu berarti substring lengkap cocok
+        corpus, starts = self.corpus, self._starts_list
+        return np.asarray([row for row in candidates.tolist()
+                           if corpus.find(needle, starts[row], starts[row + 1] - 1) != -1],
+                          dtype=np.intp)
+
+    def count(self, keyword):
+        return len(self.positions(keyword))
+
+
+###########################
+### INCREMENTAL PATCHES ###
+###########################
+
+# Index untuk versi tabel baru tanpa membangun ulang semuanya: segmen dasar (index versi lama,
+# posisinya dipetakan lewat remap) + segmen delta kecil untuk baris yang ditambah/diubah.
+class PatchedSearchIndex:
+    def __init__(self, base, remap, delta_positions, delta_index, n_rows):
+        self.base = base
+        self.remap = remap
+        self.delta_positions = delta_positions
+        self.delta = delta_index
+        self.n_rows = n_rows
+
+    def positions(self, keyword):
+        if not normalize(keyword):
+            return np.arange(self.n_rows, dtype=np.intp)
+        mapped = self.remap[self.base.positions(keyword)]
+        delta = self.delta_positions[self.delta.positions(keyword)]
+        return np.sort(np.concatenate([mapped[mapped >= 0], delta])).astype(np.intp)
+
+    def count(self, keyword):
+        return len(self.positions(keyword))
+
+# Bangun index untuk new_df dari index old_df + diff baris (lihat dataset_watcher.diff_tables).
+# Patch berikutnya tetap satu tingkat: remap dan delta digabung dengan patch sebelumnya.
+def patch_search_index(old_df, new_df, diff):
+    old = _INDEXES.peek(old_df)
+    if old is None:
+        return None
+    if isinstance(old, PatchedSearchIndex):
+        base = old.base
+        remap, delta = diff.compose(old.remap, old.delta_positions)
+    else:
+        base, remap, delta = old, diff.remap, diff.changed
+
+    if len(delta) > len(new_df) * _COMPACT_FRACTION:
+        index = SearchIndex(new_df)
+    else:
+        index = PatchedSearchIndex(base, remap, delta, SearchIndex(new_df.iloc[delta]), len(new_df))
+    _INDEXES.put(new_df, index)
+    return index
+
+
+###########################
+### PER-DATAFRAME CACHE ###
+###########################
+
+_INDEXES = FrameCache(SearchIndex, name='search_index')
+
+# Ambil index untuk DataFrame ini, bangun jika belum ada
+def get_search_index(df):
+    return _INDEXES.get(df)
+
+# Buang index untuk DataFrame ini (misal setelah DataFrame diubah in-place)
+def invalidate_search_index(df):
+    _INDEXES.invalidate(df)
+
+
+# Ubah huruf besar/kecil hanya pada sel bertipe str, sel lain dibiarkan apa adanya
+def case_rows(rows, upper=False):
+    out = rows.copy()
+    for col in out.columns:
+        series = out[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Baris hasil saja yang dikonversi ke object (jumlahnya kecil dibanding tabel)
+            series = series.astype(object)
+        elif series.dtype != object:
+            continue
+        is_str = series.map(lambda v: isinstance(v, str)).astype(bool)
+        if not is_str.any():
+            continue
+        converted = series.str.upper() if upper else series.str.lower()
+        out[col] = converted.where(is_str, series)
+    return out
+
+# Kembalikan baris asli yang cocok dengan keyword (dengan kasus huruf dinormalisasi), atau None
+def search_rows(df, keyword, upper=False):
+    positions = get_search_index(df).positions(keyword)
+    if not len(positions):
+        return None
+    return case_rows(df.iloc[positions], upper=upper)
+
+
+#################
+### BENCHMARK ###
+#################
+
+def _legacy_search(df, keyword):
+    df_lower = df.applymap(lambda s: s.lower() if isinstance(s, str) else s)
+    return df_lower[df_lower.apply(lambda row: row.astype(str).str.contains(keyword.lower()).any(), axis=1)]
+
+# Ukur latency pencarian pada tabel sintetis, misal: python search_index.py --rows 100000
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark SearchIndex pada tabel sintetis.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--legacy', action='store_true', help="ikut ukur pencarian applymap lama (lambat)")
+    args = parser.parse_args()
+
+    from synthetic_data import make_pht
+    table = make_pht(args.rows)
+    start = time.perf_counter()
+    index = SearchIndex(table)
+    print(f"build: {time.perf_counter() - start:.3f} s untuk {args.rows} baris, {len(index.postings)} trigram")
+
+    for keyword in ['gitet cirata 3', 'upt bekasi', 'cirata', 'tidak-ada', '12']:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            hits = index.positions(keyword)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{keyword!r:14} {len(hits):7d} baris  {elapsed * 1000:8.3f} ms/query")
+
+    if args.legacy:
+        start = time.perf_counter()
+        legacy = _legacy_search(table, 'gitet cirata 3')
+        print(f"legacy applymap 'gitet cirata 3': {len(legacy)} baris  {time.perf_counter() - start:.3f} s/query")
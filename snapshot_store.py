@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+from metrics import stage
+
+# pyarrow bersifat opsional: jika tersedia, snapshot disimpan sebagai Arrow IPC
+# (feather tanpa kompresi) yang dibaca jauh lebih cepat daripada pickle atau Excel.
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # fallback ke pickle
+    pa = None
+    feather = None
+
+# Lokasi penyimpanan snapshot biner dari workbook Excel
+SNAPSHOT_DIR = os.environ.get('CHATBOT_SNAPSHOT_DIR', '.snapshot_cache')
+
+# Satu salinan tabel per proses, dipakai bersama oleh semua sesi Streamlit.
+# key: (path absolut, sheet) -> {'signature', 'version', 'df'}
+_TABLES = {}
+_WATCHED = set()
+_LOCK = threading.Lock()
+
+
+################################
+### SOURCE FILE FINGERPRINTS ###
+################################
+
+# Tanda tangan murah dari file sumber (cukup os.stat, tanpa membaca isi file)
+def _file_signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+# Hash isi file, hanya dihitung jika mtime/ukuran berubah
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Nama dasar file snapshot untuk kombinasi workbook + sheet. Hash path absolut ikut di nama supaya
+# workbook bernama sama di direktori berbeda tidak berbagi (dan saling menimpa) snapshot.
+def _snapshot_base(path, sheet_name):
+    path_hash = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    name = f"{os.path.basename(path)}__{sheet_name}__{path_hash}"
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+###########################
+### SNAPSHOT READ/WRITE ###
+###########################
+
+def _read_meta(base):
+    try:
+        with open(base + '.json', 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Tulis file secara atomik supaya proses lain tidak pernah membaca file setengah jadi
+def _atomic_write(target, write_fn):
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write_fn(tmp)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _write_meta(base, meta):
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+    _atomic_write(base + '.json', write)
+
+def _write_snapshot(df, base):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    if feather is not None:
+        try:
+            # Tanpa kompresi supaya bisa dibaca dengan memory-map
+            _atomic_write(base + '.arrow',
+                          lambda tmp: feather.write_feather(df, tmp, compression='uncompressed'))
+            return 'arrow'
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError, TypeError):
+            # Kolom dengan tipe campuran (misal angka dan teks) tidak bisa dikonversi ke Arrow
+            pass
+    _atomic_write(base + '.pkl', lambda tmp: df.to_pickle(tmp))
+    return 'pickle'
+
+def _read_snapshot(base, fmt):
+    with stage('snapshot_read') as timer:
+        if fmt == 'arrow' and feather is not None:
+            # memory_map hanya menghindari buffer baca di heap: to_pandas tetap menyalin semua kolom
+            # ke DataFrame biasa (teks menjadi object), jadi tabel tetap sepenuhnya ada di memory
+            df = feather.read_table(base + '.arrow', memory_map=True).to_pandas()
+        else:
+            df = pd.read_pickle(base + '.pkl')
+        timer.rows = len(df)
+    return df
+
+def _snapshot_exists(base, fmt):
+    return os.path.exists(base + ('.arrow' if fmt == 'arrow' else '.pkl'))
+
+# Muat dari snapshot jika masih valid, jika tidak parse ulang workbook Excel
+def _load_or_build(path, sheet_name, signature):
+    base = _snapshot_base(path, sheet_name)
+    meta = _read_meta(base)
+
+    if meta is not None and _snapshot_exists(base, meta.get('format')):
+        if meta.get('signature') == signature:
+            return _read_snapshot(base, meta['format']), meta['sha256']
+        # mtime berubah (misal file hanya di-touch/di-copy), cek isi file
+        sha256 = _file_hash(path)
+        if meta.get('sha256') == sha256:
+            meta['signature'] = signature
+            _write_meta(base, meta)
+            return _read_snapshot(base, meta['format']), sha256
+    else:
+        sha256 = _file_hash(path)
+
+    with stage('excel_parse') as timer:
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        timer.rows = len(df)
+    with stage('snapshot_write'):
+        fmt = _write_snapshot(df, base)
+    _write_meta(base, {
+        'source': os.path.abspath(path),
+        'sheet': sheet_name,
+        'signature': signature,
+        'sha256': sha256,
+        'format': fmt,
+    })
+    return df, sha256
+
+
+##################
+### PUBLIC API ###
+##################
+
+# Fungsi untuk memuat sheet Excel melalui snapshot biner dan cache per proses.
+# Workbook hanya di-parse ulang jika mtime/ukuran dan hash isinya berubah.
+# prepare (opsional) dijalankan satu kali per versi data, misal untuk konversi tipe kolom.
+# on_reload(df_lama, df_baru) (opsional) dipanggil saat isi workbook berubah, sebelum versi baru
+# terlihat oleh pembaca lain, misal untuk memperbarui index secara inkremental.
+# Tabel yang diawasi watcher (watch_table) tidak di-stat di setiap pemanggilan kecuali refresh=True.
+def load_excel_cached(path, sheet_name=0, prepare=None, on_reload=None, refresh=False):
+    key = (os.path.abspath(path), sheet_name)
+    entry = _TABLES.get(key)
+    if entry is not None and key in _WATCHED and not refresh:
+        return entry['df']
+
+    signature = _file_signature(path)
+    if entry is not None and entry['signature'] == signature:
+        return entry['df']
+
+    with _LOCK:
+        # Cek ulang: sesi lain mungkin sudah memuat tabel ini saat kita menunggu lock
+        entry = _TABLES.get(key)
+        if entry is not None and entry['signature'] == signature:
+            return entry['df']
+        df, version = _load_or_build(path, sheet_name, signature)
+        if entry is not None and entry['version'] == version:
+            # File hanya di-touch/di-copy ulang: isi sama, DataFrame lama (dan index-nya) tetap dipakai
+            entry['signature'] = signature
+            return entry['df']
+        if prepare is not None:
+            df = prepare(df)
+        if entry is not None and on_reload is not None:
+            on_reload(entry['df'], df)
+        _TABLES[key] = {'signature': signature, 'version': version, 'df': df}
+        return df
+
+# Tandai tabel sebagai diawasi: perubahan file diambil oleh watcher (lihat dataset_watcher.py),
+# bukan dicek dengan os.stat di setiap load
+def watch_table(path, sheet_name=0):
+    _WATCHED.add((os.path.abspath(path), sheet_name))
+
+def unwatch_table(path, sheet_name=0):
+    _WATCHED.discard((os.path.abspath(path), sheet_name))
+
+# True jika workbook berubah (mtime/ukuran) sejak terakhir dimuat, atau belum pernah dimuat
+def table_changed(path, sheet_name=0):
+    entry = _TABLES.get((os.path.abspath(path), sheet_name))
+    return entry is None or entry['signature'] != _file_signature(path)
+
+# Versi (hash isi) dari workbook yang sedang dimuat, atau None jika belum dimuat
+def table_version(path, sheet_name=0):
+    entry = _TABLES.get((os.path.abspath(path), sheet_name))
+    return entry['version'] if entry is not None else None
+
+# DataFrame yang sedang dimuat untuk workbook ini, atau None jika belum dimuat (tanpa os.stat)
+def loaded_table(path, sheet_name=0):
+    entry = _TABLES.get((os.path.abspath(path), sheet_name))
+    return entry['df'] if entry is not None else None
+
+# Tanda tangan file (mtime, ukuran) dari workbook yang sedang dimuat, atau None jika belum dimuat
+def table_signature(path, sheet_name=0):
+    entry = _TABLES.get((os.path.abspath(path), sheet_name))
+    return entry['signature'] if entry is not None else None
+
+# True jika workbook masih sama dengan versi yang dicatat di luar modul ini: tanda tangan file sama,
+# atau hanya mtime yang berubah tetapi hash isinya sama
+def source_unchanged(path, signature, version):
+    try:
+        return _file_signature(path) == list(signature) or _file_hash(path) == version
+    except OSError:
+        return False
+
+# Pasang tabel yang sudah disiapkan di luar (misal dari startup bundle, lihat startup_bundle.py) seolah
+# hasil load_excel_cached, tanpa membaca snapshot. Tabel yang sudah dimuat tidak ditimpa; yang
+# dikembalikan adalah tabel yang akhirnya dipakai proses ini.
+def adopt_table(path, sheet_name, df, version):
+    key = (os.path.abspath(path), sheet_name)
+    with _LOCK:
+        entry = _TABLES.get(key)
+        if entry is not None:
+            return entry['df']
+        _TABLES[key] = {'signature': _file_signature(path), 'version': version, 'df': df}
+        return df
+
+# Versi workbook asal dari DataFrame hasil load_excel_cached, atau None untuk DataFrame lain
+def frame_version(df):
+    for entry in list(_TABLES.values()):
+        if entry['df'] is df:
+            return entry['version']
+    return None
+
+# Kosongkan cache per proses (snapshot di disk tetap dipakai ulang)
+def clear_memory_cache():
+    with _LOCK:
+        _TABLES.clear()
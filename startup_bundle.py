@@ -0,0 +1,294 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import frame_cache
+from metrics import register_collector, stage
+from snapshot_store import adopt_table, frame_version, source_unchanged, table_signature
+
+# Startup bundle: semua tabel yang sudah disiapkan (compact, numerik), struktur turunannya (index
+# pencarian, retriever, graf, playbook) dan preview untuk UI disimpan dalam satu file yang dibangun
+# offline. Proses baru membacanya dengan satu read lalu memasang isinya ke cache per proses, sehingga
+# tidak ada parse Excel/snapshot dan tidak ada index yang dibangun ulang sebelum UI siap.
+# Header JSON di depan file mencatat versi setiap workbook; dataset yang workbook-nya sudah berubah
+# tidak dipakai dan dimuat lewat jalur biasa (snapshot_store + build index). Header juga mencatat
+# versi pandas/numpy dan hash source modul repo yang kelasnya ada di bundle: bundle dari library atau
+# kode yang berbeda tidak di-unpickle (objek dengan atribut lama bisa terpasang tanpa error).
+#
+#   CHATBOT_STARTUP_BUNDLE  path file bundle (kosong = tanpa bundle)
+BUNDLE_PATH = os.environ.get('CHATBOT_STARTUP_BUNDLE', os.path.join('.startup_bundle', 'bundle.pkl'))
+BUNDLE_FORMAT = 2
+BUNDLE_MAGIC = b'CHATBOT-STARTUP-BUNDLE\n'
+
+# Cache turunan (nama FrameCache) yang ikut disimpan. Rollup pembangkitan tidak ikut karena unpickle-nya
+# sama lambatnya dengan membangun ulang; embedding punya cache memory-map sendiri (embedding_index.py).
+BUNDLED_CACHES = ('search_index', 'row_retriever', 'network_graph', 'playbook_store', 'table_preview')
+
+_LOCK = threading.Lock()
+_STATS = {'status': 'not_loaded'}
+
+
+##############
+### WRITER ###
+##############
+
+# Tulis bundle dari tabel hasil load_excel_cached: tables = {nama: (workbook, sheet, df)}.
+# Struktur turunan diambil dari FrameCache yang sudah terisi (jalankan load_data_pht dulu).
+# Semua isi di-pickle dalam satu panggilan supaya objek yang dipakai bersama tetap satu objek.
+def write_bundle(tables, path=BUNDLE_PATH):
+    datasets, payload = {}, {}
+    for name, (source, sheet, df) in tables.items():
+        version, signature = frame_version(df), table_signature(source, sheet)
+        if version is None or signature is None:
+            raise ValueError(f"Tabel {name!r} bukan hasil load_excel_cached, tidak bisa dimasukkan ke bundle.")
+        datasets[name] = {'source': os.path.abspath(source), 'sheet': sheet, 'signature': signature, 'version': version}
+        derived = {}
+        for cache_name in BUNDLED_CACHES:
+            cache = frame_cache(cache_name)
+            value = cache.peek(df) if cache is not None else None
+            if value is not None:
+                derived[cache_name] = value
+        payload[name] = {'df': df, 'derived': derived}
+
+    header = {'format': BUNDLE_FORMAT, 'pandas': pd.__version__, 'numpy': np.__version__,
+              'python': sys.version.split()[0], 'modules': _module_hashes(_class_modules(payload)),
+              'built': time.time(), 'datasets': datasets}
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Tulis ke file sementara lalu rename, supaya proses lain tidak pernah membaca file setengah jadi
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        f.write(body)
+    os.replace(tmp, path)
+    return len(body)
+
+
+# Modul repo (file di direktori ini) yang mendefinisikan kelas struktur turunan di payload, termasuk
+# kelas atribut langsungnya (misal index yang menyimpan objek dari modul lain)
+def _class_modules(payload):
+    package = os.path.dirname(os.path.abspath(__file__))
+    names = set()
+    for item in payload.values():
+        for value in item['derived'].values():
+            for obj in [value, *getattr(value, '__dict__', {}).values()]:
+                module = sys.modules.get(type(obj).__module__)
+                path = getattr(module, '__file__', None)
+                if path and os.path.dirname(os.path.abspath(path)) == package:
+                    names.add(module.__name__)
+    return names
+
+# {modul: sha256 source}, tanpa mengimpor modulnya; None jika source tidak ditemukan
+def _module_hashes(names):
+    hashes = {}
+    for name in sorted(names):
+        spec = importlib.util.find_spec(name)
+        try:
+            with open(spec.origin, 'rb') as f:
+                hashes[name] = hashlib.sha256(f.read()).hexdigest()
+        except (AttributeError, TypeError, OSError):
+            hashes[name] = None
+    return hashes
+
+def _compatible(header):
+    return (header is not None and header.get('format') == BUNDLE_FORMAT and header.get('pandas') == pd.__version__
+            and header.get('numpy') == np.__version__
+            and _module_hashes(header.get('modules', {})) == header.get('modules'))
+
+
+##############
+### LOADER ###
+##############
+
+def _split(data):
+    if not data.startswith(BUNDLE_MAGIC):
+        return None, None
+    end = data.find(b'\n', len(BUNDLE_MAGIC))
+    try:
+        header = json.loads(data[len(BUNDLE_MAGIC):end])
+    except ValueError:
+        return None, None
+    return header, memoryview(data)[end + 1:]
+
+def _fresh(meta, source, sheet):
+    return (meta is not None and meta['source'] == os.path.abspath(source) and meta['sheet'] == sheet
+            and source_unchanged(source, meta['signature'], meta['version']))
+
+def _finish(status, **details):
+    with _LOCK:
+        _STATS.clear()
+        _STATS.update(details, status=status)
+    return {}
+
+# Pasang isi bundle untuk dataset yang workbook-nya belum berubah: sources = {nama: (workbook, sheet)}.
+# Hasilnya {nama: df} untuk dataset yang dipasang (bisa sebagian); dataset lain dimuat lewat
+# jalur biasa. Bundle yang hilang, rusak, atau dari versi pandas/numpy/kode lain diabaikan, tidak pernah error.
+def load_bundle(sources, path=BUNDLE_PATH):
+    if not path:
+        return _finish('disabled')
+    start = time.perf_counter()
+    try:
+        with stage('bundle_read') as timer:
+            with open(path, 'rb') as f:
+                data = f.read()
+            timer.rows = len(data)
+    except FileNotFoundError:
+        return _finish('missing', path=path)
+    except OSError as exc:
+        return _finish('error', path=path, error=repr(exc))
+    read_seconds = time.perf_counter() - start
+
+    header, body = _split(data)
+    if not _compatible(header):
+        return _finish('incompatible', path=path, bytes=len(data))
+    fresh = {name: source for name, source in sources.items() if _fresh(header['datasets'].get(name), *source)}
+    details = dict(path=path, bytes=len(data), built=header['built'], read_ms=1000 * read_seconds,
+                   stale=sorted(set(sources) - set(fresh)))
+    if not fresh:
+        return _finish('stale', **details)
+
+    try:
+        with stage('bundle_unpickle') as timer:
+            payload = pickle.loads(body)
+    except Exception as exc:
+        # Apa pun yang gagal saat unpickle (kelas berubah, data rusak): tabel dimuat lewat jalur biasa
+        return _finish('error', error=repr(exc), **details)
+    del data, body
+
+    tables = {}
+    for name, (source, sheet) in fresh.items():
+        item = payload[name]
+        df = adopt_table(source, sheet, item['df'], header['datasets'][name]['version'])
+        if df is not item['df']:
+            # Tabel sudah dimuat lewat jalur biasa sebelum bundle selesai dibaca
+            continue
+        for cache_name, value in item['derived'].items():
+            cache = frame_cache(cache_name)
+            if cache is not None:
+                cache.put(df, value)
+        tables[name] = df
+    _finish('loaded' if len(tables) == len(sources) else 'partial', unpickle_ms=1000 * timer.seconds,
+            datasets=sorted(tables), **details)
+    return tables
+
+def startup_bundle_stats():
+    with _LOCK:
+        stats = dict(_STATS)
+    if 'built' in stats:
+        stats['age_seconds'] = time.time() - stats['built']
+    return stats
+
+register_collector('startup_bundle', startup_bundle_stats)
+
+
+# Skrip yang dijalankan di proses baru untuk mengukur startup, sama seperti Chatbot_.py sampai UI siap
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import Ask_me_
+from metrics import stage_summary
+imported = time.perf_counter()
+tables = Ask_me_.load_data_pht()
+loaded = time.perf_counter()
+Ask_me_.table_previews(tables)
+ready = time.perf_counter()
+report = {'import_ms': 1000 * (imported - start), 'load_ms': 1000 * (loaded - imported),
+          'preview_ms': 1000 * (ready - loaded), 'ui_ready_ms': 1000 * (ready - start),
+          'heavy_modules': sorted(m for m in ('torch', 'transformers') if m in sys.modules),
+          'bundle': Ask_me_.startup_bundle_stats()['status'],
+          'stages': {s['stage']: s['mean_ms'] * s['count'] for s in stage_summary()}}
+if '--model' in sys.argv:
+    Ask_me_.prewarm_qa_model().join()
+    report['model_ready_ms'] = 1000 * (time.perf_counter() - start)
+print(json.dumps(report))
+"""
+
+# Modul yang paling lama diimpor langsung oleh Ask_me_ (dari output python -X importtime). importtime
+# mencetak anak sebelum induknya, jadi anak Ask_me_ adalah baris satu tingkat di atas baris Ask_me_.
+def _import_breakdown(stderr, top=6):
+    children, pending = [], []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == 'Ask_me_':
+                children = pending
+            pending = []
+        elif depth == 1:
+            pending.append((int(parts[1]) / 1000, name.strip()))
+    return sorted(children, reverse=True)[:top]
+
+
+# Bangun bundle dari workbook di direktori kerja (sebelum Streamlit/query_service dijalankan):
+#   python startup_bundle.py --build
+# atau ukur startup (import, load, UI siap) tanpa dan dengan bundle pada workbook sintetis:
+#   python startup_bundle.py --benchmark --rows 20000
+if __name__ == '__main__':
+    import subprocess
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Startup bundle: build offline atau benchmark cold start.")
+    parser.add_argument('--build', action='store_true', help="bangun bundle dari workbook di direktori ini")
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--model', action='store_true', help="ukur juga waktu sampai model QA siap")
+    args = parser.parse_args()
+
+    if args.build:
+        from Ask_me_ import DATASET_SOURCES, load_data_pht, table_previews
+
+        start = time.perf_counter()
+        tables = load_data_pht()
+        table_previews(tables)
+        size = write_bundle({name: (path, sheet, df) for (name, (path, sheet, _, _)), df
+                             in zip(DATASET_SOURCES.items(), tables)})
+        print(f"bundle {BUNDLE_PATH}: {size / 2**20:.1f} MB  {time.perf_counter() - start:.2f} s")
+    elif args.benchmark:
+        from synthetic_data import write_workbooks
+
+        workdir = tempfile.mkdtemp()
+        write_workbooks(workdir, args.rows)
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=package_dir,
+                   CHATBOT_SNAPSHOT_DIR=os.path.join(workdir, 'snapshots'),
+                   CHATBOT_EMBEDDING_DIR=os.path.join(workdir, 'embeddings'),
+                   CHATBOT_ANSWER_MEMO=os.path.join(workdir, 'answers.sqlite'),
+                   CHATBOT_STARTUP_BUNDLE=os.path.join(workdir, 'bundle.pkl'))
+
+        def probe(label, bundle):
+            run_env = dict(env, CHATBOT_STARTUP_BUNDLE=env['CHATBOT_STARTUP_BUNDLE'] if bundle else '')
+            command = [sys.executable, '-X', 'importtime', '-c', _PROBE] + (['--model'] if args.model else [])
+            done = subprocess.run(command, cwd=workdir, env=run_env, capture_output=True, text=True, check=True)
+            report = json.loads(done.stdout.strip().splitlines()[-1])
+            stages = '  '.join(f"{name} {ms:.0f}" for name, ms in sorted(report['stages'].items(), key=lambda kv: -kv[1])[:4])
+            print(f"{label:22} import {report['import_ms']:7.0f} ms  load {report['load_ms']:8.0f} ms  "
+                  f"UI siap {report['ui_ready_ms']:8.0f} ms  bundle={report['bundle']:8}  [{stages}]")
+            if args.model:
+                print(f"{'':22} model siap {report['model_ready_ms']:8.0f} ms")
+            if report['heavy_modules']:
+                print(f"{'':22} PERINGATAN: diimpor sebelum UI siap: {report['heavy_modules']}")
+            return done.stderr
+
+        print(f"{args.rows} baris per workbook, direktori kerja {workdir}")
+        importtime = probe('excel (cold)', bundle=False)
+        probe('snapshot', bundle=False)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--build'], cwd=workdir, env=env, check=True)
+        print(f"{'build bundle':22} {(time.perf_counter() - start) * 1000:7.0f} ms")
+        probe('bundle', bundle=True)
+        print("import Ask_me_ (ms kumulatif):", ', '.join(f"{name} {ms:.0f}" for ms, name in _import_breakdown(importtime)))
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Generator data sintetis dengan skema yang sama seperti workbook asli (DataPHT, sheet Contingency
+# dan Data_Pembangkit), untuk benchmark dan pengujian tanpa data produksi.
+
+BASE_GITET = ['CIRATA', 'SAGULING', 'BEKASI', 'CIBINONG', 'GANDUL', 'KEMBANGAN', 'DEPOK', 'TASIKMALAYA',
+              'UNGARAN', 'PEDAN', 'KRIAN', 'GRATI', 'PAITON', 'SURALAYA', 'BALARAJA', 'CAWANG',
+              'MUARA TAWAR', 'CILEGON', 'MANDIRANCAN', 'UJUNG BERUNG', 'TANJUNG JATI', 'KESUGIHAN']
+BASE_WILAYAH = ['UPT BEKASI', 'UPT CAWANG', 'UPT DURIKOSAMBI', 'UPT BANDUNG', 'UPT SEMARANG',
+                'UPT SURABAYA', 'UPT MADIUN', 'UPT PROBOLINGGO', 'UPT CILEGON', 'UPT CIREBON']
+PEMBANGKIT_JENIS = ['PLTU', 'PLTGU', 'PLTG', 'PLTA', 'PLTP', 'PLTD', 'PLTS', 'PLTB']
+PEMBANGKIT_WILAYAH = ['JAWA BARAT', 'JAWA TENGAH', 'JAWA TIMUR', 'BANTEN', 'DKI JAKARTA', 'BALI', 'DIY']
+DERATING_CAUSES = ['Jointing rusak', 'Clamp panas', 'Andongan rendah', 'Konduktor aus', 'Temuan hotspot']
+
+
+# Nama unik dari daftar dasar, diberi nomor jika butuh lebih banyak dari daftar dasar
+def _names(prefix, base, count):
+    names = [f"{prefix}{name}" for name in base[:count]]
+    for i in range(len(names), count):
+        names.append(f"{prefix}{base[i % len(base)]} {i // len(base) + 1}")
+    return np.array(names, dtype=object)
+
+def substation_names(n_rows):
+    return _names('GITET ', BASE_GITET, max(len(BASE_GITET), int(np.sqrt(n_rows) * 4)))
+
+
+def make_pht(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    gitets = substation_names(n_rows)
+    dari = rng.integers(0, len(gitets), n_rows)
+    ke = (dari + rng.integers(1, len(gitets), n_rows)) % len(gitets)
+    derating = rng.random(n_rows) < 0.15
+    return pd.DataFrame({
+        'Dari Gitet/Gistet': gitets[dari],
+        'Ke Gitet/Gistet': gitets[ke],
+        'Sirkit ke': rng.integers(1, 3, n_rows),
+        'Panjang Penghantar': rng.uniform(2, 350, n_rows).round(2),
+        'Nominal Arus (A)': rng.choice([2000, 2500, 3000, 4000], n_rows),
+        'Kemampuan Penghantar (A)': rng.choice([1600, 2000, 2500, 3000, 4000], n_rows),
+        'Wilayah': _names('', BASE_WILAYAH, max(len(BASE_WILAYAH), n_rows // 500))[rng.integers(0, max(len(BASE_WILAYAH), n_rows // 500), n_rows)],
+        'Keterangan Penyebab Derating': np.where(derating, rng.choice(np.array(DERATING_CAUSES, dtype=object), n_rows), None),
+        'Deklarasi Kemampuan (%)': np.where(derating, rng.choice([0.6, 0.7, 0.8, 0.9], n_rows), np.nan),
+    })
+
+
+def make_mitigasi(n_rows, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    gitets = substation_names(n_rows)
+
+    def ruas():
+        a = rng.integers(0, len(gitets), n_rows)
+        b = (a + rng.integers(1, len(gitets), n_rows)) % len(gitets)
+        return pd.Series(gitets[a]) + ' - ' + pd.Series(gitets[b])
+
+    def steps():
+        count = rng.integers(1, 4, n_rows)
+        actions = np.array(['Buka PMT bay kopel', 'Manuver beban ke IBT 2', 'Lepas beban 150 kV',
+                            'Koordinasi dengan UP2B', 'Naikkan pembangkit terdekat'], dtype=object)
+        return ["\n".join(rng.choice(actions, c)) for c in count]
+
+    mitigasi_3 = pd.Series(steps(), dtype=object)
+    mitigasi_3[rng.random(n_rows) < 0.3] = None
+    return pd.DataFrame({
+        'SUTET': 'SUTET ' + ruas(),
+        'N-1': ruas(),
+        'Mitigasi_1': steps(),
+        'N-1-1': ruas(),
+        'Mitigasi_2': steps(),
+        'N-1-2': ruas(),
+        'Mitigasi_3': mitigasi_3,
+        'Ket': rng.choice(np.array(['-', 'Siaga', 'Normal'], dtype=object), n_rows),
+    })
+
+
+def make_pembangkit(n_rows, seed=0):
+    rng = np.random.default_rng(seed + 2)
+    perusahaan = _names('PT PEMBANGKIT ', [f"{i:03d}" for i in range(200)], max(20, n_rows // 250))
+    jenis = rng.choice(np.array(PEMBANGKIT_JENIS, dtype=object), n_rows)
+    dmn = rng.uniform(5, 900, n_rows).round(1).astype(object)
+    # Workbook asli kadang berisi '-' di kolom angka
+    dmn[rng.random(n_rows) < 0.01] = '-'
+    return pd.DataFrame({
+        'Perusahaan': perusahaan[rng.integers(0, len(perusahaan), n_rows)],
+        'Jenis': jenis,
+        'Unit ': pd.Series(jenis) + ' UNIT ' + pd.Series(np.arange(n_rows)).astype(str),
+        'Wilayah': rng.choice(np.array(PEMBANGKIT_WILAYAH, dtype=object), n_rows),
+        'DMN': dmn,
+        'TML': rng.uniform(0, 700, n_rows).round(1),
+    })
+
+
+# Tulis ketiga workbook dengan nama file dan sheet yang sama seperti di Ask_me_.py
+def write_workbooks(directory, n_rows, seed=0):
+    from Ask_me_ import MITIGASI_FILE, MITIGASI_SHEET, PEMBANGKITAN_FILE, PHT_FILE
+
+    os.makedirs(directory, exist_ok=True)
+    make_pht(n_rows, seed).to_excel(os.path.join(directory, PHT_FILE), index=False)
+    with pd.ExcelWriter(os.path.join(directory, MITIGASI_FILE)) as writer:
+        make_mitigasi(n_rows, seed).to_excel(writer, sheet_name=MITIGASI_SHEET, index=False)
+    make_pembangkit(n_rows, seed).to_excel(os.path.join(directory, PEMBANGKITAN_FILE), index=False)
@@ -0,0 +1,86 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Modul repo ada di root (bukan package), baseline_ask_me.py ada di direktori ini
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR)
+
+# Konstanta lokasi cache dibaca saat modul diimpor, jadi harus diset sebelum import modul repo.
+# Semua cache di disk diarahkan ke direktori sementara; bundle, cache jawaban dan inference pool mati.
+_CACHE_DIR = tempfile.mkdtemp(prefix='chatbot-tests-')
+os.environ['CHATBOT_SNAPSHOT_DIR'] = os.path.join(_CACHE_DIR, 'snapshots')
+os.environ['CHATBOT_EMBEDDING_DIR'] = os.path.join(_CACHE_DIR, 'embeddings')
+os.environ['CHATBOT_STARTUP_BUNDLE'] = ''
+os.environ['CHATBOT_ANSWER_MEMO'] = ''
+os.environ['CHATBOT_INFERENCE_WORKERS'] = '0'
+
+# Jumlah baris per workbook sintetis yang dipakai bersama oleh semua test
+N_ROWS = 1000
+
+
+# Baseline memakai DataFrame.applymap yang sudah deprecated di pandas 2.1
+def pytest_configure(config):
+    config.addinivalue_line('filterwarnings', 'ignore:DataFrame.applymap has been deprecated:FutureWarning')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_CACHE_DIR, ignore_errors=True)
+
+
+# Workbook sintetis (synthetic_data.py) di direktori sementara; direktori kerja dipindah ke sana
+# karena Ask_me_ membaca workbook dengan path relatif, sama seperti saat dijalankan Streamlit
+@pytest.fixture(scope='session')
+def workbook_dir(tmp_path_factory):
+    from synthetic_data import write_workbooks
+
+    directory = tmp_path_factory.mktemp('workbooks')
+    write_workbooks(str(directory), N_ROWS)
+    previous = os.getcwd()
+    os.chdir(directory)
+    yield directory
+    os.chdir(previous)
+
+# Tabel hasil Ask_me_.load_data_pht() (pht, mitigasi, pembangkitan)
+@pytest.fixture(scope='session')
+def tables(workbook_dir, stub_qa_model):
+    import Ask_me_
+
+    return Ask_me_.load_data_pht()
+
+@pytest.fixture(scope='session')
+def _baseline_source(workbook_dir):
+    import baseline_ask_me
+
+    return baseline_ask_me.load_data_pht()
+
+# Tabel yang sama seperti dibaca Ask_me_ baseline (pd.read_excel), salinan baru per test karena
+# fungsi baseline pembangkitan memutasi DataFrame-nya
+@pytest.fixture
+def baseline_tables(_baseline_source):
+    return tuple(df.copy() for df in _baseline_source)
+
+# Model QA stub (benchmark.py) supaya test tidak butuh transformers/torch atau jaringan
+@pytest.fixture(scope='session', autouse=True)
+def stub_qa_model():
+    import baseline_ask_me
+    from benchmark import StubQAPipeline
+    from qa_registry import use_qa_model
+
+    model = StubQAPipeline()
+    use_qa_model(model, model_id='stub')
+    baseline_ask_me.qa_model = model
+    return model
+
+# Direktori kerja baru dengan workbook sendiri, untuk test yang mengubah isi workbook
+@pytest.fixture
+def fresh_workdir(tmp_path, monkeypatch):
+    from synthetic_data import write_workbooks
+
+    write_workbooks(str(tmp_path), 200)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
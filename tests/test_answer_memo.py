@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+import Ask_me_
+from answer_memo import AnswerMemo
+from context_retrieval import narrow_context
+from qa_registry import qa_model_id
+
+QUESTION = "Berapa panjang penghantar?"
+
+
+class CountingMemo(AnswerMemo):
+    def __init__(self, path):
+        super().__init__(path)
+        self.synced = []
+
+    def sync_version(self, dataset, version):
+        self.synced.append(dataset)
+        return super().sync_version(dataset, version)
+
+
+def test_memo_is_on_by_default(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != 'CHATBOT_ANSWER_MEMO'}
+    done = subprocess.run([sys.executable, '-c', 'import answer_memo; print(answer_memo.get_answer_memo().path)'],
+                          cwd=tmp_path, env=dict(env, PYTHONPATH=os.path.dirname(Ask_me_.__file__)),
+                          capture_output=True, text=True, check=True)
+    assert done.stdout.strip() == os.path.join('.answer_memo', 'answers.sqlite')
+    assert (tmp_path / '.answer_memo' / 'answers.sqlite').exists()
+
+
+def test_processes_on_older_versions_keep_newer_answers(tmp_path):
+    path = str(tmp_path / 'answers.sqlite')
+    old, new = AnswerMemo(path), AnswerMemo(path)
+    old.sync_version('pht', 'v1')
+    old.put(QUESTION, 'konteks lama', 'stub', 'lama', 0.1, version='v1')
+    # Proses baru memuat versi baru: jawaban versi lama dibuang
+    assert new.sync_version('pht', 'v2') == 1
+    new.put(QUESTION, 'konteks baru', 'stub', 'baru', 0.1, version='v2')
+    # Proses lama yang memuat ulang tabel v1 tidak menghapus jawaban v2
+    assert old.sync_version('pht', 'v1') == 0
+    assert new.get(QUESTION, 'konteks baru', 'stub') == 'baru'
+    # Dataset lain punya urutan versinya sendiri
+    assert new.sync_version('mitigasi', 'v9') == 0
+    assert new.get(QUESTION, 'konteks baru', 'stub') == 'baru'
+    # Jawaban yang ditulis proses lama setelah itu ikut dibuang saat versi yang lebih baru lagi dimuat
+    old.put(QUESTION, 'konteks lama', 'stub', 'lama', 0.1, version='v1')
+    assert new.sync_version('pht', 'v3') == 2
+
+
+def test_versions_sync_once_per_frame(fresh_workdir, monkeypatch):
+    memo = CountingMemo(str(fresh_workdir / 'answers.sqlite'))
+    monkeypatch.setattr(Ask_me_, 'get_answer_memo', lambda: memo)
+    for _ in range(3):
+        Ask_me_.load_data_pht()
+    assert sorted(memo.synced) == sorted(Ask_me_.DATASET_SOURCES)
+
+    pht = pd.read_excel(Ask_me_.PHT_FILE)
+    pht.loc[0, 'Keterangan Penyebab Derating'] = 'Clamp panas'
+    pht.to_excel(Ask_me_.PHT_FILE, index=False)
+    Ask_me_.refresh_data()
+    Ask_me_.load_data_pht()
+    assert memo.synced.count('pht') == 2 and len(memo.synced) == len(Ask_me_.DATASET_SOURCES) + 1
+
+
+def test_batched_answers_are_stored_with_version(tables, monkeypatch, tmp_path):
+    memo = AnswerMemo(str(tmp_path / 'answers.sqlite'))
+    monkeypatch.setattr(Ask_me_, 'get_answer_memo', lambda: memo)
+    context = Ask_me_.build_context_and_response(tables[0], 'cirata')[0]
+    answers = Ask_me_.get_answers([QUESTION], [context], version='v1')
+    narrowed = narrow_context(QUESTION, context, Ask_me_.QA_TOP_K)
+    assert memo.get(QUESTION, narrowed, qa_model_id()) == answers[0]
+
+    memo.sync_version('pht', 'v1')
+    assert memo.sync_version('pht', 'v2') == 1
+    assert memo.get(QUESTION, narrowed, qa_model_id()) is None
@@ -0,0 +1,52 @@
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+from answer_store import get_answer_store, patch_answer_store
+
+QUESTIONS = {
+    'derating': "Penghantar yang derating mana saja?",
+    'wilayah_pht': "Wilayah PHT mana saja?",
+    'daftar_penghantar': "Daftar penghantar PHT",
+    'jumlah_penghantar': "Berapa jumlah penghantar?",
+    'arus_terbesar': "Penghantar dengan arus terbesar",
+}
+
+
+@pytest.mark.parametrize('intent', sorted(QUESTIONS))
+def test_intent_answer_matches_baseline(tables, baseline_tables, intent):
+    question = QUESTIONS[intent]
+    assert Ask_me_.detect_intent(question) == intent
+    expected = baseline_ask_me.handle_user_question(question, baseline_tables[0], baseline_tables[1])
+    assert Ask_me_.answer_intent(intent, tables[0]) == expected
+
+
+def test_total_pht_matches_baseline(tables, baseline_tables):
+    for wilayah in ('bekasi', 'UPT', 'zzz'):
+        expected = baseline_ask_me.handle_user_question("total pht", baseline_tables[0], baseline_tables[1],
+                                                        wilayah=wilayah)
+        # Baseline mencetak float apa adanya, answer store membulatkan ke 2 desimal
+        total = float(expected.rsplit(' adalah ', 1)[1].split()[0])
+        assert Ask_me_.answer_intent('total_pht', tables[0], wilayah=wilayah) == (
+            f"Total PHT di wilayah {wilayah.capitalize()} adalah {round(total, 2)} km.")
+
+
+def test_versions_in_use_keep_their_own_answers(tables):
+    full, part = tables[0], tables[0].head(100)
+    for _ in range(2):
+        assert get_answer_store(full).answer('jumlah_penghantar') == f"Jumlah penghantar PHT: {len(full)}"
+        assert get_answer_store(part).answer('jumlah_penghantar') == "Jumlah penghantar PHT: 100"
+        assert get_answer_store(part).total_pht('upt') != get_answer_store(full).total_pht('upt')
+    assert get_answer_store(full) is get_answer_store(full)
+
+
+def test_patch_rebuilds_only_changed_parts(tables):
+    old = tables[0].copy()
+    new = old.copy()
+    new['Keterangan Penyebab Derating'] = new['Keterangan Penyebab Derating'].astype(object)
+    new.loc[new.index[0], 'Keterangan Penyebab Derating'] = 'Clamp panas'
+    get_answer_store(old)
+    store = patch_answer_store(old, new)
+    assert store is get_answer_store(new)
+    assert store.rebuilt == ['derating']
+    assert store.parts['wilayah_totals'] is get_answer_store(old).parts['wilayah_totals']
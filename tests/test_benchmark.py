@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmark import compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Dijalankan di proses sendiri: stage load mengosongkan cache tabel per proses
+def test_benchmark_reports_every_stage(tmp_path):
+    output = tmp_path / 'report.json'
+    subprocess.run([sys.executable, os.path.join(ROOT, 'benchmark.py'), '--sizes', '200', '--repeat', '1',
+                    '--output', str(output)], cwd=tmp_path, capture_output=True, check=True)
+    report = json.loads(output.read_text())
+    stages = report['results']['200']
+    assert set(stages) == {'generate', 'load', 'index', 'search', 'render', 'qa'}
+    for metrics in stages.values():
+        assert all(values['median_ms'] >= 0 for values in metrics.values())
+    # Laporan yang sama dibandingkan dengan dirinya sendiri tidak pernah dianggap regresi
+    assert not any(regression for *_, regression in compare(report, report))
+
+
+def test_compare_flags_slowdowns_above_threshold():
+    def report(ms):
+        return {'results': {'1000': {'search': {'pht:a': {'median_ms': ms}, 'pht:fast': {'median_ms': 0.001}}}}}
+
+    rows = {key: regression for key, _, _, _, regression in compare(report(10.0), report(13.0), threshold=0.25)}
+    assert rows == {'1000/search/pht:a': True, '1000/search/pht:fast': False}
+    assert not compare(report(10.0), report(12.0), threshold=0.25)[0][4]
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+import baseline_ask_me
+from compact_frames import compact_frame, memory_report
+from pembangkit_rollup import coerce_pembangkit_numeric
+
+
+def _plain(df):
+    return df.astype({col: object for col, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)})
+
+
+def test_loaded_tables_hold_baseline_values(tables, baseline_tables):
+    expected = baseline_tables[:2] + (coerce_pembangkit_numeric(baseline_tables[2]),)
+    for table, baseline in zip(tables, expected):
+        pd.testing.assert_frame_equal(_plain(table), baseline, check_dtype=False)
+        assert table.to_string() == baseline.to_string()
+    assert any(isinstance(dtype, pd.CategoricalDtype) for dtype in tables[0].dtypes)
+
+
+def test_compact_tables_use_less_memory(tables, baseline_tables):
+    for table, baseline in zip(tables, baseline_tables):
+        assert memory_report(table)['bytes'] < memory_report(baseline)['bytes']
+
+
+@pytest.mark.parametrize('keyword', ['cirata', 'upt', '2500'])
+def test_compact_pht_answers_match_baseline(tables, baseline_tables, keyword):
+    assert baseline_ask_me.build_context_and_response(tables[0], keyword) == (
+        baseline_ask_me.build_context_and_response(baseline_tables[0], keyword))
+
+
+def test_mixed_and_wide_columns_are_left_alone():
+    df = pd.DataFrame({'mixed': ['a', 1, 'a', 'b'], 'unique': list('wxyz'), 'big': [0, 1, 2, 2**40]})
+    compact = compact_frame(df)
+    assert compact.dtypes.tolist() == df.dtypes.tolist()
+    small = compact_frame(df.assign(big=[0, 1, 2, 3]), max_unique=0.75)
+    assert str(small['big'].dtype) == 'int32' and str(small['unique'].dtype) == 'object'
+
+
+def test_integer_bounds_and_untouched_dtypes():
+    limit = 2**31 - 1
+    df = pd.DataFrame({'edge': [-limit - 1, limit], 'over': [0, limit + 1], 'flag': [True, False],
+                       'ratio': [0.5, 0.25], 'empty': [None, None]})
+    compact = compact_frame(df)
+    assert [str(dtype) for dtype in compact.dtypes] == ['int32', 'int64', 'bool', 'float64', 'object']
+    assert compact['edge'].tolist() == [-limit - 1, limit]
+    # Input tidak diubah
+    assert str(df['edge'].dtype) == 'int64'
+    assert compact_frame(df.iloc[:0]).dtypes.tolist() == df.dtypes.tolist()
+
+
+def test_compact_rows_hash_like_plain_rows():
+    # diff_tables membandingkan hash baris versi lama (compact) dengan versi baru dari workbook
+    # Sel kosong dari read_excel berupa NaN
+    df = pd.DataFrame({'Wilayah': ['UPT A', 'UPT A', float('nan'), 'UPT B'], 'Sirkit': [1, 2, 1, 2]})
+    compact = compact_frame(df)
+    assert isinstance(compact['Wilayah'].dtype, pd.CategoricalDtype)
+    assert (pd.util.hash_pandas_object(_plain(compact).astype({'Sirkit': 'int64'}), index=False)
+            == pd.util.hash_pandas_object(df, index=False)).all()
+    assert compact.to_string() == df.to_string()
+
+
+def test_memory_report_totals(tables):
+    for table in tables:
+        report = memory_report(table)
+        assert report['rows'] == len(table)
+        assert report['bytes'] == report['index_bytes'] + sum(col['bytes'] for col in report['columns'])
+        assert [col['column'] for col in report['columns']] == [str(col) for col in table.columns]
@@ -0,0 +1,54 @@
+import baseline_ask_me
+import Ask_me_
+import context_retrieval
+from context_retrieval import narrow_context
+
+
+def _contexts(baseline_tables):
+    return [baseline_ask_me.build_context_and_response(baseline_tables[0], keyword)[0]
+            for keyword in ('cirata', 'bekasi', 'zzz', 'jointing')]
+
+
+def test_narrowed_context_keeps_header_and_original_rows(baseline_tables):
+    context = _contexts(baseline_tables)[0]
+    lines = context.splitlines()
+    narrowed = narrow_context("Berapa panjang penghantar Cirata?", context, 5).splitlines()
+    assert len(lines) > 6 and len(narrowed) == 6
+    assert narrowed[0] == lines[0] and set(narrowed[1:]) <= set(lines[1:])
+
+
+def test_free_text_context_is_not_narrowed():
+    context = "\n".join(f"Catatan {i}: penghantar ke-{i} sedang dalam pemeliharaan rutin." for i in range(12))
+    assert narrow_context("Penghantar mana yang dipelihara?", context, 5) == context
+
+
+def test_context_index_is_reused(baseline_tables):
+    context = _contexts(baseline_tables)[1]
+    before = context_retrieval._CONTEXT_INDEXES.stats()
+    first = narrow_context("Berapa panjang penghantar Bekasi?", context, 5)
+    second = narrow_context("Wilayah mana?", context, 5)
+    after = context_retrieval._CONTEXT_INDEXES.stats()
+    assert first != context and second != context
+    assert after['misses'] - before['misses'] <= 1 and after['hits'] - before['hits'] >= 1
+
+
+def test_short_context_is_answered_like_baseline(baseline_tables):
+    question = "Apa alasan derating?"
+    for context in _contexts(baseline_tables):
+        short = context and "\n".join(context.splitlines()[:Ask_me_.QA_TOP_K + 1])
+        assert Ask_me_.get_answer(question, short) == baseline_ask_me.get_answer(question, short)
+
+
+def test_batched_answers_match_single_answers(baseline_tables):
+    contexts = _contexts(baseline_tables)
+    questions = ["Berapa panjang penghantar?", "Wilayah mana?", "Apa alasan derating?", "Berapa nominal arus?"]
+    single = [Ask_me_.get_answer(q, c) for q, c in zip(questions, contexts)]
+    assert Ask_me_.get_answers(questions, contexts) == single
+    assert single[2] == Ask_me_.NOT_FOUND_MESSAGE
+
+
+def test_answer_from_data_uses_search_rows(tables):
+    assert Ask_me_.answer_from_data("Berapa panjang?", tables[0], keyword='zzz') == Ask_me_.NOT_FOUND_MESSAGE
+    context, _ = Ask_me_.build_context_and_response(tables[0], 'cirata')
+    question = "Berapa panjang penghantar Cirata?"
+    assert Ask_me_.answer_from_data(question, tables[0], keyword='cirata') == Ask_me_.get_answer(question, context)
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import baseline_ask_me
+import Ask_me_
+import snapshot_store
+from dataset_watcher import DatasetWatcher, diff_tables
+from search_index import SearchIndex, get_search_index
+
+KEYWORDS = ['cirata', 'upt bekasi', 'xyz-baru', '12', 'rusak', 'baru']
+
+
+def _edit(df):
+    edited = df.copy()
+    edited.loc[3, 'Keterangan Penyebab Derating'] = 'Clamp panas xyz-baru'
+    edited.loc[7, 'Deklarasi Kemampuan (%)'] = 0.5
+    edited = edited.drop(index=11)
+    new = edited.iloc[:1].copy()
+    new['Dari Gitet/Gistet'], new['Sirkit ke'] = 'GITET BARU', 9
+    return pd.concat([edited.iloc[:50], new, edited.iloc[50:]], ignore_index=True)
+
+
+def _assert_matches_workbook(pht):
+    expected = baseline_ask_me.load_data_pht()[0]
+    index = get_search_index(pht)
+    for keyword in KEYWORDS:
+        assert np.array_equal(index.positions(keyword), SearchIndex(pht).positions(keyword)), keyword
+        assert Ask_me_.build_context_and_response(pht, keyword) == baseline_ask_me.build_context_and_response(
+            expected, keyword), keyword
+    assert Ask_me_.answer_intent('derating', pht) == baseline_ask_me.handle_user_question(
+        "derating", expected, None)
+
+
+def test_watcher_patch_round_trip(fresh_workdir):
+    original_pht = Ask_me_.load_data_pht()[0]
+    original = pd.read_excel(Ask_me_.PHT_FILE)
+    watcher = DatasetWatcher(Ask_me_.refresh_data, interval=3600)
+
+    _edit(original).to_excel(Ask_me_.PHT_FILE, index=False)
+    changes = watcher.check()
+    assert changes == {'pht': {'inserted': 1, 'updated': 2, 'deleted': 1, 'unchanged': len(original) - 3}}
+    edited_pht = Ask_me_.load_data_pht()[0]
+    assert edited_pht is not original_pht
+    # Index di-patch dari versi lama, bukan dibangun ulang
+    assert type(get_search_index(edited_pht)) is not SearchIndex
+    _assert_matches_workbook(edited_pht)
+
+    # Kembali ke isi semula: hasil harus sama lagi dengan workbook asli
+    original.to_excel(Ask_me_.PHT_FILE, index=False)
+    assert set(watcher.check()) == {'pht'}
+    restored_pht = Ask_me_.load_data_pht()[0]
+    _assert_matches_workbook(restored_pht)
+    assert Ask_me_.answer_intent('jumlah_penghantar', restored_pht) == f"Jumlah penghantar PHT: {len(original)}"
+
+
+def test_diff_tables_reports_row_changes(fresh_workdir):
+    old = pd.read_excel(Ask_me_.PHT_FILE)
+    diff = diff_tables(old, _edit(old), Ask_me_.DATASET_SOURCES['pht'][3])
+    assert diff.summary() == {'inserted': 1, 'updated': 2, 'deleted': 1, 'unchanged': len(old) - 3}
+
+
+def test_diff_pairs_duplicate_keys_and_detects_schema_change():
+    old = pd.DataFrame({'SUTET': ['A', 'A', 'B'], 'Ket': ['x', 'y', 'z']})
+    new = pd.DataFrame({'SUTET': ['B', 'A', 'A', 'A'], 'Ket': ['z', 'x', 'y2', 'w']})
+    diff = diff_tables(old, new, ('SUTET',))
+    # Kemunculan ke-n key yang sama dipasangkan dengan kemunculan ke-n di versi baru
+    assert diff.remap.tolist() == [1, -1, 0] and diff.changed.tolist() == [2, 3]
+    assert diff.summary() == {'inserted': 1, 'updated': 1, 'deleted': 0, 'unchanged': 2}
+    assert diff_tables(old, new.rename(columns={'Ket': 'Keterangan'}), ('SUTET',)) is None
+    # Tanpa kolom key: baris dipasangkan lewat hash isinya
+    assert diff_tables(old, old.iloc[::-1].reset_index(drop=True), ('Tidak Ada',)).is_empty
+
+
+def test_consecutive_patches_stay_one_level():
+    v1 = pd.DataFrame({'SUTET': list('abcdefghij'), 'Ket': ['ok'] * 10})
+    v2 = v1.copy()
+    v2.loc[2, 'Ket'] = 'rusak'
+    v3 = pd.concat([v2.drop(index=0), pd.DataFrame({'SUTET': ['k'], 'Ket': ['rusak baru']})], ignore_index=True)
+    first, second = diff_tables(v1, v2, ('SUTET',)), diff_tables(v2, v3, ('SUTET',))
+    remap, delta = second.compose(first.remap, first.changed)
+    # Baris 'c' (diubah di v2) tetap di segmen delta dengan posisi barunya; baris 'a' dihapus
+    assert remap.tolist() == [-1, 0, -1, 2, 3, 4, 5, 6, 7, 8] and delta.tolist() == [1, 9]
+
+
+def test_large_edit_rebuilds_index_and_errors_keep_old_version(fresh_workdir, monkeypatch):
+    original_pht = Ask_me_.load_data_pht()[0]
+    watcher = DatasetWatcher(Ask_me_.refresh_data, interval=3600)
+
+    # Workbook yang tidak bisa dibaca: error dicatat, versi lama tetap dilayani
+    def broken(*args, **kwargs):
+        raise ValueError("workbook rusak")
+    edited = pd.read_excel(Ask_me_.PHT_FILE)
+    edited['Keterangan Penyebab Derating'] = 'diganti semua'
+    edited.to_excel(Ask_me_.PHT_FILE, index=False)
+    with monkeypatch.context() as patch:
+        patch.setattr(snapshot_store.pd, 'read_excel', broken)
+        assert watcher.check() is None
+    assert watcher.stats['errors'] == 1 and 'workbook rusak' in watcher.stats['last_error']
+    assert snapshot_store.loaded_table(Ask_me_.PHT_FILE, 0) is original_pht
+
+    # Hampir semua baris berubah: index dibangun ulang penuh, bukan di-patch
+    assert watcher.check()['pht']['updated'] == len(edited)
+    reloaded = Ask_me_.load_data_pht()[0]
+    assert type(get_search_index(reloaded)) is SearchIndex
+    _assert_matches_workbook(reloaded)
+
+
+def test_touch_without_edit_is_not_a_change(fresh_workdir):
+    pht = Ask_me_.load_data_pht()[0]
+    stat = os.stat(Ask_me_.PHT_FILE)
+    os.utime(Ask_me_.PHT_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    watcher = DatasetWatcher(Ask_me_.refresh_data, interval=3600)
+    assert watcher.check() == {} and watcher.stats['reloads'] == 0
+    assert Ask_me_.load_data_pht()[0] is pht
@@ -0,0 +1,61 @@
+import os
+
+import Ask_me_
+import embedding_index
+from embedding_index import EmbeddingIndex, get_embedding_index, prewarm_embedding_index, ready_embedding_index
+
+
+def test_fuzzy_search_waits_for_background_build(tables):
+    df = tables[0].copy()
+    exact = Ask_me_.get_response_page('pht', df, 'ciratta', fuzzy=True)
+    assert exact == Ask_me_.get_response_page('pht', df, 'ciratta')
+    assert Ask_me_.fuzzy_keyword('pht', df, 'ciratta') in (None, 'cirata')
+
+    prewarm_embedding_index(df).join()
+    assert ready_embedding_index(df) is get_embedding_index(df)
+    text, total, _ = Ask_me_.get_response_page('pht', df, 'ciratta', fuzzy=True)
+    assert text.startswith(Ask_me_.FUZZY_NOTE.format(keyword='CIRATTA', term='cirata'))
+    assert total == Ask_me_.count_matches(df, 'cirata')
+
+
+def test_loaded_tables_are_prewarmed(tables):
+    for df in tables:
+        prewarm_embedding_index(df).join()
+        assert ready_embedding_index(df) is not None
+
+
+def test_old_versions_are_removed_after_build(tables, tmp_path, monkeypatch):
+    versions = iter(['aa11', 'bb22', 'cc33'])
+    monkeypatch.setattr(embedding_index, 'frame_version', lambda df: next(versions))
+    pht, mitigasi = tables[0].head(50), tables[1].head(50)
+    EmbeddingIndex(pht, str(tmp_path))
+    EmbeddingIndex(mitigasi, str(tmp_path))
+    first = sorted(os.listdir(tmp_path))
+    assert len(first) == 4
+
+    index = EmbeddingIndex(pht, str(tmp_path))
+    names = sorted(os.listdir(tmp_path))
+    pht_name = embedding_index._cache_name(pht, 'cc33')
+    mitigasi_name = embedding_index._cache_name(mitigasi, 'bb22')
+    assert names == sorted([f'{pht_name}.json', f'{pht_name}.npy', f'{mitigasi_name}.json', f'{mitigasi_name}.npy'])
+    assert index.similar_terms('ciratta')[0][0] == 'cirata'
+
+
+def test_failed_build_is_logged_and_retried(tables, monkeypatch, caplog):
+    df = tables[0].head(30).copy()
+    failures = []
+
+    def broken(terms, dim=embedding_index.EMBEDDING_DIM):
+        failures.append(1)
+        raise OSError("disk penuh")
+
+    monkeypatch.setattr(embedding_index, 'embed_terms', broken)
+    prewarm_embedding_index(df).join()
+    assert ready_embedding_index(df) is None
+    assert 'disk penuh' in caplog.text
+    prewarm_embedding_index(df).join()
+    assert len(failures) >= 2
+
+    monkeypatch.undo()
+    prewarm_embedding_index(df).join()
+    assert ready_embedding_index(df) is get_embedding_index(df)
@@ -0,0 +1,74 @@
+import threading
+
+import baseline_ask_me
+import Ask_me_
+from federated_search import federated_search, gather, register_source, run_each, search_sources, unregister_source
+
+
+def test_tabs_match_baseline_responses(tables, baseline_tables):
+    results = gather(federated_search('cirata', page_size=10_000))
+    assert set(results) == set(Ask_me_.SEARCH_TABS)
+    assert all(result.ok for result in results.values())
+    expected = {
+        'pht': baseline_ask_me.build_context_and_response(baseline_tables[0], 'cirata')[1],
+        'mitigasi': baseline_ask_me.build_context_and_response_mitigasi(baseline_tables[1], 'cirata')[1],
+    }
+    for name, response in expected.items():
+        [(highlighted, total, has_more)] = results[name].value
+        assert highlighted == response and not has_more
+
+
+def test_per_source_options(tables):
+    results = gather(federated_search('gitet', names=['pht'], page_size=10, per_source={'pht': {'pages': 3}}))
+    pages = results['pht'].value
+    assert len(pages) == 3
+    assert pages == [Ask_me_.get_response_page('pht', tables[0], 'gitet', page, page_size=10) for page in range(3)]
+
+
+def test_slow_and_failing_sources_do_not_block_others():
+    release = threading.Event()
+
+    def fail():
+        raise ValueError("rusak")
+
+    try:
+        results = list(run_each({'slow': release.wait, 'fast': lambda: 'ok', 'broken': fail},
+                                timeouts={'slow': 0.2}))
+    finally:
+        release.set()
+    by_name = {result.name: result for result in results}
+    assert [result.name for result in results][-1] == 'slow'
+    assert by_name['slow'].status == 'timeout'
+    assert by_name['fast'].ok and by_name['fast'].value == 'ok'
+    assert by_name['broken'].status == 'error' and 'rusak' in by_name['broken'].error
+
+
+def test_results_arrive_as_each_source_finishes():
+    release = threading.Event()
+    results = run_each({'slow': lambda: release.wait(5) and 'slow', 'fast': lambda: 'fast'})
+    try:
+        # Hasil cepat sudah bisa ditampilkan selagi sumber lambat masih berjalan
+        first = next(results)
+        assert first.name == 'fast' and first.ok and not release.is_set()
+        release.set()
+        second = next(results)
+        assert second.name == 'slow' and second.value == 'slow'
+    finally:
+        release.set()
+
+
+def test_registered_sources_use_their_own_timeout():
+    release = threading.Event()
+    register_source('test_slow', "Lambat", lambda keyword, **options: release.wait(5), timeout=0.1)
+    register_source('test_echo', "Echo", lambda keyword, **options: (keyword, options))
+    try:
+        assert [source.name for source in search_sources()][-2:] == ['test_slow', 'test_echo']
+        results = gather(federated_search('cirata', names=['test_slow', 'test_echo'], pages=2,
+                                          per_source={'test_echo': {'pages': 5}}))
+    finally:
+        release.set()
+        unregister_source('test_slow')
+        unregister_source('test_echo')
+    assert results['test_slow'].status == 'timeout'
+    assert results['test_echo'].value == ('cirata', {'pages': 5})
+    assert 'test_slow' not in [source.name for source in search_sources()]
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+import Ask_me_
+import inference_pool
+from answer_memo import AnswerMemo
+from benchmark import StubQAPipeline
+from context_retrieval import narrow_context
+from qa_registry import qa_model_id
+
+QUESTION = "Berapa panjang penghantar?"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Model dari konfigurasi (bukan stub) dimuat di forkserver; di sandbox tanpa torch pemuatannya gagal,
+# tetapi worker yang di-fork dari sana mewarisi konfigurasi dan error itu, proses induk tidak
+PRELOAD_PROBE = """
+import json
+from concurrent.futures import ProcessPoolExecutor
+import inference_pool, qa_registry
+if __name__ == '__main__':
+    qa_registry.configure_qa_model(model='preload-test')
+    context = inference_pool._mp_context(*qa_registry.qa_model_spec())
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        worker = executor.submit(qa_registry.qa_model_stats).result()
+    print(json.dumps({'worker': worker, 'parent': qa_registry.qa_model_stats()}))
+"""
+
+
+def _context(tables):
+    return Ask_me_.build_context_and_response(tables[0], 'cirata')[0]
+
+
+def test_pool_starts_in_background_with_local_fallback(tables, monkeypatch):
+    monkeypatch.setattr(inference_pool, 'INFERENCE_WORKERS', 1)
+    monkeypatch.setattr(Ask_me_, 'INFERENCE_WORKERS', 1)
+    context = _context(tables)
+    expected = StubQAPipeline()(question=QUESTION, context=narrow_context(QUESTION, context, Ask_me_.QA_TOP_K))
+    try:
+        # Request pertama tidak menunggu worker: dijawab stub di proses ini
+        assert Ask_me_.get_answer(QUESTION, context) == expected['answer']
+        inference_pool.prewarm_inference_pool().join()
+        pool = inference_pool.get_inference_pool()
+        assert pool is not None and len(pool.pids) == 1 and Ask_me_.is_qa_model_ready()
+        assert Ask_me_.prewarm_qa_model() is None
+        assert Ask_me_.get_answers([QUESTION, QUESTION], [context, '']) == [expected['answer'],
+                                                                            Ask_me_.NOT_FOUND_MESSAGE]
+        assert pool.stats()['requests'] == 1
+    finally:
+        inference_pool.stop_inference_pool()
+
+
+def test_failed_start_is_recorded(monkeypatch):
+    def broken(workers):
+        raise OSError("tidak bisa membuat proses")
+
+    monkeypatch.setattr(inference_pool, 'start_inference_pool', broken)
+    try:
+        inference_pool.prewarm_inference_pool(1).join()
+        assert inference_pool.ready_inference_pool() is None
+        assert 'tidak bisa' in inference_pool.inference_pool_stats()['start_error']
+        assert inference_pool.prewarm_inference_pool(1) is None
+    finally:
+        inference_pool.stop_inference_pool()
+    assert inference_pool.inference_pool_stats()['start_error'] is None
+
+
+def test_model_is_loaded_in_forkserver_not_parent(tmp_path):
+    done = subprocess.run([sys.executable, '-c', PRELOAD_PROBE], cwd=tmp_path, capture_output=True, text=True,
+                          env=dict(os.environ, PYTHONPATH=ROOT), check=True)
+    report = json.loads(done.stdout.strip().splitlines()[-1])
+    assert report['worker']['model'] == 'preload-test:default' and report['worker']['load_error']
+    assert report['parent']['load_error'] is None and not report['parent']['ready']
+
+
+def test_memo_hit_does_not_start_pool(tables, monkeypatch, tmp_path):
+    memo = AnswerMemo(str(tmp_path / 'answers.sqlite'))
+    context = _context(tables)
+    memo.put(QUESTION, narrow_context(QUESTION, context, Ask_me_.QA_TOP_K), qa_model_id(), 'dari memo', 0.1)
+    monkeypatch.setattr(Ask_me_, 'get_answer_memo', lambda: memo)
+    monkeypatch.setattr(inference_pool, 'INFERENCE_WORKERS', 1)
+    assert Ask_me_.get_answer(QUESTION, context) == 'dari memo'
+    assert inference_pool.get_inference_pool() is None and inference_pool.inference_pool_stats()['starting'] == 0
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import Ask_me_
+import answer_memo
+import query_service
+import snapshot_store
+import startup_bundle
+from compact_frames import memory_report
+from metrics import render_prometheus, stage_summary
+from query_service import QueryService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _no_load(*args, **kwargs):
+    raise AssertionError("collector memuat atau mengecek workbook")
+
+
+def test_memory_report_is_read_from_cache(tables, monkeypatch):
+    monkeypatch.setattr(Ask_me_, 'load_data_pht', _no_load)
+    monkeypatch.setattr(snapshot_store, '_file_signature', _no_load)
+    report = Ask_me_.table_memory_report()
+    assert report == {name: memory_report(df) for name, df in zip(Ask_me_.DATASET_SOURCES, tables)}
+    text = render_prometheus()
+    assert 'table_memory' in text and 'pht_bytes' in text
+
+
+def test_stats_and_metrics_endpoints_do_not_load(tables, monkeypatch):
+    monkeypatch.setattr(Ask_me_, 'load_data_pht', _no_load)
+    monkeypatch.setattr(snapshot_store, '_file_signature', _no_load)
+    service = QueryService(workers=1)
+    try:
+        stats = asyncio.run(service.dispatch('GET', '/stats', b''))
+        metrics = asyncio.run(service.dispatch('GET', '/metrics', b''))
+    finally:
+        service.shutdown()
+    assert set(stats['tables']) == set(Ask_me_.DATASET_SOURCES)
+    assert 'chatbot_' in metrics.body
+
+
+def test_stages_are_recorded(tables):
+    Ask_me_.build_context_and_response(tables[0], 'bekasi')
+    stages = {row['stage'] for row in stage_summary()}
+    assert {'load_data', 'build_indexes'} <= stages
+
+
+def test_metrics_collectors_do_not_touch_sqlite(monkeypatch, tmp_path):
+    memo = answer_memo.AnswerMemo(str(tmp_path / 'answers.sqlite'))
+    memo.get('pertanyaan', 'konteks', 'stub')
+    monkeypatch.setattr(answer_memo, '_MEMO', memo)
+    monkeypatch.setattr(memo, '_connection', _no_load)
+    text = render_prometheus()
+    assert 'answer_memo_misses 1' in text
+    assert answer_memo.answer_memo_stats(entries=False)['entries'] is None
+
+
+def test_metrics_served_during_startup(tables, monkeypatch):
+    monkeypatch.setattr(query_service, 'readiness', lambda: {'ui_ready': False})
+    service = QueryService(workers=1)
+    try:
+        metrics = asyncio.run(service.dispatch('GET', '/metrics', b''))
+        with pytest.raises(query_service.ServiceError):
+            asyncio.run(service.dispatch('GET', '/stats', b''))
+    finally:
+        service.shutdown()
+    assert 'chatbot_' in metrics.body
+
+
+def test_bundle_round_trip(fresh_workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT, CHATBOT_STARTUP_BUNDLE=str(fresh_workdir / 'bundle.pkl'))
+    subprocess.run([sys.executable, os.path.join(ROOT, 'startup_bundle.py'), '--build'], cwd=fresh_workdir,
+                   env=env, capture_output=True, check=True)
+    done = subprocess.run([sys.executable, '-c', startup_bundle._PROBE], cwd=fresh_workdir, env=env,
+                          capture_output=True, text=True, check=True)
+    report = json.loads(done.stdout.strip().splitlines()[-1])
+    assert report['bundle'] == 'loaded' and not report['heavy_modules']
@@ -0,0 +1,48 @@
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+from network_graph import get_network_graph
+
+
+@pytest.fixture(scope='module')
+def pair(tables):
+    row = tables[0].iloc[0]
+    return row['Dari Gitet/Gistet'], row['Ke Gitet/Gistet']
+
+
+def test_detail_penghantar_matches_baseline(tables, baseline_tables, pair):
+    gitet1, gitet2 = (name.lower() for name in pair)
+    expected = baseline_ask_me.handle_user_question("detail penghantar", baseline_tables[0], None,
+                                                    gitet1=gitet1, gitet2=gitet2)
+    assert Ask_me_.answer_intent('detail_penghantar', tables[0], gitet1=gitet1, gitet2=gitet2) == expected
+
+    missing = baseline_ask_me.handle_user_question("detail penghantar", baseline_tables[0], None,
+                                                   gitet1='zzz', gitet2=gitet2)
+    assert Ask_me_.answer_intent('detail_penghantar', tables[0], gitet1='zzz', gitet2=gitet2) == missing
+
+
+def test_penghantar_gitet_lists_every_circuit(tables):
+    expected = tables[0][tables[0]['Dari Gitet/Gistet'].str.contains('cirata', case=False)
+                         | tables[0]['Ke Gitet/Gistet'].str.contains('cirata', case=False)]
+    answer = Ask_me_.answer_intent('penghantar_gitet', tables[0], gitet1='cirata')
+    assert answer == expected[Ask_me_.CIRCUIT_COLUMNS].to_string(index=False)
+
+
+def test_fuzzy_gitet_is_reported(tables):
+    graph = get_network_graph(tables[0])
+    assert graph.match_nodes('cirata') == (graph.find_nodes('cirata'), None)
+    nodes, matched = graph.match_nodes('ciratta')
+    assert nodes and matched == 'GITET CIRATA'
+
+    answer = Ask_me_.answer_intent('penghantar_gitet', tables[0], gitet1='ciratta')
+    note = Ask_me_.FUZZY_NOTE.format(keyword='ciratta', term='GITET CIRATA')
+    assert answer.startswith(note)
+    pht = tables[0]
+    circuits = pht[(pht['Dari Gitet/Gistet'] == 'GITET CIRATA') | (pht['Ke Gitet/Gistet'] == 'GITET CIRATA')]
+    assert answer[len(note):] == circuits[Ask_me_.CIRCUIT_COLUMNS].to_string(index=False)
+
+
+def test_widest_path_uses_graph_names(tables, pair):
+    answer = Ask_me_.answer_intent('jalur_penghantar', tables[0], gitet1=pair[0], gitet2=pair[1])
+    assert answer.startswith(f"Jalur {pair[0]} -> ") and pair[1] in answer.splitlines()[0]
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+
+
+# '1', 'a' dan 'pembangkit 01' jatuh ke cabang Perusahaan tetapi juga cocok dengan kolom lain
+@pytest.mark.parametrize('keyword', ['1', 'a', 'pembangkit 01', 'PT', 'pltu', 'unit 1', 'zzz'])
+def test_pembangkitan_response_matches_baseline(tables, baseline_tables, keyword):
+    expected = baseline_ask_me.build_context_and_response_pembangkitan(baseline_tables[2], keyword)
+    assert Ask_me_.build_context_and_response_pembangkitan(tables[2], keyword) == expected
+
+
+def test_perusahaan_branch_lists_every_matching_row(tables, baseline_tables):
+    title, html = Ask_me_.build_context_and_response_pembangkitan(tables[2], '1')
+    assert title.startswith('Perusahaan: ')
+    rows = baseline_ask_me.search_data_pembangkitan(baseline_tables[2], '1')
+    assert html.count('<tr>\n      <td>') == len(rows)
+
+
+def test_caller_frame_is_not_mutated(baseline_tables):
+    df = baseline_tables[2]
+    before = df.copy()
+    Ask_me_.build_context_and_response_pembangkitan(df, 'pltu')
+    pd.testing.assert_frame_equal(df, before)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+from playbook_store import RUAS_COLUMNS, PlaybookStore, get_playbook_store
+from response_render import HIGHLIGHT_TEMPLATE, compile_highlight, highlight_series
+
+
+def _ruas_rows(df, ruas, prefix=False):
+    key = ruas.lower().strip()
+    match = pd.Series(False, index=df.index)
+    for col in RUAS_COLUMNS:
+        names = df[col].astype(str).str.lower().str.strip()
+        match |= names.str.startswith(key) if prefix else names == key
+    return df[match.to_numpy()]
+
+
+# Baseline mencari keyword sebagai regex; nama ruas sintetis tidak punya karakter khusus regex
+def _baseline_playbook(df, ruas, prefix=False):
+    rows = _ruas_rows(df, ruas, prefix)
+    return baseline_ask_me.build_context_and_response_mitigasi(rows, ruas)[1] if len(rows) else None
+
+
+@pytest.mark.parametrize('column', RUAS_COLUMNS)
+def test_exact_ruas_matches_baseline(tables, baseline_tables, column):
+    ruas = str(baseline_tables[1][column].iloc[4])
+    expected = _baseline_playbook(baseline_tables[1], ruas)
+    assert Ask_me_.mitigasi_playbook(tables[1], ruas) == expected
+    assert Ask_me_.mitigasi_playbook(tables[1], ruas.lower()) == expected
+    # Spasi di awal/akhir diabaikan saat lookup
+    assert Ask_me_.mitigasi_playbook(tables[1], f"  {ruas.title()} ", highlight=False) == (
+        Ask_me_.mitigasi_playbook(tables[1], ruas, highlight=False))
+
+
+def test_prefix_ruas_matches_baseline(tables, baseline_tables):
+    ruas = 'SUTET GITET CIRATA'
+    assert not len(get_playbook_store(tables[1]).lookup(ruas))
+    assert Ask_me_.mitigasi_playbook(tables[1], ruas) == _baseline_playbook(baseline_tables[1], ruas, prefix=True)
+    assert Ask_me_.mitigasi_playbook(tables[1], 'zzz') is None
+
+
+def test_plain_playbook_has_no_highlight(tables):
+    ruas = str(tables[1]['SUTET'].iloc[0])
+    plain = Ask_me_.mitigasi_playbook(tables[1], ruas, highlight=False)
+    assert '<span' not in plain and plain.count('## ***') == len(_ruas_rows(tables[1], ruas))
+
+
+def _contingencies(**overrides):
+    df = pd.DataFrame({
+        'SUTET': ['Cirata - Bekasi (1)', 'Cirata - Bekasi (2)', '  ', 'Muara Karang', None],
+        'N-1': ['Cirata - Bekasi (1)', 'Bekasi - Cibinong', 'Straße', 'Cirata - Bekasi (1)', 'Priok'],
+        'N-1-1': ['Priok', None, None, 'priok', 'Priok'],
+        'N-1-2': [None, None, None, None, None],
+        'Mitigasi_1': ["Buka PMT Priok", None, "Manuver", "Lepas beban\nCek Cirata - Bekasi (1)", None],
+        'Mitigasi_2': [None] * 5,
+        'Mitigasi_3': [None] * 5,
+        'Ket': ['-'] * 5,
+    })
+    return df.assign(**overrides)
+
+
+# Highlight lewat regex pada playbook yang sama, sebagai pembanding offset yang dihitung saat load
+def _regex_render(store, positions, keyword):
+    texts = pd.Series([store.playbook(row) for row in positions], dtype=object)
+    highlighted = highlight_series(texts, compile_highlight(keyword), HIGHLIGHT_TEMPLATE.format(keyword.upper()))
+    return "\n\n".join(highlighted)
+
+
+def test_lookup_edge_cases():
+    store = PlaybookStore(_contingencies())
+    # Ruas yang muncul di dua kolom baris yang sama tetap satu baris; sel kosong/spasi bukan key
+    assert store.lookup('cirata - bekasi (1)').tolist() == [0, 3]
+    assert store.lookup('CIRATA - BEKASI', prefix=True).tolist() == [0, 1, 3]
+    assert store.lookup('priok').tolist() == [0, 3, 4]
+    assert not len(store.lookup('')) and not len(store.lookup('   ')) and not len(store.lookup('', prefix=True))
+    assert '' not in store.keys and 'nan' not in store.keys
+
+    empty = PlaybookStore(_contingencies().iloc[:0])
+    assert len(empty) == 0 and not len(empty.lookup('priok')) and empty.render([], 'priok') == ('', '')
+
+
+@pytest.mark.parametrize('keyword', ['Cirata - Bekasi (1)', 'priok', 'lepas beban', 'Straße'])
+def test_precomputed_highlight_matches_regex(keyword):
+    store = PlaybookStore(_contingencies())
+    positions = np.arange(len(store))
+    highlighted, plain = store.render(positions, keyword)
+    assert highlighted == _regex_render(store, positions, keyword)
+    assert plain == "\n\n".join(store.playbook(row) for row in positions)
+
+
+def test_case_changing_key_is_highlighted_like_regex():
+    # 'ß'.upper() == 'SS': regex tidak menemukan 'Straße' di playbook (huruf besar), offset juga tidak
+    store = PlaybookStore(_contingencies())
+    positions = store.lookup('straße')
+    assert positions.tolist() == [2] and store.has_offsets
+    highlighted, plain = store.render(positions, 'Straße')
+    assert highlighted == plain == _regex_render(store, positions, 'Straße')
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+import baseline_ask_me
+import Ask_me_
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_model():
+    code = "import sys, Ask_me_; print(sorted(m for m in ('torch', 'transformers') if m in sys.modules))"
+    done = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert done.stdout.strip() == '[]'
+
+
+def test_get_answer_matches_baseline(tables, baseline_tables):
+    # Konteks pendek (tidak dipersempit) harus dijawab sama persis seperti baseline
+    context, _ = baseline_ask_me.build_context_and_response(baseline_tables[0], 'cirata')
+    short = "\n".join(context.splitlines()[:Ask_me_.QA_TOP_K + 1])
+    question = "Berapa panjang penghantar?"
+    assert Ask_me_.get_answer(question, short) == baseline_ask_me.get_answer(question, short)
+    assert Ask_me_.get_answer(question, '') == baseline_ask_me.get_answer(question, '')
+
+
+def test_qa_model_attribute_is_lazy_alias(stub_qa_model):
+    assert Ask_me_.qa_model is stub_qa_model
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import Ask_me_
+import baseline_ask_me
+from query_service import MAX_BODY_BYTES, QueryService, ServiceError
+
+BASELINE_BUILDERS = {
+    'pht': baseline_ask_me.build_context_and_response,
+    'mitigasi': baseline_ask_me.build_context_and_response_mitigasi,
+    'pembangkitan': baseline_ask_me.build_context_and_response_pembangkitan,
+}
+
+
+@pytest.fixture(scope='module')
+def service(tables):
+    service = QueryService(workers=2, timeout=60)
+    yield service
+    service.shutdown()
+
+
+def call(service, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    return asyncio.run(service.dispatch(method, path, body))
+
+
+@pytest.mark.parametrize('keyword', ['1', 'cirata', 'zzz'])
+def test_search_matches_baseline(service, baseline_tables, keyword):
+    results = call(service, 'POST', '/search', {'keyword': keyword})['results']
+    for (name, builder), df in zip(BASELINE_BUILDERS.items(), baseline_tables):
+        context, response = builder(df, keyword)
+        assert results[name]['context'] == context
+        assert results[name]['response'] == response
+        assert results[name]['found'] == (context is not None)
+
+
+def test_answer_and_intent(service, baseline_tables):
+    context, _ = baseline_ask_me.build_context_and_response(baseline_tables[0], 'cirata')
+    short = "\n".join(context.splitlines()[:6])
+    answer = call(service, 'POST', '/answer', {'question': "Berapa panjang?", 'context': short})
+    assert answer == {'answer': baseline_ask_me.get_answer("Berapa panjang?", short), 'found': True}
+
+    intent = call(service, 'POST', '/intent', {'question': "Berapa total PHT wilayah?"})
+    assert intent['intent'] == 'total_pht' and intent['missing_inputs'] == ['wilayah']
+
+
+@pytest.mark.parametrize('method, path, body, status', [
+    ('GET', '/nope', None, 404),
+    ('GET', '/search', None, 405),
+    ('POST', '/search', {'keyword': ''}, 400),
+    ('POST', '/search', {'keyword': 'a', 'dataset': 'x'}, 400),
+    ('POST', '/search', {'keyword': 'a', 'page': -1}, 400),
+    ('POST', '/search', {'keyword': 'a', 'highlight': 'false'}, 400),
+    ('POST', '/search', {'keyword': 'a', 'fuzzy': 1}, 400),
+    ('POST', '/playbook', {'ruas': 'a', 'highlight': 'false'}, 400),
+])
+def test_invalid_requests(service, method, path, body, status):
+    with pytest.raises(ServiceError) as error:
+        call(service, method, path, body)
+    assert error.value.status == status
+
+
+def test_highlight_false_is_respected(service, tables):
+    results = call(service, 'POST', '/search', {'keyword': 'cirata', 'dataset': 'pht', 'highlight': False})['results']
+    context, response = Ask_me_.build_context_and_response(tables[0], 'cirata', highlight=False)
+    assert results['pht']['response'] == response != call(service, 'POST', '/search', {'keyword': 'cirata'})['results']['pht']['response']
+
+
+def _raw_requests(service, data):
+    async def request():
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(data)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+    return asyncio.run(request())
+
+
+def test_chunked_body_is_rejected(service):
+    request = (b"POST /search HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+               b"11\r\n{\"keyword\": \"1\"}\r\n0\r\n\r\n")
+    assert _raw_requests(service, request).startswith(b"HTTP/1.1 411 ")
+
+
+def test_timeout_keeps_slot_until_work_finishes():
+    service = QueryService(workers=1, max_pending=1, timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(ServiceError) as timeout:
+            await service.run_blocking(service.executor, release.wait, 5)
+        # Pekerjaan yang timeout masih berjalan: slot tetap terpakai, request berikutnya ditolak
+        with pytest.raises(ServiceError) as busy:
+            await service.run_blocking(service.executor, time.sleep, 0)
+        release.set()
+        while service.pending:
+            await asyncio.sleep(0.01)
+        return timeout.value, busy.value, await service.run_blocking(service.executor, lambda: 'ok')
+
+    try:
+        timeout, busy, result = asyncio.run(scenario())
+    finally:
+        release.set()
+        service.shutdown()
+    assert timeout.status == 504 and busy.status == 503 and busy.headers == {'Retry-After': '1'}
+    assert result == 'ok'
+    assert service.counters['timeouts'] == 1 and service.counters['rejected'] == 1 and service.pending == 0
+
+
+def test_keep_alive_and_oversized_body(service):
+    body = json.dumps({'keyword': 'cirata', 'dataset': 'pht'}).encode('utf-8')
+    search = b"POST /search HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+    response = _raw_requests(service, search + search.replace(b"HTTP/1.1\r\n", b"HTTP/1.1\r\nConnection: close\r\n"))
+    assert response.count(b"HTTP/1.1 200 ") == 2
+
+    too_big = b"POST /search HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (MAX_BODY_BYTES + 1)
+    assert _raw_requests(service, too_big).startswith(b"HTTP/1.1 413 ")
@@ -0,0 +1,67 @@
+import re
+
+import pandas as pd
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+from response_render import HIGHLIGHT_TEMPLATE, render_mitigasi_responses, render_pht_responses
+
+KEYWORDS = ['cirata', 'Bekasi', '1', '48', 'jointing', 'upt', 'zzz']
+
+
+def strip_highlight(text):
+    return re.sub(r'<span style="background-color: yellow">(.*?)</span>', r'\1', text)
+
+
+@pytest.mark.parametrize('keyword', KEYWORDS)
+def test_pht_response_matches_baseline(tables, baseline_tables, keyword):
+    expected = baseline_ask_me.build_context_and_response(baseline_tables[0], keyword)
+    assert Ask_me_.build_context_and_response(tables[0], keyword) == expected
+
+    # Varian tanpa highlight = baseline tanpa tag (baseline menulis keyword dalam huruf besar)
+    _, plain = Ask_me_.build_context_and_response(tables[0], keyword, highlight=False)
+    assert plain.lower() == strip_highlight(expected[1]).lower()
+
+
+@pytest.mark.parametrize('keyword', KEYWORDS)
+def test_mitigasi_response_matches_baseline(tables, baseline_tables, keyword):
+    expected = baseline_ask_me.build_context_and_response_mitigasi(baseline_tables[1], keyword)
+    assert Ask_me_.build_context_and_response_mitigasi(tables[1], keyword) == expected
+
+    _, plain = Ask_me_.build_context_and_response_mitigasi(tables[1], keyword, highlight=False)
+    assert plain.lower() == strip_highlight(expected[1]).lower()
+
+
+def _pht_rows(**overrides):
+    row = {'Dari Gitet/Gistet': 'Cirata', 'Ke Gitet/Gistet': 'Bekasi (Baru)', 'Sirkit ke': 1,
+           'Panjang Penghantar': 12.5, 'Nominal Arus (A)': 2000, 'Kemampuan Penghantar (A)': None,
+           'Wilayah': 'upt bekasi', 'Keterangan Penyebab Derating': 'Jointing 1.5\\2 ($)', 'Deklarasi Kemampuan (%)': 0.5}
+    row.update(overrides)
+    return pd.DataFrame([row, row])
+
+
+@pytest.mark.parametrize('keyword', ['(baru)', '1.5', '\\2', '$', 'g 1'])
+def test_keyword_is_highlighted_literally(keyword):
+    # Keyword berisi karakter regex/backslash: tidak error, di-highlight apa adanya
+    highlighted, plain = render_pht_responses(_pht_rows(), keyword)
+    assert strip_highlight(highlighted).lower() == plain.lower()
+    assert highlighted.count(HIGHLIGHT_TEMPLATE.format(keyword.upper())) == plain.lower().count(keyword.lower()) > 0
+
+
+def test_missing_values_and_numbering():
+    _, plain = render_pht_responses(_pht_rows(Wilayah=None), 'cirata', start=51)
+    lines = plain.splitlines()
+    assert [line.split('. ', 1)[0] for line in lines] == ['51', '52']
+    assert "ada di wilayah tidak tersedia" in lines[0] and "maksimal sebesar tidak tersedia A, 50.0 %" in lines[0]
+    assert render_pht_responses(_pht_rows().iloc[:0], 'cirata') == ('', '')
+
+
+def test_mitigasi_defaults_for_missing_columns_and_steps():
+    result = pd.DataFrame({'SUTET': ['Cirata - Bekasi'], 'Mitigasi_1': ["buka PMT\n\n  manuver beban "],
+                           'Mitigasi_2': [None]})
+    highlighted, plain = render_mitigasi_responses(result, 'bekasi')
+    assert "di ruas **Data N-1 tidak ditemukan**:\n- buka PMT\n- manuver beban\n\n" in plain
+    assert "**MITIGASI N-1-1** di ruas **tidak tersedia**:\nTidak ada mitigasi yang tersedia." in plain
+    assert plain.endswith("**KETERANGAN** : **tidak ada**")
+    assert HIGHLIGHT_TEMPLATE.format('BEKASI') in highlighted and strip_highlight(highlighted).lower() == plain.lower()
@@ -0,0 +1,51 @@
+import baseline_ask_me
+import Ask_me_
+import result_cache
+from embedding_index import get_embedding_index
+from result_cache import cached_result, result_cache_stats
+
+
+def test_cached_response_matches_baseline_for_any_case(tables, baseline_tables):
+    expected = baseline_ask_me.build_context_and_response(baseline_tables[0], 'cirata')
+    before = result_cache_stats()['hits']
+    for keyword in ('cirata', 'CIRATA', 'Cirata'):
+        assert Ask_me_.build_context_and_response(tables[0], keyword) == expected
+    assert result_cache_stats()['hits'] >= before + 2
+
+
+def test_versions_in_use_do_not_evict_each_other(tables, monkeypatch):
+    # Dua versi tabel yang dipakai bersamaan (misal saat watcher menukar tabel)
+    old, new = tables[0], tables[0].copy()
+    monkeypatch.setattr(result_cache, 'frame_version', lambda df: 'v1' if df is old else 'v2')
+    calls = []
+
+    def compute(label):
+        calls.append(label)
+        return label
+
+    for _ in range(3):
+        assert cached_result('test', old, 'x', lambda: compute('old')) == 'old'
+        assert cached_result('test', new, 'x', lambda: compute('new')) == 'new'
+    assert calls == ['old', 'new']
+
+
+def test_frames_outside_workbooks_are_not_cached(tables):
+    df = tables[0].head(10)
+    calls = []
+    for _ in range(2):
+        cached_result('test', df, 'x', lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_fuzzy_note_uses_normalized_keyword(tables):
+    get_embedding_index(tables[0])
+    first, _, _ = Ask_me_.get_response_page('pht', tables[0], 'ciratta', fuzzy=True)
+    second, _, _ = Ask_me_.get_response_page('pht', tables[0], 'Ciratta', fuzzy=True)
+    assert first == second
+    assert first.startswith(Ask_me_.FUZZY_NOTE.format(keyword='CIRATTA', term='cirata'))
+
+
+def test_cache_key_matches_search_normalization():
+    # 'ß'.upper() == 'SS', tetapi pencarian (lowercase) membedakan keduanya
+    assert result_cache.normalize_keyword('Straße') != result_cache.normalize_keyword('STRASSE')
+    assert result_cache.normalize_keyword('CIRATA') == result_cache.normalize_keyword('cirata')
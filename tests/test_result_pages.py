@@ -0,0 +1,91 @@
+import re
+
+import numpy as np
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+from result_pages import ResultPages, pht_pages, table_pages
+from search_index import get_search_index
+
+ROW_TAG = '<tr>\n      <td>'
+
+
+@pytest.mark.parametrize('keyword', ['cirata', '1', 'gitet'])
+def test_pht_pages_join_to_baseline(tables, baseline_tables, keyword):
+    _, expected = baseline_ask_me.build_context_and_response(baseline_tables[0], keyword)
+    pages = Ask_me_.result_pages('pht', tables[0], keyword, page_size=37)
+    assert pages.total == Ask_me_.count_matches(tables[0], keyword)
+    assert "\n".join(highlighted for highlighted, _ in pages) == expected
+
+
+@pytest.mark.parametrize('keyword', ['cirata', '1'])
+def test_mitigasi_pages_join_to_baseline(tables, baseline_tables, keyword):
+    _, expected = baseline_ask_me.build_context_and_response_mitigasi(baseline_tables[1], keyword)
+    pages = Ask_me_.result_pages('mitigasi', tables[1], keyword, page_size=37)
+    assert "\n\n".join(highlighted for highlighted, _ in pages) == expected
+
+
+# '1' = cabang Perusahaan (semua baris hasil pencarian), 'pltu' = cabang Jenis
+@pytest.mark.parametrize('keyword', ['1', 'pltu'])
+def test_pembangkitan_pages_cover_baseline_rows(tables, baseline_tables, keyword):
+    _, expected = baseline_ask_me.build_context_and_response_pembangkitan(baseline_tables[2], keyword)
+    pages = Ask_me_.result_pages('pembangkitan', tables[2], keyword, page_size=37)
+    html = [highlighted for highlighted, _ in pages]
+    assert pages.total == expected.count(ROW_TAG)
+    assert all(page.count(ROW_TAG) <= 37 for page in html)
+    assert sum(page.count(ROW_TAG) for page in html) == pages.total
+    # Subtotal per Wilayah dan total global sama dengan baseline
+    totals = re.compile(r"Total for .*?</tr>|<h3>Global Sum</h3>.*")
+    assert totals.findall("".join(html)) == totals.findall(expected)
+
+
+def test_response_page_flags(tables):
+    total = Ask_me_.count_matches(tables[0], 'gitet')
+    text, count, has_more = Ask_me_.get_response_page('pht', tables[0], 'gitet', page=0, page_size=10)
+    assert count == total and has_more and text.startswith('1. ')
+    last = (total - 1) // 10
+    text, _, has_more = Ask_me_.get_response_page('pht', tables[0], 'gitet', page=last, page_size=10)
+    assert not has_more and text.startswith(f'{last * 10 + 1}. ')
+    assert Ask_me_.get_response_page('pht', tables[0], 'zzz') == (Ask_me_.NOT_FOUND_MESSAGE, 0, False)
+
+
+def test_intent_pages_join_to_baseline_rows(tables, baseline_tables):
+    expected = baseline_ask_me.handle_user_question("daftar penghantar pht", baseline_tables[0], None)
+    pages = Ask_me_.intent_pages('daftar_penghantar', tables[0], page_size=100)
+    assert pages.total == len(tables[0])
+    rows = [line.split() for text, _ in pages for line in text.splitlines()[1:]]
+    assert rows == [line.split() for line in expected.splitlines()[1:]]
+
+
+def test_page_bounds_and_exact_multiple(tables):
+    positions = get_search_index(tables[0]).positions('gitet')[:40]
+    pages = pht_pages(tables[0], positions, 'gitet', page_size=10)
+    assert (pages.total, len(pages)) == (40, 4)
+    assert pages.page(-1) is None and pages.page(4) is None
+    assert pages.has_more(2) and not pages.has_more(3)
+    assert pages.page(3)[1].splitlines()[-1].startswith('40. ')
+
+    empty = pht_pages(tables[0], positions[:0], 'gitet', page_size=10)
+    assert (empty.total, len(empty), empty.page(0)) == (0, 1, ('', ''))
+
+
+def test_page_past_the_end_is_empty(tables):
+    total = Ask_me_.count_matches(tables[0], 'cirata')
+    assert Ask_me_.get_response_page('pht', tables[0], 'cirata', page=total, page_size=1) == ('', total, False)
+
+
+def test_only_requested_pages_are_rendered():
+    rendered = []
+    pages = ResultPages(25, 3, lambda number: rendered.append(number) or (str(number), str(number)))
+    assert pages.page(1) == ('1', '1') and rendered == [1]
+    iterator = iter(pages)
+    assert next(iterator) == ('0', '0') and rendered == [1, 0]
+
+
+def test_table_pages_keep_row_order_across_pages(tables):
+    columns = ['Dari Gitet/Gistet', 'Ke Gitet/Gistet']
+    positions = np.arange(len(tables[0]))
+    pages = table_pages(tables[0], positions, columns, page_size=7)
+    rows = [line.split() for text, _ in pages for line in text.splitlines()[1:]]
+    assert rows == [line.split() for line in tables[0][columns].to_string(index=False).splitlines()[1:]]
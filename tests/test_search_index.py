@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+import baseline_ask_me
+import Ask_me_
+import search_index
+from search_index import get_search_index, invalidate_search_index
+
+KEYWORDS = ['cirata', 'Bekasi', '1', '48', 'jointing', 'PLTU', 'unit 1', 'gitet', '-', 'zzz']
+
+
+# Tabel compact (category) dan tabel baseline (object) dibandingkan sebagai object, sel kosong = None
+def assert_same_rows(actual, expected):
+    if expected is None:
+        assert actual is None
+        return
+    assert actual is not None
+    pd.testing.assert_frame_equal(actual.astype(object).where(actual.notna(), None),
+                                  expected.astype(object).where(expected.notna(), None))
+
+
+@pytest.mark.parametrize('keyword', KEYWORDS)
+def test_search_data_matches_baseline(tables, baseline_tables, keyword):
+    assert_same_rows(Ask_me_.search_data(tables[0], keyword),
+                     baseline_ask_me.search_data(baseline_tables[0], keyword))
+
+
+@pytest.mark.parametrize('keyword', KEYWORDS)
+def test_search_data_mitigasi_matches_baseline(tables, baseline_tables, keyword):
+    assert_same_rows(Ask_me_.search_data_mitigasi(tables[1], keyword),
+                     baseline_ask_me.search_data_mitigasi(baseline_tables[1], keyword))
+
+
+@pytest.mark.parametrize('keyword', KEYWORDS)
+def test_search_data_pembangkitan_matches_baseline(tables, baseline_tables, keyword):
+    # Baseline mengonversi DMN/TML ke numerik sebelum mencari; tabel Ask_me_ sudah numerik sejak load
+    df_2 = baseline_tables[2]
+    df_2['DMN'] = pd.to_numeric(df_2['DMN'], errors='coerce').fillna(0)
+    df_2['TML'] = pd.to_numeric(df_2['TML'], errors='coerce').fillna(0)
+    assert_same_rows(Ask_me_.search_data_pembangkitan(tables[2], keyword),
+                     baseline_ask_me.search_data_pembangkitan(df_2, keyword))
+
+
+def test_count_matches(tables, baseline_tables):
+    for keyword in ('cirata', '1', 'zzz'):
+        expected = baseline_ask_me.search_data(baseline_tables[0], keyword)
+        assert Ask_me_.count_matches(tables[0], keyword) == (0 if expected is None else len(expected))
+
+
+# Pencarian substring literal brute-force di atas row.astype(str), sebagai pembanding index
+def _brute_force(df, keyword):
+    needle = keyword.lower()
+    return [i for i, (_, row) in enumerate(df.iterrows()) if any(needle in str(v).lower() for v in row)]
+
+
+@pytest.fixture
+def small_table():
+    return pd.DataFrame({
+        'Ruas': ['Cirata - Bekasi', 'A.B (1)', 'ab', 'x+y', None, 'Saguling'],
+        'Kode': ['cd', 'a*b', 'cd', '[x]', 'nan', 'C.D'],
+        'Sirkit': [1, 2, 12, 1, 3, 21],
+    })
+
+
+@pytest.mark.parametrize('keyword', ['.', '(1)', 'a*b', '[x]', 'x+y', 'c.d', 'bc', 'na', 'n', '', '1', 'CIRATA', 'zz'])
+def test_literal_matches_without_crossing_cells(small_table, keyword):
+    # 'bc' tidak boleh cocok lintas sel ('ab' + 'cd'); karakter regex dicari apa adanya
+    assert get_search_index(small_table).positions(keyword).tolist() == _brute_force(small_table, keyword)
+
+
+def test_categorical_columns_match_values_and_missing_cells(small_table):
+    compact = small_table.astype({'Ruas': 'category', 'Kode': 'category'})
+    for keyword in ('nan', 'a.b', 'bekasi', '12', 'cd'):
+        assert get_search_index(compact).positions(keyword).tolist() == _brute_force(small_table, keyword)
+
+
+@pytest.mark.parametrize('scan_fraction, verify_limit', [(0.0, 2048), (1.0, 0), (1.0, 2048)])
+def test_scan_and_posting_paths_agree(tables, scan_fraction, verify_limit, monkeypatch):
+    # Paksa jalur scan korpus, intersect posting list, dan verifikasi kandidat langsung
+    index = get_search_index(tables[0])
+    keywords = ('cirata', 'bekasi', '500', 'ng', 'zzz')
+    expected = [index.positions(keyword).tolist() for keyword in keywords]
+    monkeypatch.setattr(search_index, '_SCAN_FRACTION', scan_fraction)
+    monkeypatch.setattr(search_index, '_VERIFY_LIMIT', verify_limit)
+    assert [index.positions(keyword).tolist() for keyword in keywords] == expected
+    assert any(expected) and not expected[-1]
+
+
+def test_invalidate_rebuilds_after_in_place_edit(small_table):
+    assert get_search_index(small_table).positions('saguling').tolist() == [5]
+    small_table.loc[0, 'Ruas'] = 'Saguling - Cibinong'
+    assert get_search_index(small_table).positions('saguling').tolist() == [5]
+    invalidate_search_index(small_table)
+    assert get_search_index(small_table).positions('saguling').tolist() == [0, 5]
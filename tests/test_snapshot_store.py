@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+import pytest
+
+import snapshot_store
+from snapshot_store import frame_version, load_excel_cached, table_changed
+
+
+# Sel kosong boleh kembali sebagai None atau NaN (keduanya pd.isnull di Ask_me_)
+def assert_same_table(actual, expected):
+    pd.testing.assert_frame_equal(actual.astype(object).where(actual.notna(), None),
+                                  expected.astype(object).where(expected.notna(), None))
+
+
+def _no_excel(*args, **kwargs):
+    raise AssertionError("workbook di-parse ulang, snapshot tidak dipakai")
+
+
+def test_snapshot_matches_read_excel(fresh_workdir, monkeypatch):
+    from Ask_me_ import PHT_FILE
+
+    expected = pd.read_excel(PHT_FILE)
+    first = load_excel_cached(PHT_FILE)
+    assert_same_table(first, expected)
+
+    # Seperti proses baru (tabel belum ada di cache per proses): snapshot dibaca, bukan workbook.
+    # Hanya tabel ini yang dibuang, tabel milik test lain tetap di cache.
+    snapshot_store._TABLES.pop((os.path.abspath(PHT_FILE), 0))
+    monkeypatch.setattr(snapshot_store.pd, 'read_excel', _no_excel)
+    second = load_excel_cached(PHT_FILE)
+    assert_same_table(second, expected)
+    assert load_excel_cached(PHT_FILE) is second
+
+
+def test_touch_keeps_version_and_edit_changes_it(fresh_workdir):
+    from Ask_me_ import PEMBANGKITAN_FILE
+
+    df = load_excel_cached(PEMBANGKITAN_FILE)
+    version = frame_version(df)
+    assert version is not None and not table_changed(PEMBANGKITAN_FILE)
+
+    stat = os.stat(PEMBANGKITAN_FILE)
+    os.utime(PEMBANGKITAN_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert table_changed(PEMBANGKITAN_FILE)
+    assert load_excel_cached(PEMBANGKITAN_FILE) is df
+
+    edited = pd.read_excel(PEMBANGKITAN_FILE)
+    edited.loc[0, 'TML'] = 12345.6
+    edited.to_excel(PEMBANGKITAN_FILE, index=False)
+    reloaded = load_excel_cached(PEMBANGKITAN_FILE)
+    assert reloaded is not df and frame_version(reloaded) != version
+    assert reloaded.loc[0, 'TML'] == pytest.approx(12345.6)
+
+
+
+def test_same_basename_in_other_directory_gets_own_snapshot(fresh_workdir, monkeypatch):
+    from Ask_me_ import PEMBANGKITAN_FILE
+
+    other = fresh_workdir / 'cabang' / PEMBANGKITAN_FILE
+    other.parent.mkdir()
+    edited = pd.read_excel(PEMBANGKITAN_FILE)
+    edited.loc[0, 'TML'] = 999.5
+    edited.to_excel(other, index=False)
+
+    assert snapshot_store._snapshot_base(PEMBANGKITAN_FILE, 0) != snapshot_store._snapshot_base(str(other), 0)
+    first, second = load_excel_cached(PEMBANGKITAN_FILE), load_excel_cached(str(other))
+    assert first.loc[0, 'TML'] != pytest.approx(999.5) and second.loc[0, 'TML'] == pytest.approx(999.5)
+
+    # Proses baru: masing-masing workbook dibaca dari snapshot-nya sendiri
+    for path in (PEMBANGKITAN_FILE, str(other)):
+        snapshot_store._TABLES.pop((os.path.abspath(path), 0))
+    monkeypatch.setattr(snapshot_store.pd, 'read_excel', _no_excel)
+    assert_same_table(load_excel_cached(PEMBANGKITAN_FILE), first)
+    assert_same_table(load_excel_cached(str(other)), second)
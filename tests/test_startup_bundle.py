@@ -0,0 +1,64 @@
+import json
+import operator
+import pickle
+
+import numpy as np
+import pytest
+
+import Ask_me_
+import startup_bundle
+
+
+class _Broken:
+    def __reduce__(self):
+        return operator.truediv, (1, 0)
+
+
+@pytest.fixture
+def bundle(tables, tmp_path):
+    path = str(tmp_path / 'bundle.pkl')
+    startup_bundle.write_bundle({name: (source, sheet, df) for (name, (source, sheet, _, _)), df
+                                 in zip(Ask_me_.DATASET_SOURCES.items(), tables)}, path)
+    return path
+
+
+def _sources():
+    return {name: (source, sheet) for name, (source, sheet, _, _) in Ask_me_.DATASET_SOURCES.items()}
+
+
+def _rewrite(path, header=None, body=None):
+    with open(path, 'rb') as f:
+        old_header, old_body = startup_bundle._split(f.read())
+    with open(path, 'wb') as f:
+        f.write(startup_bundle.BUNDLE_MAGIC)
+        f.write(json.dumps(header or old_header).encode('utf-8') + b'\n')
+        f.write(bytes(old_body) if body is None else body)
+    return old_header
+
+
+def test_header_records_pickled_modules(bundle):
+    header = _rewrite(bundle)
+    assert header['numpy'] == np.__version__
+    assert {'search_index', 'network_graph', 'playbook_store'} <= set(header['modules'])
+    assert startup_bundle._compatible(header)
+
+
+def test_changed_source_module_is_incompatible(bundle):
+    header = _rewrite(bundle)
+    header['modules']['search_index'] = '0' * 64
+    _rewrite(bundle, header)
+    assert startup_bundle.load_bundle(_sources(), bundle) == {}
+    assert startup_bundle.startup_bundle_stats()['status'] == 'incompatible'
+
+
+def test_other_numpy_is_incompatible(bundle, monkeypatch):
+    monkeypatch.setattr(np, '__version__', '0.0.1')
+    assert startup_bundle.load_bundle(_sources(), bundle) == {}
+    assert startup_bundle.startup_bundle_stats()['status'] == 'incompatible'
+
+
+def test_any_unpickling_error_falls_back(bundle):
+    _rewrite(bundle, body=pickle.dumps({'pht': _Broken()}))
+    assert startup_bundle.load_bundle(_sources(), bundle) == {}
+    stats = startup_bundle.startup_bundle_stats()
+    assert stats['status'] == 'error' and 'ZeroDivisionError' in stats['error']